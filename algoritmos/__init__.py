@@ -0,0 +1,25 @@
+"""
+Lógica clínica de los algoritmos EMD y DMRE, sin dependencia de Streamlit.
+
+Las versiones escalares (una visita) se importan desde aquí. Las versiones
+vectorizadas para cohortes viven en `algoritmos.lote` (requieren NumPy) para
+que importar este paquete siga siendo prácticamente instantáneo.
+"""
+from .dmre import JUSTIFICACIONES_DMRE, PLANES_DMRE, algoritmo_dmre
+from .emd import JUSTIFICACIONES_EMD, PLANES_EMD, algoritmo_emd, justificaciones_emd
+from .resultados import TEXTOS, ResultadoDMRE, ResultadoEMD, evaluar_dmre, evaluar_emd
+
+__all__ = [
+    "JUSTIFICACIONES_DMRE",
+    "JUSTIFICACIONES_EMD",
+    "PLANES_DMRE",
+    "PLANES_EMD",
+    "ResultadoDMRE",
+    "ResultadoEMD",
+    "TEXTOS",
+    "algoritmo_dmre",
+    "algoritmo_emd",
+    "evaluar_dmre",
+    "evaluar_emd",
+    "justificaciones_emd",
+]
@@ -0,0 +1,236 @@
+"""
+Agenda de próximas inyecciones por ojo.
+
+Convierte el plan de cada visita evaluada en la fecha de la siguiente inyección
+(fecha de la visita + nuevo intervalo) y la indexa por día: un conjunto de ojos
+por fecha y un árbol de Fenwick con la cantidad de ojos por día. Reprogramar un
+ojo cuesta O(log D) (D = días que abarca la agenda), "cuántos tocan entre A y B"
+también, y "quién toca entre A y B" / "quién está atrasado" son O(log D) por
+día con inyecciones más el tamaño de la respuesta. Para cargar muchas visitas a
+la vez está `cargar`, que arma el índice una sola vez.
+"""
+from datetime import date
+
+from .dmre import INTERVALOS_PLAN_DMRE
+from .resultados import codigo
+
+
+def intervalo_siguiente(algoritmo, plan, semanas_actual):
+    """
+    Semanas hasta la próxima inyección según el plan (código) y el intervalo actual.
+    Devuelve None cuando el plan no fija un intervalo anti-VEGF (Ozurdex,
+    revisar datos, sin decisión automática): esos ojos se programan a mano.
+    """
+    if algoritmo == "dmre":
+        return INTERVALOS_PLAN_DMRE[plan] or semanas_actual
+    if plan in (0, 1, 9):            # fase de carga, switch + carga, mantener Q4W
+        return 4
+    if plan in (4, 7):               # mantener intervalo actual / mantener y reevaluar
+        return semanas_actual
+    if plan == 5:                    # acortar 4 semanas (mínimo Q4W)
+        return max(4, semanas_actual - 4)
+    if plan == 6:                    # acortar 8 semanas (mínimo Q4W)
+        return max(4, semanas_actual - 8)
+    if plan == 8:                    # pasar a Q8W si estaba en Q4W; si no, mantener
+        return max(8, semanas_actual)
+    return None
+
+
+def _ordinal(fecha):
+    """date, datetime/Timestamp o texto ISO → ordinal del día."""
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    return fecha.toordinal()
+
+
+def _semanas(intervalo):
+    """"Q8W" u 8 → 8."""
+    return int(intervalo[1:-1]) if isinstance(intervalo, str) else int(intervalo)
+
+
+class _ConteoPorDia:
+    """
+    Árbol de Fenwick con la cantidad de ojos por día (ordinal), sobre los días
+    [base, base + tamano). Sumar y acumular cuestan O(log D).
+    """
+
+    def __init__(self, base=0, tamano=0, conteos=()):
+        self.base = base
+        self.tamano = tamano
+        self._arbol = [0] * (tamano + 1)
+        # Construcción en O(D): cada nodo pasa su suma a su padre
+        for ordinal, n in conteos:
+            self._arbol[ordinal - base + 1] += n
+        for i in range(1, tamano + 1):
+            padre = i + (i & -i)
+            if padre <= tamano:
+                self._arbol[padre] += self._arbol[i]
+
+    def contiene(self, ordinal):
+        return self.base <= ordinal < self.base + self.tamano
+
+    def sumar(self, ordinal, delta):
+        i = ordinal - self.base + 1
+        while i <= self.tamano:
+            self._arbol[i] += delta
+            i += i & -i
+
+    def acumulado(self, ordinal):
+        """Cantidad de ojos con inyección el día `ordinal` o antes."""
+        i = min(ordinal - self.base + 1, self.tamano)
+        total = 0
+        while i > 0:
+            total += self._arbol[i]
+            i -= i & -i
+        return total
+
+    def dia_del(self, k):
+        """Día del k-ésimo ojo (desde 1) en orden de fecha."""
+        pos = 0
+        paso = 1 << self.tamano.bit_length()
+        while paso:
+            if pos + paso <= self.tamano and self._arbol[pos + paso] < k:
+                pos += paso
+                k -= self._arbol[pos]
+            paso >>= 1
+        return self.base + pos
+
+
+class AgendaInyecciones:
+    """
+    Próxima inyección de cada ojo, indexada por fecha.
+    Los identificadores de ojo deben ser comparables entre sí (todos texto o
+    todos enteros): desempatan el orden dentro de un mismo día.
+    """
+
+    def __init__(self):
+        self._ojos = {}              # ojo → (ordinal, semanas)
+        self._dias = {}              # ordinal → {ojos}
+        self._conteo = _ConteoPorDia()
+        self.sin_programar = set()   # ojos cuyo último plan requiere programación manual
+
+    def __len__(self):
+        return len(self._ojos)
+
+    def __contains__(self, ojo):
+        return ojo in self._ojos
+
+    def _reindexar(self, minimo, maximo):
+        """Rearma los conteos por día para que abarquen [minimo, maximo], con holgura a ambos lados."""
+        if self._dias:
+            minimo, maximo = min(minimo, min(self._dias)), max(maximo, max(self._dias))
+        span = maximo - minimo + 1
+        self._conteo = _ConteoPorDia(
+            minimo - span // 2, 2 * span,
+            ((ordinal, len(ojos)) for ordinal, ojos in self._dias.items()),
+        )
+
+    def _sacar(self, ojo):
+        entrada = self._ojos.pop(ojo, None)
+        if entrada is not None:
+            ordinal = entrada[0]
+            ojos = self._dias[ordinal]
+            ojos.discard(ojo)
+            if not ojos:
+                del self._dias[ordinal]
+            self._conteo.sumar(ordinal, -1)
+
+    def programar(self, ojo, fecha, intervalo_semanas):
+        """Fija a mano la próxima inyección de un ojo (reemplaza la anterior). O(log D)."""
+        self._sacar(ojo)
+        self.sin_programar.discard(ojo)
+        ordinal = _ordinal(fecha)
+        self._ojos[ojo] = (ordinal, intervalo_semanas)
+        if not self._conteo.contiene(ordinal):
+            # Fecha fuera del rango indexado: se rearma con el doble de días (amortizado)
+            self._reindexar(ordinal, ordinal)
+        self._dias.setdefault(ordinal, set()).add(ojo)
+        self._conteo.sumar(ordinal, 1)
+
+    def quitar(self, ojo):
+        self._sacar(ojo)
+        self.sin_programar.discard(ojo)
+
+    def registrar(self, ojo, fecha_visita, algoritmo, plan, intervalo_actual):
+        """
+        Actualiza la agenda con el resultado de una visita recién evaluada.
+        `plan` es el texto que devuelve el evaluador o su código; `intervalo_actual`
+        es "Q8W" o un número de semanas.
+        Devuelve: fecha de la próxima inyección, o None si requiere programación manual.
+        """
+        if isinstance(plan, str):
+            plan = codigo(f"plan_{algoritmo}", plan)
+        semanas = intervalo_siguiente(algoritmo, plan, _semanas(intervalo_actual))
+        if semanas is None:
+            self._sacar(ojo)
+            self.sin_programar.add(ojo)
+            return None
+        proxima = date.fromordinal(_ordinal(fecha_visita) + 7 * semanas)
+        self.programar(ojo, proxima, semanas)
+        return proxima
+
+    def cargar(self, ojos, fechas_visita, algoritmo, planes, intervalos_actuales):
+        """
+        Carga masiva (p. ej. la salida de `puntuar_emd` / `puntuar_dmre`): registra
+        cada fila y arma el índice por día una sola vez al final, O(n + D).
+        Si un ojo aparece varias veces, cuenta la última fila.
+        """
+        categoria = f"plan_{algoritmo}"
+        for ojo, fecha, plan, intervalo in zip(ojos, fechas_visita, planes, intervalos_actuales):
+            if isinstance(plan, str):
+                plan = codigo(categoria, plan)
+            semanas = intervalo_siguiente(algoritmo, int(plan), _semanas(intervalo))
+            if semanas is None:
+                self._ojos.pop(ojo, None)
+                self.sin_programar.add(ojo)
+            else:
+                self._ojos[ojo] = (_ordinal(fecha) + 7 * semanas, semanas)
+                self.sin_programar.discard(ojo)
+        self._dias = {}
+        for ojo, (ordinal, _) in self._ojos.items():
+            self._dias.setdefault(ordinal, set()).add(ojo)
+        if self._dias:
+            self._reindexar(min(self._dias), max(self._dias))
+
+    def fecha(self, ojo):
+        """Próxima inyección de un ojo (None si no está en la agenda)."""
+        entrada = self._ojos.get(ojo)
+        return None if entrada is None else date.fromordinal(entrada[0])
+
+    def _rango(self, desde, hasta):
+        """Posiciones [lo, hi) en orden de fecha de los ojos entre `desde` y `hasta`."""
+        lo = 0 if desde is None else self._conteo.acumulado(_ordinal(desde) - 1)
+        hi = len(self._ojos) if hasta is None else self._conteo.acumulado(_ordinal(hasta))
+        return lo, max(lo, hi)
+
+    def _listar(self, lo, hi):
+        # Los rangos empiezan y terminan en un cambio de día: se recorre día por día
+        salida = []
+        while lo < hi:
+            ordinal = self._conteo.dia_del(lo + 1)
+            ojos = self._dias[ordinal]
+            fecha = date.fromordinal(ordinal)
+            salida.extend((fecha, ojo) for ojo in sorted(ojos))
+            lo += len(ojos)
+        return salida
+
+    def pendientes_entre(self, desde, hasta):
+        """Ojos con inyección entre `desde` y `hasta` (ambos incluidos), por fecha: [(fecha, ojo)]."""
+        return self._listar(*self._rango(desde, hasta))
+
+    def contar_entre(self, desde, hasta):
+        """Como `pendientes_entre` pero sólo el número, en O(log n)."""
+        lo, hi = self._rango(desde, hasta)
+        return hi - lo
+
+    def atrasados(self, hoy=None):
+        """Ojos cuya inyección era antes de `hoy` (por defecto, la fecha actual): [(fecha, ojo)]."""
+        hoy = hoy or date.today()
+        return self._listar(0, self._conteo.acumulado(_ordinal(hoy) - 1))
+
+    def proximo(self):
+        """(fecha, ojo) de la próxima inyección de toda la agenda, o None si está vacía."""
+        if not self._ojos:
+            return None
+        ordinal = self._conteo.dia_del(1)
+        return date.fromordinal(ordinal), min(self._dias[ordinal])
@@ -0,0 +1,259 @@
+"""
+Almacén columnar en disco de visitas, abierto como memmap.
+
+Cada columna es un archivo .npy de ancho fijo dentro de un directorio; al
+abrirlo con `np.load(mmap_mode="r")` no se copia nada a memoria y varios
+procesos que abren el mismo almacén comparten las mismas páginas del sistema.
+Las visitas se guardan ordenadas por (ojo, semana) y `inicio.npy` indica dónde
+empieza cada ojo, así que las visitas de un ojo son una rebanada contigua.
+
+Se convierte una sola vez desde CSV/DataFrame (`crear_almacen` / `convertir_csv`);
+después, las versiones por lotes y el historial leen directamente del almacén.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cohorte import _a_bool
+from .dmre import SEMANAS_ANCLA_SEM16
+from .historial import HistorialOjo, Visita
+from .lote import algoritmo_dmre_lote, algoritmo_emd_lote
+
+TIPOS = ("Naive", "Previo")
+# Etiqueta de intervalo por número de semanas (las no estándar las trata el algoritmo como Q8W)
+_ETIQUETAS_INTERVALO = np.array([f"Q{s}W" for s in range(128)])
+
+# Columnas por visita y su tipo en disco
+COLUMNAS = {
+    "tipo_paciente": np.int8,        # índice en TIPOS
+    "semana": np.int16,
+    "intervalo_semanas": np.int8,
+    "gmc": np.float64,
+    "avmc": np.float32,              # NaN = no medida (exacto para letras enteras)
+    "lsr_micras": np.float64,
+    "lir": np.bool_,
+    "hemorragia_nueva": np.bool_,
+}
+
+VERSION_FORMATO = 2
+# Formatos que se pueden abrir: el 1 guardaba la AVMC como int16 (sin faltantes)
+_FORMATOS_LEGIBLES = (1, 2)
+
+
+def crear_almacen(directorio, visitas):
+    """
+    Escribe un almacén a partir de un DataFrame con las columnas "ojo",
+    "tipo_paciente" ("Naive"/"Previo"), "semana", "intervalo_actual" ("Q8W" o
+    semanas), "gmc", "avmc" (vacía = no medida) y, opcionales, "lsr_micras",
+    "lir", "hemorragia_nueva".
+    "lir" y "hemorragia_nueva" aceptan True/False, 1/0 o "Sí"/"No", como al puntuar.
+    """
+    desconocidos = set(visitas["tipo_paciente"].unique()) - set(TIPOS)
+    if desconocidos:
+        raise ValueError(
+            f"tipo_paciente desconocido: {', '.join(sorted(map(str, desconocidos)))} "
+            f"(usar {' o '.join(TIPOS)})"
+        )
+    os.makedirs(directorio, exist_ok=True)
+    visitas = visitas.sort_values(["ojo", "semana"], kind="stable")
+
+    intervalo = visitas["intervalo_actual"]
+    if not pd.api.types.is_numeric_dtype(intervalo):
+        intervalo = intervalo.astype(str).str.slice(1, -1)
+    datos = {
+        "tipo_paciente": visitas["tipo_paciente"].map({t: i for i, t in enumerate(TIPOS)}),
+        "semana": visitas["semana"],
+        "intervalo_semanas": intervalo.astype(int),
+        "gmc": visitas["gmc"],
+        "avmc": visitas["avmc"],
+        "lsr_micras": visitas.get("lsr_micras", 0.0),
+        # astype(bool) haría True cualquier texto no vacío, incluido "No"
+        "lir": _a_bool(visitas["lir"]) if "lir" in visitas else False,
+        "hemorragia_nueva": _a_bool(visitas["hemorragia_nueva"]) if "hemorragia_nueva" in visitas else False,
+    }
+    n = len(visitas)
+    for nombre, tipo in COLUMNAS.items():
+        columna = np.broadcast_to(np.asarray(datos[nombre]), n).astype(tipo)
+        np.save(os.path.join(directorio, nombre + ".npy"), columna)
+
+    # Índice por ojo: identificadores ordenados y desplazamiento de su primera visita
+    ojo = visitas["ojo"]
+    ojo = ojo.to_numpy() if pd.api.types.is_numeric_dtype(ojo) else ojo.astype(str).to_numpy(dtype=str)
+    cortes = np.flatnonzero(ojo[1:] != ojo[:-1]) + 1
+    inicio = np.concatenate(([0], cortes, [n])).astype(np.int64) if n else np.zeros(1, np.int64)
+    np.save(os.path.join(directorio, "ojos.npy"), ojo[inicio[:-1]])
+    np.save(os.path.join(directorio, "inicio.npy"), inicio)
+
+    with open(os.path.join(directorio, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION_FORMATO, "filas": n, "ojos": len(inicio) - 1}, f)
+
+
+def convertir_csv(ruta_csv, directorio, **opciones_lectura):
+    """Conversión única de un CSV de visitas (mismas columnas que `crear_almacen`)."""
+    crear_almacen(directorio, pd.read_csv(ruta_csv, **opciones_lectura))
+
+
+def _avmc(valor):
+    # NaN en disco → None (no medida), como en `Visita`
+    return None if valor != valor else int(valor)
+
+
+class AlmacenVisitas:
+    """Almacén abierto en modo sólo lectura; cada columna es un memmap."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] not in _FORMATOS_LEGIBLES:
+            raise ValueError(f"Formato de almacén no soportado: {meta['version']!r}")
+        self.columnas = {
+            nombre: np.load(os.path.join(directorio, nombre + ".npy"), mmap_mode="r")
+            for nombre in COLUMNAS
+        }
+        self.ojos = np.load(os.path.join(directorio, "ojos.npy"), mmap_mode="r")
+        self.inicio = np.load(os.path.join(directorio, "inicio.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return int(self.inicio[-1])
+
+    @property
+    def n_ojos(self):
+        return len(self.ojos)
+
+    def posicion(self, ojo):
+        """Posición de un ojo en el índice (búsqueda binaria)."""
+        i = int(np.searchsorted(self.ojos, ojo))
+        if i == len(self.ojos) or self.ojos[i] != ojo:
+            raise KeyError(ojo)
+        return i
+
+    def rebanada(self, ojo):
+        """Filas del ojo como vistas de los memmaps (sin copiar): {columna: array}."""
+        i = self.posicion(ojo)
+        a, b = int(self.inicio[i]), int(self.inicio[i + 1])
+        return {nombre: columna[a:b] for nombre, columna in self.columnas.items()}
+
+    def visitas(self, ojo):
+        """Visitas de un ojo en orden cronológico, como `Visita` (avmc=None si no se midió)."""
+        c = self.rebanada(ojo)
+        return [
+            Visita(semana=int(s), gmc=float(g), avmc=_avmc(a), lir=bool(li), lsr_micras=float(ls), hemorragia_nueva=bool(h))
+            for s, g, a, li, ls, h in zip(c["semana"], c["gmc"], c["avmc"], c["lir"], c["lsr_micras"], c["hemorragia_nueva"])
+        ]
+
+    def historial(self, ojo, algoritmo="dmre", intervalo_inicial="Q8W"):
+        """Reproduce la línea de tiempo del ojo con `HistorialOjo.reproducir`."""
+        tipo = TIPOS[int(self.rebanada(ojo)["tipo_paciente"][0])]
+        return HistorialOjo.reproducir(tipo, self.visitas(ojo), algoritmo, intervalo_inicial)
+
+    def filas(self):
+        """Filas como dicts para `historial.reproducir_cohorte`, ojo por ojo."""
+        c = self.columnas
+        for i, ojo in enumerate(self.ojos):
+            for j in range(int(self.inicio[i]), int(self.inicio[i + 1])):
+                yield {
+                    "ojo": ojo,
+                    "tipo_paciente": TIPOS[c["tipo_paciente"][j]],
+                    "semana": int(c["semana"][j]),
+                    "gmc": float(c["gmc"][j]),
+                    "avmc": _avmc(c["avmc"][j]),
+                    "lir": bool(c["lir"][j]),
+                    "lsr_micras": float(c["lsr_micras"][j]),
+                    "hemorragia_nueva": bool(c["hemorragia_nueva"][j]),
+                }
+
+    def _agregados(self, desde, hasta):
+        """
+        Agregados por visita de los ojos [desde, hasta), con la misma semántica
+        que `HistorialOjo` (basales = primera visita, o primera AVMC medida; mínimo/mejor sobre las
+        visitas anteriores; GMC de semana 16 = primera visita de SEMANAS_ANCLA_SEM16).
+        """
+        a, b = int(self.inicio[desde]), int(self.inicio[hasta])
+        inicio = np.asarray(self.inicio[desde:hasta + 1]) - a
+        c = {nombre: columna[a:b] for nombre, columna in self.columnas.items()}
+        n = b - a
+        grupo = np.repeat(np.arange(hasta - desde), np.diff(inicio))
+        primera = inicio[:-1]
+
+        def previo(acumulado):
+            # Valor acumulado hasta la visita anterior del mismo ojo (NaN en la primera)
+            salida = np.empty(n)
+            salida[1:] = acumulado[:-1]
+            salida[primera] = np.nan
+            return salida
+
+        gmc_min = previo(pd.Series(c["gmc"]).groupby(grupo).cummin().to_numpy())
+
+        # AVMC como HistorialOjo: basal = primera medida del ojo, mejor = máximo de
+        # las medidas anteriores y, en una visita sin AVMC, sin cambio visual
+        avmc = pd.Series(np.asarray(c["avmc"], dtype=np.float64))
+        avmc_basal = avmc.groupby(grupo).transform("first").to_numpy()
+        avmc_mejor = previo(avmc.groupby(grupo).cummax().groupby(grupo).ffill().to_numpy())
+        avmc = avmc.to_numpy()
+        avmc_mejor = np.where(np.isnan(avmc_mejor), avmc, avmc_mejor)
+        sin_avmc = np.isnan(avmc)
+        referencia = np.nan_to_num(avmc_basal, nan=0.0)
+        avmc, avmc_basal, avmc_mejor = (
+            np.where(sin_avmc, referencia, x).astype(np.int64) for x in (avmc, avmc_basal, avmc_mejor)
+        )
+
+        en_ventana = (c["semana"] >= SEMANAS_ANCLA_SEM16.start) & (c["semana"] < SEMANAS_ANCLA_SEM16.stop)
+        posiciones = np.where(en_ventana, np.arange(n), n)
+        ancla = pd.Series(posiciones).groupby(grupo).cummin().to_numpy()
+        gmc_sem16 = np.where(ancla < n, c["gmc"][np.minimum(ancla, n - 1)], 0.0)
+
+        return c, {
+            "tipo_paciente": np.asarray(TIPOS)[c["tipo_paciente"]],
+            "intervalo_actual": _ETIQUETAS_INTERVALO[np.clip(c["intervalo_semanas"], 0, 127)],
+            "gmc_basal": c["gmc"][primera][grupo],
+            "avmc_basal": avmc_basal,
+            "avmc_mejor": avmc_mejor,
+            "avmc_actual": avmc,
+            "gmc_min_hist": np.nan_to_num(gmc_min, nan=0.0),
+            "gmc_sem16": gmc_sem16,
+        }
+
+    def puntuar(self, algoritmo, desde=0, hasta=None, umbrales=None):
+        """
+        Evalúa con la versión por lotes las visitas de los ojos [desde, hasta)
+        usando el intervalo registrado en cada visita.
+        Devuelve lo mismo que `algoritmo_emd_lote` / `algoritmo_dmre_lote`.
+        """
+        hasta = self.n_ojos if hasta is None else hasta
+        c, d = self._agregados(desde, hasta)
+        if algoritmo == "emd":
+            return algoritmo_emd_lote(
+                d["tipo_paciente"], c["semana"], d["gmc_basal"], c["gmc"], d["avmc_basal"], d["avmc_actual"],
+                umbrales=umbrales,
+            )
+        return algoritmo_dmre_lote(
+            d["tipo_paciente"], d["intervalo_actual"], c["lir"], c["lsr_micras"], d["avmc_basal"],
+            d["avmc_mejor"], d["avmc_actual"], c["hemorragia_nueva"], d["gmc_sem16"], d["gmc_min_hist"], c["gmc"],
+            umbrales=umbrales,
+        )
+
+
+def _puntuar_rango(directorio, algoritmo, desde, hasta):
+    # Cada proceso abre el almacén por su cuenta: sólo se comparte el directorio
+    return AlmacenVisitas(directorio).puntuar(algoritmo, desde, hasta)
+
+
+def puntuar_almacen_en_paralelo(directorio, algoritmo, trabajadores=None, ojos_por_fragmento=20_000):
+    """
+    Puntúa todo el almacén en un pool de procesos. Los fragmentos se cortan en
+    límites de ojo (con el índice `inicio`) para que los agregados por ojo sean
+    exactos, y se unen en el orden del almacén.
+    """
+    n_ojos = AlmacenVisitas(directorio).n_ojos
+    rangos = [(i, min(i + ojos_por_fragmento, n_ojos)) for i in range(0, n_ojos, ojos_por_fragmento)]
+    if not rangos:
+        return _puntuar_rango(directorio, algoritmo, 0, 0)
+    with ProcessPoolExecutor(max_workers=trabajadores or os.cpu_count() or 1) as pool:
+        partes = list(pool.map(_puntuar_rango, *zip(*[(directorio, algoritmo, a, b) for a, b in rangos])))
+    if algoritmo == "emd":
+        return tuple(np.concatenate(columna) for columna in zip(*partes))
+    return np.concatenate(partes)
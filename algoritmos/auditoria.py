@@ -0,0 +1,219 @@
+"""
+Registro de auditoría de recomendaciones (sólo anexado) en SQLite.
+
+Las páginas llaman a `registrar`, que sólo encola la fila; un hilo en segundo
+plano las inserta por lotes (al juntar `tamano_lote` filas o cada
+`intervalo_s` segundos) con una sentencia preparada, en modo WAL. La cola es
+acotada: si el disco no da abasto, `registrar` espera en lugar de acumular
+memoria sin límite. Al cerrar el proceso se vacía la cola (atexit). Cada fila
+guarda la versión de umbrales con la que se evaluó (ver `algoritmos.umbrales`).
+
+La ruta de la base se configura con ALGORITMOS_AUDITORIA
+(por defecto, auditoria.sqlite3 en el directorio de trabajo).
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from .umbrales import version
+
+RUTA_POR_DEFECTO = os.environ.get("ALGORITMOS_AUDITORIA", "auditoria.sqlite3")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS recomendaciones (
+    id            INTEGER PRIMARY KEY,
+    momento       TEXT NOT NULL,          -- ISO 8601, UTC
+    algoritmo     TEXT NOT NULL,
+    paciente      TEXT,
+    entradas      TEXT NOT NULL,          -- JSON
+    plan          TEXT NOT NULL,
+    justificacion TEXT NOT NULL,
+    motivos       TEXT NOT NULL,          -- JSON (lista)
+    version_umbrales TEXT                 -- versión de umbrales aplicada (ver umbrales.py)
+);
+CREATE INDEX IF NOT EXISTS idx_recomendaciones_paciente ON recomendaciones (paciente, momento);
+CREATE INDEX IF NOT EXISTS idx_recomendaciones_momento ON recomendaciones (momento);
+CREATE TRIGGER IF NOT EXISTS recomendaciones_sin_update BEFORE UPDATE ON recomendaciones
+BEGIN SELECT RAISE(ABORT, 'registro de auditoría de sólo anexado'); END;
+CREATE TRIGGER IF NOT EXISTS recomendaciones_sin_delete BEFORE DELETE ON recomendaciones
+BEGIN SELECT RAISE(ABORT, 'registro de auditoría de sólo anexado'); END;
+"""
+
+# Columnas agregadas a `recomendaciones` después de la primera versión del esquema
+# (las filas anteriores quedan con NULL)
+_COLUMNAS_NUEVAS = {"version_umbrales": "TEXT"}
+
+_INSERTAR = (
+    "INSERT INTO recomendaciones "
+    "(momento, algoritmo, paciente, entradas, plan, justificacion, motivos, version_umbrales) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_FIN = object()
+
+
+def _conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=30)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+
+class RegistroAuditoria:
+    """Escritor diferido: `registrar` encola, un hilo propio escribe por lotes."""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, tamano_lote=200, intervalo_s=1.0, max_cola=10_000):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.intervalo_s = intervalo_s
+        self._cola = queue.Queue(maxsize=max_cola)
+        self.escritas = 0
+        self.lotes = 0
+        self.error = None
+
+        with _conectar(ruta) as conexion:
+            conexion.executescript(_ESQUEMA)
+            existentes = {fila[1] for fila in conexion.execute("PRAGMA table_info(recomendaciones)")}
+            for columna, tipo in _COLUMNAS_NUEVAS.items():
+                if columna not in existentes:
+                    conexion.execute(f"ALTER TABLE recomendaciones ADD COLUMN {columna} {tipo}")
+        conexion.close()
+
+        self._hilo = threading.Thread(target=self._escribir, name="auditoria", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def registrar(self, algoritmo, entradas, plan, justificacion, motivos=(), paciente=None,
+                  version_umbrales=None):
+        """
+        Encola una recomendación mostrada. El momento se toma ahora, no al escribir.
+        `version_umbrales`: identificador de la versión con la que se evaluó (por
+        defecto, la vigente); sin ella no se puede reproducir la recomendación.
+        """
+        if not self._hilo.is_alive():
+            raise RuntimeError("El registro de auditoría está cerrado") from self.error
+        self._cola.put((
+            datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+            algoritmo,
+            paciente or None,
+            json.dumps(entradas, ensure_ascii=False, default=str),
+            plan,
+            justificacion,
+            json.dumps(list(motivos), ensure_ascii=False),
+            version_umbrales or version().version,
+        ))
+
+    def _escribir(self):
+        conexion = _conectar(self.ruta)
+        try:
+            terminar = False
+            while not terminar:
+                try:
+                    fila = self._cola.get(timeout=self.intervalo_s)
+                except queue.Empty:
+                    continue
+                lote, esperando = [], []
+                limite = time.monotonic() + self.intervalo_s
+                while True:
+                    if fila is _FIN:
+                        terminar = True
+                        break
+                    if isinstance(fila, threading.Event):
+                        # Marca de `vaciar`: escribir ya lo que hay
+                        esperando.append(fila)
+                        break
+                    lote.append(fila)
+                    if len(lote) >= self.tamano_lote:
+                        break
+                    try:
+                        fila = self._cola.get(timeout=max(0.0, limite - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if lote:
+                    with conexion:
+                        conexion.executemany(_INSERTAR, lote)
+                    self.escritas += len(lote)
+                    self.lotes += 1
+                for evento in esperando:
+                    evento.set()
+        except sqlite3.Error as error:
+            self.error = error
+            raise
+        finally:
+            conexion.close()
+
+    def vaciar(self, timeout=None):
+        """Bloquea hasta que todo lo encolado hasta ahora está escrito."""
+        if not self._hilo.is_alive():
+            return
+        marca = threading.Event()
+        self._cola.put(marca)
+        limite = None if timeout is None else time.monotonic() + timeout
+        # Si el escritor muere a mitad, no esperar para siempre
+        while not marca.wait(0.1) and self._hilo.is_alive():
+            if limite is not None and time.monotonic() > limite:
+                break
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        if self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join()
+
+    def consultar(self, paciente=None, desde=None, hasta=None, limite=1000):
+        """
+        Recomendaciones registradas, de la más reciente a la más antigua.
+        `desde` / `hasta`: texto ISO o datetime (hasta excluido). Usa los índices
+        por (paciente, momento) y por momento.
+        """
+        condiciones, parametros = [], []
+        if paciente is not None:
+            condiciones.append("paciente = ?")
+            parametros.append(paciente)
+        if desde is not None:
+            condiciones.append("momento >= ?")
+            parametros.append(desde if isinstance(desde, str) else desde.isoformat())
+        if hasta is not None:
+            condiciones.append("momento < ?")
+            parametros.append(hasta if isinstance(hasta, str) else hasta.isoformat())
+        sql = (
+            "SELECT momento, algoritmo, paciente, entradas, plan, justificacion, motivos, version_umbrales "
+            "FROM recomendaciones"
+        )
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY momento DESC LIMIT ?"
+
+        conexion = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True, timeout=30)
+        try:
+            filas = conexion.execute(sql, (*parametros, limite)).fetchall()
+        finally:
+            conexion.close()
+        return [
+            {
+                "momento": m, "algoritmo": a, "paciente": p, "entradas": json.loads(e),
+                "plan": pl, "justificacion": j, "motivos": json.loads(mo), "version_umbrales": v,
+            }
+            for m, a, p, e, pl, j, mo, v in filas
+        ]
+
+    def estadisticas(self):
+        return {"en_cola": self._cola.qsize(), "escritas": self.escritas, "lotes": self.lotes}
+
+
+_REGISTRO = None
+_LOCK = threading.Lock()
+
+
+def registro_auditoria():
+    """Registro compartido por todo el proceso (se crea al primer uso)."""
+    global _REGISTRO
+    with _LOCK:
+        if _REGISTRO is None:
+            _REGISTRO = RegistroAuditoria()
+        return _REGISTRO
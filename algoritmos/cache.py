@@ -0,0 +1,144 @@
+"""
+Caché LRU de resultados compartida por todo el proceso.
+
+Streamlit vuelve a ejecutar el script en cada interacción, pero los módulos
+importados se conservan entre ejecuciones y entre sesiones, así que una caché a
+nivel de módulo es compartida por todos los usuarios conectados al servidor.
+
+El tamaño máximo se configura con la variable de entorno
+ALGORITMOS_CACHE_TAMANO (por defecto 4096 entradas por algoritmo).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from .resultados import evaluar_dmre, evaluar_emd
+from .umbrales import vigentes
+
+TAMANO_POR_DEFECTO = int(os.environ.get("ALGORITMOS_CACHE_TAMANO", 4096))
+
+
+class CacheLRU:
+    """
+    Caché acotada con desalojo LRU y contadores de aciertos/fallos/desalojos.
+    Segura entre hilos (Streamlit atiende cada sesión en un hilo propio).
+    """
+
+    def __init__(self, tamano_max=TAMANO_POR_DEFECTO):
+        self.tamano_max = tamano_max
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._invalidaciones = 0
+
+    def obtener_o_calcular(self, clave, calcular):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            invalidaciones = self._invalidaciones
+
+        # Se calcula fuera del lock: dos sesiones con la misma clave pueden
+        # calcularla a la vez, pero el resultado es el mismo.
+        valor = calcular()
+
+        with self._lock:
+            if invalidaciones != self._invalidaciones:
+                # Hubo una invalidación mientras se calculaba: el valor puede
+                # ser anterior a ella, se devuelve pero no se guarda
+                return valor
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_max:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+        return valor
+
+    def invalidar(self, clave):
+        """Descarta una entrada (p. ej. porque su origen cambió)."""
+        with self._lock:
+            self._datos.pop(clave, None)
+            self._invalidaciones += 1
+
+    def redimensionar(self, tamano_max):
+        with self._lock:
+            self.tamano_max = tamano_max
+            while len(self._datos) > tamano_max:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.aciertos = self.fallos = self.desalojos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "tamano_max": self.tamano_max,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "tasa_acierto": self.aciertos / consultas if consultas else 0.0,
+            }
+
+
+CACHE_EMD = CacheLRU()
+CACHE_DMRE = CacheLRU()
+
+
+def algoritmo_emd_cacheado(
+    tipo_paciente,
+    semana,
+    intervalo_actual,
+    gmc_basal,
+    gmc_actual,
+    avmc_basal,
+    avmc_actual,
+    umbrales=None,
+):
+    """`algoritmo_emd` pasando por CACHE_EMD. Mismo resultado."""
+    u = umbrales or vigentes("emd")
+    # Clave normalizada: 350, 350.0 y np.float64(350) son la misma consulta. Los
+    # umbrales forman parte de la clave: otra versión es otra consulta.
+    entradas = (
+        tipo_paciente, int(semana), intervalo_actual, float(gmc_basal), float(gmc_actual),
+        int(avmc_basal), int(avmc_actual),
+    )
+    # En la caché se guarda el resultado compacto (códigos), no los textos
+    return CACHE_EMD.obtener_o_calcular(
+        entradas + (u,), lambda: evaluar_emd(*entradas, umbrales=u),
+    ).como_tupla()
+
+
+def algoritmo_dmre_cacheado(
+    tipo_paciente,
+    intervalo_actual,
+    lir,
+    lsr_micras,
+    avmc_basal,
+    avmc_mejor,
+    avmc_actual,
+    hemorragia_nueva,
+    gmc_sem16,
+    gmc_min_hist,
+    gmc_actual,
+    umbrales=None,
+):
+    """`algoritmo_dmre` pasando por CACHE_DMRE. Mismo resultado."""
+    u = umbrales or vigentes("dmre")
+    entradas = (
+        tipo_paciente, intervalo_actual, bool(lir), float(lsr_micras), int(avmc_basal),
+        int(avmc_mejor), int(avmc_actual), bool(hemorragia_nueva), float(gmc_sem16),
+        float(gmc_min_hist), float(gmc_actual),
+    )
+    # como_tupla() arma un detalle nuevo en cada llamada: nadie comparte el dict
+    return CACHE_DMRE.obtener_o_calcular(
+        entradas + (u,), lambda: evaluar_dmre(*entradas, umbrales=u),
+    ).como_tupla()
@@ -0,0 +1,135 @@
+"""
+Puntuación de tablas de visitas (DataFrames de pandas) con EMD o DMRE.
+
+`puntuar_emd` / `puntuar_dmre` procesan un bloque en el proceso actual;
+`puntuar_en_paralelo` reparte la tabla en fragmentos sobre un pool de procesos
+y devuelve los resultados en el orden original de las filas. Sin `umbrales`,
+se evalúa con los de la versión vigente (ver `algoritmos.umbrales`).
+`leer_bloques` lee los archivos de entrada de las herramientas de línea de
+comandos por bloques.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .emd import justificaciones_emd
+from .lote import algoritmo_dmre_lote, algoritmo_emd_lote
+from .resultados import TEXTOS
+from .umbrales import vigentes
+
+COLUMNAS_EMD = [
+    "tipo_paciente", "semana", "gmc_basal", "gmc_actual", "avmc_basal", "avmc_actual",
+]
+
+COLUMNAS_DMRE = [
+    "tipo_paciente", "intervalo_actual", "lir", "lsr_micras", "avmc_basal", "avmc_mejor",
+    "avmc_actual", "hemorragia_nueva", "gmc_sem16", "gmc_min_hist", "gmc_actual",
+]
+
+_VERDADERO = {"sí", "si", "true", "1", "yes", "s"}
+
+
+def _a_bool(serie):
+    """Acepta True/False, 1/0 o "Sí"/"No" (como en los formularios)."""
+    if serie.dtype == bool:
+        return serie.to_numpy()
+    return serie.astype(str).str.strip().str.lower().isin(_VERDADERO).to_numpy()
+
+
+def argumentos_emd(bloque):
+    """Columnas de un DataFrame como argumentos de `algoritmo_emd_lote`."""
+    return [bloque[c].to_numpy() for c in COLUMNAS_EMD]
+
+
+def argumentos_dmre(bloque):
+    """Columnas de un DataFrame como argumentos de `algoritmo_dmre_lote`."""
+    return [
+        _a_bool(bloque[c]) if c in ("lir", "hemorragia_nueva") else bloque[c].to_numpy()
+        for c in COLUMNAS_DMRE
+    ]
+
+
+def puntuar_emd(bloque, umbrales=None):
+    """Aplica el algoritmo EMD a un DataFrame y devuelve el bloque con los resultados."""
+    plan, just, cambio_gmc, cambio_av = algoritmo_emd_lote(*argumentos_emd(bloque), umbrales=umbrales)
+    salida = bloque.copy()
+    salida["plan"] = np.asarray(TEXTOS["plan_emd"], dtype=object)[plan]
+    textos = justificaciones_emd(umbrales or vigentes("emd"))
+    salida["justificacion"] = np.asarray(textos, dtype=object)[just]
+    salida["cambio_gmc"] = cambio_gmc
+    salida["cambio_av"] = cambio_av
+    return salida
+
+
+def puntuar_dmre(bloque, umbrales=None):
+    """Aplica el algoritmo DMRE a un DataFrame y devuelve el bloque con los resultados."""
+    r = algoritmo_dmre_lote(*argumentos_dmre(bloque), umbrales=umbrales)
+
+    salida = bloque.copy()
+    salida["plan"] = np.asarray(TEXTOS["plan_dmre"], dtype=object)[r["plan"]]
+    salida["justificacion"] = np.asarray(TEXTOS["justificacion_dmre"], dtype=object)[r["justificacion"]]
+    for campo in r.dtype.names:
+        if campo not in ("plan", "justificacion", "intervalo_actual"):
+            salida[campo] = r[campo]
+    return salida
+
+
+PUNTUADORES = {"emd": puntuar_emd, "dmre": puntuar_dmre}
+
+
+def leer_bloques(ruta, filas_por_bloque):
+    """DataFrames consecutivos de un CSV o Parquet, de `filas_por_bloque` filas."""
+    if ruta.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=filas_por_bloque):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=filas_por_bloque)
+
+
+def _puntuar_fragmento(algoritmo, fragmento, umbrales):
+    # Función de módulo para que el pool de procesos pueda serializarla
+    return PUNTUADORES[algoritmo](fragmento, umbrales)
+
+
+def puntuar_bloques_en_paralelo(algoritmo, bloques, trabajadores=None, en_vuelo=None, umbrales=None):
+    """
+    Puntúa un iterable de DataFrames en un pool de procesos y los entrega en el
+    mismo orden en que llegaron. Como mucho `en_vuelo` bloques (por defecto
+    2 × trabajadores) están pendientes a la vez, así que la memoria queda acotada
+    aunque `bloques` sea un lector por bloques de un archivo enorme.
+    """
+    trabajadores = trabajadores or os.cpu_count() or 1
+    en_vuelo = en_vuelo or 2 * trabajadores
+    pendientes = deque()
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        for bloque in bloques:
+            pendientes.append(pool.submit(_puntuar_fragmento, algoritmo, bloque, umbrales))
+            if len(pendientes) >= en_vuelo:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def puntuar_en_paralelo(algoritmo, visitas, trabajadores=None, filas_por_fragmento=50_000, umbrales=None):
+    """
+    Reparte `visitas` (DataFrame) en fragmentos de `filas_por_fragmento` filas,
+    los puntúa con `algoritmo` ("emd" o "dmre") en `trabajadores` procesos
+    (por defecto, todos los núcleos) y los une en el orden original.
+    El resultado es idéntico al de `puntuar_emd` / `puntuar_dmre` en un solo proceso.
+    """
+    if algoritmo not in PUNTUADORES:
+        raise ValueError(f"Algoritmo desconocido: {algoritmo!r} (usar 'emd' o 'dmre')")
+    fragmentos = (
+        visitas.iloc[i:i + filas_por_fragmento]
+        for i in range(0, len(visitas), filas_por_fragmento)
+    )
+    resultados = list(puntuar_bloques_en_paralelo(algoritmo, fragmentos, trabajadores, umbrales=umbrales))
+    if not resultados:
+        return PUNTUADORES[algoritmo](visitas, umbrales)
+    return pd.concat(resultados)
@@ -0,0 +1,223 @@
+"""
+Algoritmo DMRE (Degeneración Macular Relacionada con la Edad) con Anti-VEGF.
+"""
+import sys
+from functools import lru_cache
+
+from .metricas import instrumentar
+from .umbrales import UmbralesDMRE, vigentes
+
+
+def _clasificar_dmre(args, kwargs, resultado, registro):
+    # Métricas (opcionales): rama por plan y criterios de actividad por motivo
+    plan, _, detalle = resultado
+    registro.contar("dmre", "rama", RAMAS_DMRE[PLANES_DMRE.index(plan)])
+    for motivo in detalle["motivos"]:
+        criterio = criterio_motivo(motivo)
+        if criterio is not None:
+            registro.contar("dmre", "criterio", CRITERIOS_DMRE[criterio])
+        else:
+            if "semana 16" in motivo:
+                registro.contar("dmre", "criterio", "gmc_sem16")
+            if "mínimo histórico" in motivo:
+                registro.contar("dmre", "criterio", "gmc_min")
+    if detalle["delta_gmc_vs_sem16"] is None:
+        registro.contar("dmre", "calidad", "gmc_sem16_no_valido")
+    if detalle["delta_gmc_vs_min"] is None:
+        registro.contar("dmre", "calidad", "gmc_min_hist_no_valido")
+
+
+# =========================
+# Lógica del algoritmo DMRE (simplificado para intervalos)
+# =========================
+@instrumentar("dmre", _clasificar_dmre)
+def algoritmo_dmre(
+    tipo_paciente: str,
+    intervalo_actual: str,
+    lir: bool,
+    lsr_micras: float,
+    avmc_basal: int,
+    avmc_mejor: int,
+    avmc_actual: int,
+    hemorragia_nueva: bool,
+    gmc_sem16: float,
+    gmc_min_hist: float,
+    gmc_actual: float,
+    umbrales: UmbralesDMRE = None,
+):
+    """
+    DMRE Anti-VEGF (Aflibercept 8 / Faricimab 6) - lógica de actividad y ajuste de intervalo.
+    `umbrales`: por defecto, los de la versión vigente (ver `algoritmos.umbrales`).
+    Devuelve:
+      - plan (Extender / Mantener / Acortar / Considerar switch)
+      - justificación
+      - detalle (dict)
+    """
+
+    u = umbrales or vigentes("dmre")
+
+    # Intervalo en semanas
+    map_int = {"Q4W": 4, "Q8W": 8, "Q12W": 12, "Q16W": 16}
+    int_sem = map_int.get(intervalo_actual, 8)
+
+    # Cambios visuales
+    delta_vs_basal = avmc_actual - avmc_basal      # negativo = empeora
+    delta_vs_mejor = avmc_actual - avmc_mejor      # negativo = peor que su mejor
+
+    # Criterios de actividad por OCT/visión/hemorragia (según umbrales del diagrama)
+    actividad_liquido = lir or (lsr_micras >= u.lsr_liquido)
+    actividad_vision = (delta_vs_basal <= u.av_caida_basal) or (delta_vs_mejor <= u.av_caida_mejor)
+    actividad_hemorragia = hemorragia_nueva
+
+    # Criterios GMC del diagrama
+    delta_gmc_vs_sem16 = None if gmc_sem16 <= 0 else (gmc_actual - gmc_sem16)
+    delta_gmc_vs_min = None if gmc_min_hist <= 0 else (gmc_actual - gmc_min_hist)
+
+    actividad_gmc = False
+    motivos_gmc = []
+    if delta_gmc_vs_sem16 is not None and delta_gmc_vs_sem16 >= u.gmc_sem16:
+        actividad_gmc = True
+        motivos_gmc.append(MOTIVO_GMC_SEM16.format(delta=delta_gmc_vs_sem16, u=u))
+    if delta_gmc_vs_min is not None and delta_gmc_vs_min >= u.gmc_min:
+        actividad_gmc = True
+        motivos_gmc.append(MOTIVO_GMC_MIN.format(delta=delta_gmc_vs_min, u=u))
+
+    # Actividad global
+    actividad = actividad_liquido or actividad_vision or actividad_hemorragia or actividad_gmc
+
+    # Reglas de ajuste de intervalo (enfoque práctico)
+    # - Si NO hay actividad: extender +4 semanas hasta Q16W
+    # - Si hay actividad: acortar -4 semanas hasta mínimo Q8W
+    # - Si hay actividad pese a Q8W: sugerir considerar switch / reevaluación
+    if not actividad:
+        if int_sem < 16:
+            nuevo = min(16, int_sem + 4)
+            plan = f"Extender intervalo a Q{nuevo}W"
+            just = (
+                "Sin criterios de actividad (líquido/visión/hemorragia/GMC). "
+                "Se puede extender en +4 semanas (máx Q16W)."
+            )
+        else:
+            plan = "Mantener intervalo (Q16W)"
+            just = "Sin criterios de actividad y ya está en el intervalo máximo (Q16W)."
+    else:
+        if int_sem > 8:
+            nuevo = max(8, int_sem - 4)
+            plan = f"Acortar intervalo a Q{nuevo}W"
+            just = "Hay criterios de actividad. Se recomienda acortar 4 semanas (mínimo Q8W)."
+        else:
+            # Aquí usamos tipo_paciente para hacer el mensaje más fiel a tu protocolo
+            if tipo_paciente == "Naive":
+                plan = "Mantener Q8W y reevaluar (posible switch)"
+                just = (
+                    "Paciente naïve con actividad a pesar de Q8W. "
+                    "Reevaluar respuesta temprana y considerar switch según protocolo."
+                )
+            else:
+                plan = "Mantener Q8W y considerar switch"
+                just = (
+                    "Paciente con tratamiento previo y actividad a pesar de Q8W. "
+                    "Considerar switch por respuesta subóptima."
+                )
+
+    # Construir justificación detallada
+    fijos = motivos_fijos(u)
+    motivos = []
+    if actividad_liquido:
+        motivos.append(fijos[0])
+    if actividad_vision:
+        motivos.append(fijos[1])
+    if actividad_hemorragia:
+        motivos.append(fijos[2])
+    if actividad_gmc:
+        motivos.append("Actividad por GMC: " + "; ".join(motivos_gmc))
+
+    detalle = {
+        "tipo_paciente": tipo_paciente,
+        "actividad": actividad,
+        "delta_vs_basal_letras": delta_vs_basal,
+        "delta_vs_mejor_letras": delta_vs_mejor,
+        "delta_gmc_vs_sem16": delta_gmc_vs_sem16,
+        "delta_gmc_vs_min": delta_gmc_vs_min,
+        "motivos": motivos,
+    }
+    return plan, just, detalle
+
+
+
+PLANES_DMRE = (
+    "Extender intervalo a Q8W",                      # 0
+    "Extender intervalo a Q12W",                     # 1
+    "Extender intervalo a Q16W",                     # 2
+    "Mantener intervalo (Q16W)",                     # 3
+    "Acortar intervalo a Q8W",                       # 4
+    "Acortar intervalo a Q12W",                      # 5
+    "Mantener Q8W y reevaluar (posible switch)",     # 6
+    "Mantener Q8W y considerar switch",              # 7
+)
+
+# Intervalo resultante (semanas) de cada plan, por código; None = se mantiene el actual
+INTERVALOS_PLAN_DMRE = (8, 12, 16, 16, 8, 12, None, None)
+
+# Ancla del "GMC semana 16": la primera visita entre la semana 16 y la siguiente
+# visita Q4W (semanas 16-19). Sin visita en esa ventana no hay ancla (N/A): una
+# visita de la semana 40 no es un GMC de semana 16. Regla única para el
+# historial, el almacén columnar y las fichas de pacientes.
+SEMANAS_ANCLA_SEM16 = range(16, 20)
+
+JUSTIFICACIONES_DMRE = (
+    # 0
+    "Sin criterios de actividad (líquido/visión/hemorragia/GMC). "
+    "Se puede extender en +4 semanas (máx Q16W).",
+    # 1
+    "Sin criterios de actividad y ya está en el intervalo máximo (Q16W).",
+    # 2
+    "Hay criterios de actividad. Se recomienda acortar 4 semanas (mínimo Q8W).",
+    # 3
+    "Paciente naïve con actividad a pesar de Q8W. "
+    "Reevaluar respuesta temprana y considerar switch según protocolo.",
+    # 4
+    "Paciente con tratamiento previo y actividad a pesar de Q8W. "
+    "Considerar switch por respuesta subóptima.",
+)
+
+# Motivos de actividad fijos (el de GMC se arma con los deltas). Son plantillas:
+# citan los umbrales con los que se evaluó (`u`, un UmbralesDMRE).
+MOTIVOS_DMRE = (
+    # 0
+    "Actividad por OCT: LIR presente o LSR ≥ {u.lsr_liquido:g} µm.",
+    # 1
+    "Actividad funcional: caída de AVMC (≤ {u.av_caida_basal:g} vs basal o ≤ {u.av_caida_mejor:g} vs mejor).",
+    # 2
+    "Actividad clínica: hemorragia macular nueva.",
+)
+MOTIVO_GMC_SEM16 = "ΔGMC vs semana 16 = +{delta:.0f} µm (≥ {u.gmc_sem16:g})"
+MOTIVO_GMC_MIN = "ΔGMC vs mínimo histórico = +{delta:.0f} µm (≥ {u.gmc_min:g})"
+
+
+@lru_cache(maxsize=None)
+def motivos_fijos(u):
+    """Motivos fijos con los umbrales de `u` (se arman una vez por juego de umbrales)."""
+    return tuple(sys.intern(m.format(u=u)) for m in MOTIVOS_DMRE)
+
+
+# El texto completo depende de los umbrales; el prefijo ("Actividad por OCT", ...) no
+_PREFIJOS_MOTIVOS = {m.split(":", 1)[0]: i for i, m in enumerate(MOTIVOS_DMRE)}
+
+
+def criterio_motivo(motivo):
+    """Índice del motivo fijo (0 líquido, 1 visión, 2 hemorragia), o None si es el de GMC."""
+    return _PREFIJOS_MOTIVOS.get(motivo.split(":", 1)[0])
+
+# Nombres para las métricas: rama por código de plan, criterio por motivo fijo
+RAMAS_DMRE = (
+    "extender_q8",
+    "extender_q12",
+    "extender_q16",
+    "mantener_q16",
+    "acortar_q8",
+    "acortar_q12",
+    "q8_naive_posible_switch",
+    "q8_previo_considerar_switch",
+)
+CRITERIOS_DMRE = ("liquido", "vision", "hemorragia")
@@ -0,0 +1,235 @@
+"""
+Algoritmo EMD (Edema Macular Diabético) con Anti-VEGF.
+"""
+import sys
+from functools import lru_cache
+
+from .metricas import instrumentar
+from .umbrales import UmbralesEMD, vigentes
+
+
+def _clasificar_emd(args, kwargs, resultado, registro):
+    # Métricas (opcionales): la justificación identifica la rama tomada
+    _, justificacion, cambio_gmc, _ = resultado
+    umbrales = kwargs.get("umbrales", args[7] if len(args) > 7 else None)
+    registro.contar("emd", "rama", RAMAS_EMD[codigo_justificacion(justificacion, umbrales)])
+    if cambio_gmc is None:
+        registro.contar("emd", "calidad", "gmc_basal_no_valido")
+
+
+# =========================
+# Lógica del algoritmo EMD
+# =========================
+@instrumentar("emd", _clasificar_emd)
+def algoritmo_emd(
+    tipo_paciente: str,
+    semana: int,
+    intervalo_actual: str,
+    gmc_basal: float,
+    gmc_actual: float,
+    avmc_basal: int,
+    avmc_actual: int,
+    umbrales: UmbralesEMD = None,
+):
+    """
+    Se implementa el algoritmo para manejo de EMD con Anti-VEGF.
+    `umbrales`: por defecto, los de la versión vigente (ver `algoritmos.umbrales`).
+    Devuelve: (plan, justificación, cambio_gmc, cambio_av)
+    """
+    u = umbrales or vigentes("emd")
+    textos = justificaciones_emd(u)
+
+    # Evitar división por cero
+    if gmc_basal <= 0:
+        cambio_gmc = None
+    else:
+        cambio_gmc = (gmc_actual - gmc_basal) / gmc_basal * 100
+
+    cambio_av = avmc_actual - avmc_basal
+
+    # -------------------------------
+    # 1. PACIENTE NAÍVE
+    # -------------------------------
+    if tipo_paciente == "Naive":
+
+        # Fase de carga antes de semana 12
+        if semana < 12:
+            plan = "Continuar fase de carga"
+            justificacion = textos[0]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # A partir de semana 12 aplicamos la lógica de GMC
+        # (en los comentarios, los valores del protocolo original)
+        # GMC ≤ 325 → SWITCH inmediato
+        if gmc_actual <= u.gmc_switch:
+            plan = "Switch de anti-VEGF + 3 dosis de carga"
+            justificacion = textos[1]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # GMC ≥ 400 → Ozurdex
+        if gmc_actual >= u.gmc_ozurdex:
+            plan = "Cambiar a Ozurdex"
+            justificacion = textos[2]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # 325 < GMC < 400 → EARLY SWITCH
+        if u.gmc_switch < gmc_actual < u.gmc_ozurdex:
+
+            if cambio_gmc is None:
+                plan = "Revisar datos"
+                justificacion = textos[3]
+                return plan, justificacion, cambio_gmc, cambio_av
+
+            # Disminución > 10%
+            if cambio_gmc < -u.cambio_estable:
+                plan = "Mantener intervalo actual"
+                justificacion = textos[4]
+                return plan, justificacion, cambio_gmc, cambio_av
+
+            # GMC estable (±10%)
+            if -u.cambio_estable <= cambio_gmc <= u.cambio_estable:
+                plan = "Mantener intervalo actual"
+                justificacion = textos[5]
+                return plan, justificacion, cambio_gmc, cambio_av
+
+            # Aumento < 10%
+            if 0 < cambio_gmc < u.cambio_estable:
+                plan = "Acortar intervalo 4 semanas (mínimo Q4W)"
+                justificacion = textos[6]
+                return plan, justificacion, cambio_gmc, cambio_av
+
+            # Aumento ≥ 20%
+            if cambio_gmc >= u.cambio_aumento:
+                plan = "Acortar intervalo 8 semanas (mínimo Q4W)"
+                justificacion = textos[7]
+                return plan, justificacion, cambio_gmc, cambio_av
+
+            # Caso intermedio raro
+            plan = "Mantener y reevaluar"
+            justificacion = textos[8]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+    # -------------------------------
+    # 2. PACIENTE CON TRATAMIENTO PREVIO
+    # -------------------------------
+    if tipo_paciente == "Previo":
+
+        if cambio_gmc is None:
+            plan = "Revisar datos"
+            justificacion = textos[3]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # Disminución > 10%
+        if cambio_gmc < -u.cambio_estable:
+            plan = "Pasar o mantener en Q8W (si estaba en Q4W)"
+            justificacion = textos[9]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # GMC estable (±10%)
+        if -u.cambio_estable <= cambio_gmc <= u.cambio_estable:
+            plan = "Mantener intervalo Q4W"
+            justificacion = textos[10]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # Aumento < 20%
+        if 0 < cambio_gmc < u.cambio_aumento:
+            plan = "Mantener intervalo Q4W"
+            justificacion = textos[11]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+        # Aumento ≥ 20%
+        if cambio_gmc >= u.cambio_aumento:
+            plan = "Switch de anti-VEGF + 3 dosis de carga"
+            justificacion = textos[12]
+            return plan, justificacion, cambio_gmc, cambio_av
+
+    # Si nada aplica
+    plan = "Sin decisión automática"
+    justificacion = textos[13]
+    return plan, justificacion, cambio_gmc, cambio_av
+
+
+# Textos de plan y justificación. Las versiones por lotes (ver `lote.py`) devuelven
+# índices (códigos) sobre estas tuplas en lugar de repetir los textos en cada fila.
+# Las justificaciones son plantillas: citan los umbrales con los que se evaluó
+# (`u`, un UmbralesEMD); `justificaciones_emd(u)` da los textos ya armados.
+PLANES_EMD = (
+    "Continuar fase de carga",                       # 0
+    "Switch de anti-VEGF + 3 dosis de carga",        # 1
+    "Cambiar a Ozurdex",                             # 2
+    "Revisar datos",                                 # 3
+    "Mantener intervalo actual",                     # 4
+    "Acortar intervalo 4 semanas (mínimo Q4W)",      # 5
+    "Acortar intervalo 8 semanas (mínimo Q4W)",      # 6
+    "Mantener y reevaluar",                          # 7
+    "Pasar o mantener en Q8W (si estaba en Q4W)",    # 8
+    "Mantener intervalo Q4W",                        # 9
+    "Sin decisión automática",                       # 10
+)
+
+JUSTIFICACIONES_EMD = (
+    # 0
+    "Paciente naïve antes de la semana 12. "
+    "Completar 3 dosis de carga mensuales y reevaluar en la semana 12.",
+    # 1
+    "Mala respuesta al fármaco inicial: GMC ≤ {u.gmc_switch:g} µm en la reevaluación.",
+    # 2
+    "Edema macular severo (GMC ≥ {u.gmc_ozurdex:g} µm). Se recomienda corticoide intravítreo.",
+    # 3
+    "No se pudo calcular el porcentaje de cambio de GMC (GMC basal inválido).",
+    # 4
+    "Buena respuesta: reducción >{u.cambio_estable:g}% del GMC en zona {u.gmc_switch:g}-{u.gmc_ozurdex:g} µm.",
+    # 5
+    "GMC estable (±{u.cambio_estable:g}%). No hay empeoramiento significativo.",
+    # 6
+    "Aumento leve del GMC (<{u.cambio_estable:g}%). Se recomienda intensificar el esquema.",
+    # 7
+    "Aumento significativo del GMC (≥{u.cambio_aumento:g}%) en zona de Early Switch.",
+    # 8
+    "Evolución dentro de un rango no típico. Correlacionar clínicamente.",
+    # 9
+    "Buena respuesta: reducción >{u.cambio_estable:g}% del GMC. Puede espaciarse a Q8W si estaba en Q4W.",
+    # 10
+    "GMC estable (±{u.cambio_estable:g}%). No hay mejoría clara, pero tampoco empeora.",
+    # 11
+    "Leve aumento del GMC (<{u.cambio_aumento:g}%). Se mantiene frecuencia mensual.",
+    # 12
+    "Mala respuesta: aumento ≥{u.cambio_aumento:g}% del GMC con tratamiento previo.",
+    # 13
+    "Revisar datos ingresados y correlacionar con el contexto clínico.",
+)
+
+
+@lru_cache(maxsize=None)
+def justificaciones_emd(u):
+    """Justificaciones con los umbrales de `u` (se arman una vez por juego de umbrales)."""
+    return tuple(sys.intern(j.format(u=u)) for j in JUSTIFICACIONES_EMD)
+
+
+@lru_cache(maxsize=None)
+def _codigos_justificacion(u):
+    return {texto: i for i, texto in enumerate(justificaciones_emd(u))}
+
+
+def codigo_justificacion(justificacion, umbrales=None):
+    """Código de una justificación de `algoritmo_emd` evaluada con `umbrales` (por defecto, los vigentes)."""
+    return _codigos_justificacion(umbrales or vigentes("emd"))[justificacion]
+
+
+# Nombre de cada rama, por código de justificación (para las métricas)
+RAMAS_EMD = (
+    "naive_carga",
+    "naive_switch",
+    "naive_ozurdex",
+    "revisar_datos",
+    "naive_early_reduccion",
+    "naive_early_estable",
+    "naive_early_aumento_leve",
+    "naive_early_aumento_20",
+    "naive_early_rango_atipico",
+    "previo_reduccion",
+    "previo_estable",
+    "previo_aumento_leve",
+    "previo_switch",
+    "sin_decision",
+)
@@ -0,0 +1,167 @@
+"""
+Historial longitudinal por ojo.
+
+Mantiene los agregados que los formularios piden a mano (GMC basal, AVMC basal,
+GMC mínimo histórico, mejor AVMC registrada y GMC de la semana 16) y los
+actualiza en O(1) al agregar cada visita, de modo que evaluar la última visita
+nunca recorre el historial completo.
+
+"Histórico" se refiere a las visitas anteriores a la que se evalúa: el GMC
+mínimo y la mejor AVMC no incluyen la visita actual. Una visita sin AVMC
+(avmc=None) no entra en los agregados de visión y se evalúa sin criterios de visión.
+"""
+from typing import NamedTuple, Optional
+
+from .dmre import INTERVALOS_PLAN_DMRE, PLANES_DMRE, SEMANAS_ANCLA_SEM16, algoritmo_dmre
+from .emd import algoritmo_emd
+
+# Intervalo resultante de cada plan DMRE, por texto (el evaluador escalar devuelve textos)
+_INTERVALO_PLAN_DMRE = dict(zip(PLANES_DMRE, INTERVALOS_PLAN_DMRE))
+
+
+class Visita(NamedTuple):
+    semana: int
+    gmc: float
+    avmc: Optional[int]              # None = no medida
+    lir: bool = False
+    lsr_micras: float = 0.0
+    hemorragia_nueva: bool = False
+
+
+class HistorialOjo:
+    """
+    Línea de tiempo de un ojo con agregados incrementales.
+    `intervalo_semanas` se actualiza con el plan DMRE de cada visita evaluada.
+    `umbrales` (UmbralesEMD / UmbralesDMRE) por defecto son los vigentes.
+    """
+
+    def __init__(self, tipo_paciente: str, intervalo_inicial: str = "Q8W", guardar_visitas=True, umbrales=None):
+        self.tipo_paciente = tipo_paciente
+        self.umbrales = umbrales
+        self.intervalo_semanas = int(intervalo_inicial[1:-1])
+        self.visitas = [] if guardar_visitas else None
+        self.ultima = None
+
+        # Agregados
+        self.gmc_basal = None
+        self.avmc_basal = None
+        self.gmc_sem16 = None
+        self.gmc_min_hist = None       # sobre visitas anteriores a la última
+        self.avmc_mejor = None         # sobre visitas anteriores a la última
+
+    def agregar_visita(self, visita: Visita):
+        """Agrega una visita (en orden cronológico) y actualiza los agregados en O(1)."""
+        previa = self.ultima
+        if previa is None:
+            self.gmc_basal = visita.gmc
+        else:
+            if self.gmc_min_hist is None or previa.gmc < self.gmc_min_hist:
+                self.gmc_min_hist = previa.gmc
+            if previa.avmc is not None and (self.avmc_mejor is None or previa.avmc > self.avmc_mejor):
+                self.avmc_mejor = previa.avmc
+        # AVMC basal: la primera visita con AVMC medida
+        if self.avmc_basal is None:
+            self.avmc_basal = visita.avmc
+
+        # Ancla de semana 16: primera visita de la ventana SEMANAS_ANCLA_SEM16
+        if self.gmc_sem16 is None and visita.semana in SEMANAS_ANCLA_SEM16:
+            self.gmc_sem16 = visita.gmc
+
+        self.ultima = visita
+        if self.visitas is not None:
+            self.visitas.append(visita)
+
+    def evaluar_dmre(self):
+        """
+        Evalúa la última visita con `algoritmo_dmre` usando los agregados.
+        Sin visitas previas, el mínimo histórico y la semana 16 quedan en 0 (N/A)
+        y la mejor AVMC es la actual. Sin AVMC en la visita, las tres AVMC son
+        iguales (deltas 0) y los criterios de visión no se activan. El intervalo
+        del plan pasa a ser el intervalo actual del ojo, así que se evalúa una
+        sola vez por visita.
+        Devuelve: (plan, justificación, detalle)
+        """
+        v = self.ultima
+        avmc_basal, avmc_mejor, avmc = self._avmc()
+        resultado = algoritmo_dmre(
+            self.tipo_paciente,
+            f"Q{self.intervalo_semanas}W",
+            v.lir,
+            v.lsr_micras,
+            avmc_basal,
+            avmc_mejor,
+            avmc,
+            v.hemorragia_nueva,
+            self.gmc_sem16 or 0.0,
+            self.gmc_min_hist or 0.0,
+            v.gmc,
+            umbrales=self.umbrales,
+        )
+        nuevo = _INTERVALO_PLAN_DMRE[resultado[0]]
+        if nuevo is not None:
+            self.intervalo_semanas = nuevo
+        return resultado
+
+    def evaluar_emd(self):
+        """
+        Evalúa la última visita con `algoritmo_emd` (basales = primera visita;
+        sin AVMC en la visita, cambio_av = 0).
+        Devuelve: (plan, justificación, cambio_gmc, cambio_av)
+        """
+        v = self.ultima
+        avmc_basal, _, avmc = self._avmc()
+        return algoritmo_emd(
+            self.tipo_paciente,
+            v.semana,
+            f"Q{self.intervalo_semanas}W",
+            self.gmc_basal,
+            v.gmc,
+            avmc_basal,
+            avmc,
+            umbrales=self.umbrales,
+        )
+
+    def _avmc(self):
+        # (basal, mejor, actual) para el evaluador; sin AVMC actual, sin cambio visual
+        actual = self.ultima.avmc
+        if actual is None:
+            referencia = self.avmc_basal or 0
+            return referencia, referencia, referencia
+        basal = actual if self.avmc_basal is None else self.avmc_basal
+        return basal, actual if self.avmc_mejor is None else self.avmc_mejor, actual
+
+    def evaluar(self, algoritmo="dmre"):
+        return self.evaluar_dmre() if algoritmo == "dmre" else self.evaluar_emd()
+
+    @classmethod
+    def reproducir(cls, tipo_paciente, visitas, algoritmo="dmre", intervalo_inicial="Q8W", umbrales=None):
+        """
+        Pasa una línea de tiempo completa por el evaluador.
+        Devuelve: (historial, lista con el resultado en cada visita)
+        """
+        historial = cls(tipo_paciente, intervalo_inicial, umbrales=umbrales)
+        resultados = []
+        for visita in visitas:
+            historial.agregar_visita(visita)
+            resultados.append(historial.evaluar(algoritmo))
+        return historial, resultados
+
+
+def reproducir_cohorte(filas, algoritmo="dmre", intervalo_inicial="Q8W", umbrales=None):
+    """
+    Recorre visitas de muchos ojos en orden cronológico (por ojo) y entrega el
+    resultado de cada visita sin guardar las líneas de tiempo completas.
+    Cada fila es un dict con "ojo", "tipo_paciente" y los campos de `Visita`.
+    Genera: (ojo, semana, resultado)
+    """
+    historiales = {}
+    for fila in filas:
+        ojo = fila["ojo"]
+        historial = historiales.get(ojo)
+        if historial is None:
+            historial = historiales[ojo] = HistorialOjo(
+                fila["tipo_paciente"], intervalo_inicial, guardar_visitas=False, umbrales=umbrales
+            )
+        visita = Visita(**{campo: fila[campo] for campo in Visita._fields if campo in fila})
+        historial.agregar_visita(visita)
+        yield ojo, visita.semana, historial.evaluar(algoritmo)
@@ -0,0 +1,382 @@
+"""
+Informes imprimibles por paciente (HTML y PDF) para exportar un día de consulta.
+
+Los bloques de visitas se puntúan con la versión vectorizada de cada algoritmo
+(mismo resultado que `algoritmo_emd` / `algoritmo_dmre`) y cada fila se vuelca
+en plantillas ya compiladas: cadenas de formato construidas una sola vez al
+importar el módulo, así que generar un informe es un `str.format` con valores
+ya escapados. Los documentos se escriben uno a uno en un directorio o en un
+zip: la memoria no depende del número de pacientes.
+
+Los PDF se generan sin dependencias externas (PDF 1.4 de sólo texto, fuentes
+Helvetica estándar, codificación WinAnsi) y contienen lo mismo que el HTML.
+"""
+import html
+import os
+import re
+import textwrap
+import zipfile
+from datetime import date
+
+from .cohorte import PUNTUADORES, argumentos_dmre
+from .resultados import (
+    BANDERA_GMC_MIN,
+    BANDERA_GMC_SEM16,
+    BANDERA_HEMORRAGIA,
+    BANDERA_LIQUIDO,
+    BANDERA_VISION,
+    motivos_desde_banderas,
+)
+from .umbrales import vigentes
+
+FORMATOS = ("html", "pdf")
+
+# =========================
+# Contenido (mismos textos que las páginas)
+# =========================
+_TITULOS = {
+    "emd": "Algoritmo EMD – Anti-VEGF",
+    "dmre": "Algoritmo DMRE – Anti-VEGF",
+}
+_AVISO = (
+    "Esta herramienta es solo de apoyo a la decisión y no reemplaza el juicio clínico "
+    "ni las guías institucionales."
+)
+_SIN_MOTIVOS = "No se detectaron criterios de actividad."
+
+# Secciones de cada informe: (título, ((etiqueta, campo), ...)); el texto de
+# cada campo sale de `_valores_emd` / `_valores_dmre`
+_SECCIONES = {
+    "emd": (
+        ("Datos de la visita", (
+            ("Tipo de paciente", "tipo_paciente"),
+            ("Semana de tratamiento", "semana"),
+            ("Intervalo actual", "intervalo_actual"),
+            ("GMC basal / actual", "gmc"),
+            ("AVMC basal / actual", "avmc"),
+        )),
+        ("Detalles de la evolución", (
+            ("Cambio porcentual de GMC", "cambio_gmc"),
+            ("Cambio de AVMC", "cambio_av"),
+        )),
+    ),
+    "dmre": (
+        ("Datos de la visita", (
+            ("Tipo de paciente", "tipo_paciente"),
+            ("Intervalo actual", "intervalo_actual"),
+            ("LIR / LSR", "liquido"),
+            ("AVMC basal / mejor / actual", "avmc"),
+            ("Hemorragia macular nueva", "hemorragia_nueva"),
+            ("GMC semana 16 / mínimo / actual", "gmc"),
+        )),
+        ("Detalles de actividad", (
+            ("Actividad global", "actividad"),
+            ("ΔAVMC vs basal", "delta_vs_basal"),
+            ("ΔAVMC vs mejor", "delta_vs_mejor"),
+            ("ΔGMC vs semana 16", "delta_gmc_vs_sem16"),
+            ("ΔGMC vs mínimo histórico", "delta_gmc_vs_min"),
+        )),
+    ),
+}
+
+
+def _si_no(valor):
+    return "Sí" if valor else "No"
+
+
+def _valores_emd(fila, umbrales):
+    cambio_gmc = fila["cambio_gmc"]
+    return {
+        "tipo_paciente": fila["tipo_paciente"],
+        "semana": str(int(fila["semana"])),
+        "intervalo_actual": fila.get("intervalo_actual", "–"),
+        "gmc": f"{fila['gmc_basal']:.0f} µm / {fila['gmc_actual']:.0f} µm",
+        "avmc": f"{int(fila['avmc_basal'])} / {int(fila['avmc_actual'])} letras",
+        "cambio_gmc": (
+            "No calculable (GMC basal no válido)" if cambio_gmc is None or cambio_gmc != cambio_gmc
+            else f"{cambio_gmc:.1f}% (de {fila['gmc_basal']:.0f} µm a {fila['gmc_actual']:.0f} µm)"
+        ),
+        "cambio_av": f"{int(fila['cambio_av'])} letras (de {int(fila['avmc_basal'])} a {int(fila['avmc_actual'])})",
+        "motivos": None,
+    }
+
+
+def _delta_gmc(delta, umbral):
+    return "N/A" if delta != delta else f"+{delta:.0f} µm (umbral ≥ {umbral:g})"
+
+
+def _valores_dmre(fila, umbrales):
+    banderas = (
+        BANDERA_LIQUIDO * bool(fila["actividad_liquido"])
+        | BANDERA_VISION * bool(fila["actividad_vision"])
+        | BANDERA_HEMORRAGIA * bool(fila["actividad_hemorragia"])
+        | BANDERA_GMC_SEM16 * bool(fila["actividad_gmc_sem16"])
+        | BANDERA_GMC_MIN * bool(fila["actividad_gmc_min"])
+    )
+    return {
+        "tipo_paciente": fila["tipo_paciente"],
+        "intervalo_actual": fila["intervalo_actual"],
+        "liquido": f"{_si_no(fila['lir'])} / {fila['lsr_micras']:.0f} µm",
+        "avmc": f"{int(fila['avmc_basal'])} / {int(fila['avmc_mejor'])} / {int(fila['avmc_actual'])} letras",
+        "hemorragia_nueva": _si_no(fila["hemorragia_nueva"]),
+        "gmc": f"{fila['gmc_sem16']:.0f} / {fila['gmc_min_hist']:.0f} / {fila['gmc_actual']:.0f} µm",
+        "actividad": _si_no(fila["actividad"]),
+        "delta_vs_basal": f"{int(fila['delta_vs_basal_letras'])} letras",
+        "delta_vs_mejor": f"{int(fila['delta_vs_mejor_letras'])} letras",
+        "delta_gmc_vs_sem16": _delta_gmc(fila["delta_gmc_vs_sem16"], umbrales.gmc_sem16),
+        "delta_gmc_vs_min": _delta_gmc(fila["delta_gmc_vs_min"], umbrales.gmc_min),
+        "motivos": motivos_desde_banderas(
+            banderas, fila["delta_gmc_vs_sem16"], fila["delta_gmc_vs_min"], umbrales,
+        ),
+    }
+
+
+_VALORES = {"emd": _valores_emd, "dmre": _valores_dmre}
+
+
+# =========================
+# Plantillas compiladas
+# =========================
+def _literal(texto):
+    """Texto fijo dentro de una cadena de formato (llaves escapadas)."""
+    return texto.replace("{", "{{").replace("}", "}}")
+
+
+_ESTILO = (
+    "body{font-family:Helvetica,Arial,sans-serif;max-width:46em;margin:2em auto;color:#222}"
+    "h1{font-size:1.4em;margin-bottom:.2em}h2{font-size:1.1em;border-bottom:1px solid #ccc;margin-top:1.4em}"
+    "table{border-collapse:collapse;width:100%}td{padding:.25em .4em;border-bottom:1px solid #eee}"
+    "td:first-child{width:45%;color:#555}.plan{font-size:1.15em;padding:.6em;background:#e8f4ea}"
+    ".aviso{margin-top:2em;font-size:.85em;color:#666}@media print{body{margin:0}}"
+)
+
+
+def _compilar_html(algoritmo):
+    titulo = _literal(html.escape(_TITULOS[algoritmo]))
+    partes = [
+        '<!DOCTYPE html>\n<html lang="es"><head><meta charset="utf-8">',
+        f"<title>{{paciente}} – {titulo}</title><style>{_literal(_ESTILO)}</style></head><body>",
+        f"<h1>{titulo}</h1>",
+        "<p>Paciente / ojo: <b>{paciente}</b> · Fecha: {fecha}</p>",
+        '<p class="plan"><b>Plan sugerido:</b> {plan}</p>',
+        "<p><b>Justificación clínica:</b> {justificacion}</p>",
+    ]
+    for seccion, campos in _SECCIONES[algoritmo]:
+        partes.append(f"<h2>{_literal(html.escape(seccion))}</h2><table>")
+        partes.extend(
+            f"<tr><td>{_literal(html.escape(etiqueta))}</td><td>{{{campo}}}</td></tr>"
+            for etiqueta, campo in campos
+        )
+        partes.append("</table>")
+    if algoritmo == "dmre":
+        partes.append("<h2>Motivos detectados</h2>{motivos}")
+    partes.append(f'<p class="aviso">{_literal(html.escape(_AVISO))}</p></body></html>\n')
+    return "".join(partes)
+
+
+def _compilar_pdf(algoritmo):
+    """Líneas del PDF: (estilo, cadena de formato); "{motivos}" se expande a varias líneas."""
+    lineas = [
+        ("titulo", _literal(_TITULOS[algoritmo])),
+        ("texto", "Paciente / ojo: {paciente}    Fecha: {fecha}"),
+        ("espacio", ""),
+        ("negrita", "Plan sugerido: {plan}"),
+        ("texto", "Justificación clínica: {justificacion}"),
+    ]
+    for seccion, campos in _SECCIONES[algoritmo]:
+        lineas.append(("seccion", _literal(seccion)))
+        lineas.extend(("texto", f"{_literal(etiqueta)}: {{{campo}}}") for etiqueta, campo in campos)
+    if algoritmo == "dmre":
+        lineas.append(("seccion", "Motivos detectados"))
+        lineas.append(("motivos", ""))
+    lineas.append(("espacio", ""))
+    lineas.append(("pequena", _literal(_AVISO)))
+    return tuple(lineas)
+
+
+_HTML = {algoritmo: _compilar_html(algoritmo) for algoritmo in _SECCIONES}
+_PDF = {algoritmo: _compilar_pdf(algoritmo) for algoritmo in _SECCIONES}
+
+
+def informe_html(algoritmo, paciente, fecha, plan, justificacion, valores):
+    """Informe HTML de una visita (`valores`: salida de `_valores_emd` / `_valores_dmre`)."""
+    campos = {clave: html.escape(str(v)) for clave, v in valores.items() if clave != "motivos"}
+    motivos = valores["motivos"]
+    campos["motivos"] = (
+        "<ul>" + "".join(f"<li>{html.escape(m)}</li>" for m in motivos) + "</ul>" if motivos
+        else f"<p>{_SIN_MOTIVOS}</p>"
+    )
+    return _HTML[algoritmo].format(
+        paciente=html.escape(paciente), fecha=html.escape(fecha),
+        plan=html.escape(plan), justificacion=html.escape(justificacion), **campos,
+    )
+
+
+# =========================
+# PDF mínimo
+# =========================
+# Estilo → (fuente, tamaño en puntos, caracteres por línea, interlineado); los
+# caracteres por línea suponen un ancho medio de Helvetica de ~0,5 em
+_ESTILOS_PDF = {
+    "titulo": ("F2", 16, 50, 24),
+    "seccion": ("F2", 12, 68, 22),
+    "negrita": ("F2", 10, 85, 14),
+    "texto": ("F1", 10, 92, 14),
+    "pequena": ("F1", 8, 115, 11),
+    "espacio": ("F1", 10, 92, 8),
+}
+_ANCHO, _ALTO, _MARGEN = 595, 842, 56        # A4 en puntos
+# Caracteres que no existen en WinAnsi
+_SUSTITUCIONES = str.maketrans({"Δ": "Delta ", "≥": ">=", "≤": "<=", "→": "->"})
+
+
+def _texto_pdf(texto):
+    datos = texto.translate(_SUSTITUCIONES).encode("cp1252", errors="replace")
+    return datos.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _paginas_pdf(lineas):
+    """Reparte (estilo, texto) en flujos de contenido de página, cortando las líneas largas."""
+    paginas, flujo, y = [], [], _ALTO - _MARGEN
+    for estilo, texto in lineas:
+        fuente, tamano, ancho, salto = _ESTILOS_PDF[estilo]
+        for trozo in textwrap.wrap(texto, ancho) or [""]:
+            if y - salto < _MARGEN:
+                paginas.append(b"".join(flujo))
+                flujo, y = [], _ALTO - _MARGEN
+            y -= salto
+            if trozo:
+                flujo.append(b"BT /%s %d Tf %d %d Td (%s) Tj ET\n" % (
+                    fuente.encode(), tamano, _MARGEN, y, _texto_pdf(trozo),
+                ))
+    paginas.append(b"".join(flujo))
+    return paginas
+
+
+def _documento_pdf(flujos):
+    # 1: catálogo, 2: páginas, 3-4: fuentes, después (página, contenido) por página
+    n = len(flujos)
+    paginas = " ".join(f"{5 + 2 * i} 0 R" for i in range(n))
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{paginas}] /Count {n} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, flujo in enumerate(flujos):
+        objetos.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_ANCHO} {_ALTO}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {6 + 2 * i} 0 R >>"
+        ).encode())
+        objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(flujo), flujo))
+
+    salida = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+    desplazamientos, posicion = [], len(salida[0])
+    for i, objeto in enumerate(objetos, 1):
+        trozo = b"%d 0 obj\n%s\nendobj\n" % (i, objeto)
+        desplazamientos.append(posicion)
+        salida.append(trozo)
+        posicion += len(trozo)
+    salida.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1))
+    salida.extend(b"%010d 00000 n \n" % d for d in desplazamientos)
+    salida.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, posicion))
+    return b"".join(salida)
+
+
+def informe_pdf(algoritmo, paciente, fecha, plan, justificacion, valores):
+    """Informe PDF de una visita, con el mismo contenido que `informe_html`."""
+    campos = {clave: str(v) for clave, v in valores.items() if clave != "motivos"}
+    campos.update(paciente=paciente, fecha=fecha, plan=plan, justificacion=justificacion)
+    lineas = []
+    for estilo, plantilla in _PDF[algoritmo]:
+        if estilo == "motivos":
+            lineas.extend(("texto", f"- {m}") for m in valores["motivos"] or [_SIN_MOTIVOS])
+        else:
+            lineas.append((estilo, plantilla.format(**campos)))
+    return _documento_pdf(_paginas_pdf(lineas))
+
+
+# =========================
+# Exportación
+# =========================
+class _DestinoDirectorio:
+    def __init__(self, ruta):
+        os.makedirs(ruta, exist_ok=True)
+        self.ruta = ruta
+
+    def escribir(self, nombre, datos):
+        with open(os.path.join(self.ruta, nombre), "wb") as f:
+            f.write(datos)
+
+    def cerrar(self):
+        pass
+
+
+class _DestinoZip:
+    """Cada documento se comprime y se escribe en cuanto se genera."""
+
+    def __init__(self, ruta):
+        self._zip = zipfile.ZipFile(ruta, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+
+    def escribir(self, nombre, datos):
+        self._zip.writestr(nombre, datos)
+
+    def cerrar(self):
+        self._zip.close()
+
+
+def _nombre_archivo(numero, paciente):
+    return f"{numero:05d}_{re.sub(r'[^A-Za-z0-9._-]+', '_', paciente)[:60]}"
+
+
+def generar_informes(algoritmo, bloques, formatos=FORMATOS, fecha=None, umbrales=None):
+    """
+    Puntúa cada bloque (DataFrame con las columnas del algoritmo y, opcionales,
+    "paciente" u "ojo" y "fecha") y genera sus informes de uno en uno.
+    `umbrales`: por defecto, los de la versión vigente.
+    Genera: (nombre de archivo, bytes)
+    """
+    if algoritmo not in PUNTUADORES:
+        raise ValueError(f"Algoritmo desconocido: {algoritmo!r} (usar 'emd' o 'dmre')")
+    umbrales = umbrales or vigentes(algoritmo)
+    fecha_por_defecto = str(fecha or date.today())
+    valores_de = _VALORES[algoritmo]
+    numero = 0
+    for bloque in bloques:
+        puntuado = PUNTUADORES[algoritmo](bloque, umbrales)
+        if algoritmo == "dmre":
+            # LIR / hemorragia como booleanos, aceptando "Sí"/"No" como en la puntuación
+            args = argumentos_dmre(bloque)
+            puntuado["lir"], puntuado["hemorragia_nueva"] = args[2], args[7]
+        identificador = "paciente" if "paciente" in puntuado else "ojo" if "ojo" in puntuado else None
+        for fila in puntuado.to_dict("records"):
+            numero += 1
+            paciente = str(fila[identificador]) if identificador else str(numero)
+            fecha_fila = str(fila["fecha"])[:10] if "fecha" in fila else fecha_por_defecto
+            valores = valores_de(fila, umbrales)
+            nombre = _nombre_archivo(numero, paciente)
+            if "html" in formatos:
+                yield nombre + ".html", informe_html(
+                    algoritmo, paciente, fecha_fila, fila["plan"], fila["justificacion"], valores,
+                ).encode("utf-8")
+            if "pdf" in formatos:
+                yield nombre + ".pdf", informe_pdf(
+                    algoritmo, paciente, fecha_fila, fila["plan"], fila["justificacion"], valores,
+                )
+
+
+def exportar_informes(algoritmo, bloques, destino, formatos=FORMATOS, fecha=None, umbrales=None):
+    """
+    Escribe los informes de todas las visitas en `destino`: un archivo .zip o
+    un directorio. Cada documento se escribe en cuanto se genera.
+    Devuelve: número de documentos escritos.
+    """
+    salida = _DestinoZip(destino) if destino.lower().endswith(".zip") else _DestinoDirectorio(destino)
+    documentos = 0
+    try:
+        for nombre, datos in generar_informes(algoritmo, bloques, formatos, fecha, umbrales):
+            salida.escribir(nombre, datos)
+            documentos += 1
+    finally:
+        salida.cerrar()
+    return documentos
@@ -0,0 +1,211 @@
+"""
+Ingesta de exportaciones de OCT (CSV o XML, una o varias exploraciones por archivo).
+
+Los equipos dejan un archivo por exploración en una carpeta. `leer_directorio`
+los analiza en un pool de hilos con un número acotado de archivos en vuelo
+(contrapresión: la memoria no crece con el tamaño de la carpeta) y entrega
+exploraciones normalizadas. `puntuar_exportaciones` las agrupa por ojo y las
+evalúa con `HistorialOjo` en orden de fecha de exploración (los archivos llegan
+por fecha de modificación, que no tiene por qué coincidir).
+
+Los nombres de campo varían entre fabricantes; se reconocen por alias
+(ver `_ALIAS`), sin distinguir mayúsculas ni separadores.
+"""
+import csv
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import NamedTuple, Optional
+
+from .historial import HistorialOjo, Visita
+
+EXTENSIONES = (".csv", ".xml")
+
+# Campo normalizado → nombres aceptados (normalizados con `_clave`)
+_ALIAS = {
+    "paciente": ("patientid", "paciente", "idpaciente", "patient", "mrn"),
+    "lado": ("eye", "laterality", "ojo", "lado"),
+    "fecha": ("scandate", "examdate", "fecha", "date", "acquisitiondate"),
+    "gmc": ("cst", "centralsubfieldthickness", "csft", "gmc", "centralthickness", "cmt"),
+    "lir": ("irf", "intraretinalfluid", "lir"),
+    # Sin "srf" a secas: en algunos equipos es la presencia de LSR (Sí/No), no la altura
+    "lsr_micras": ("srfheight", "subretinalfluidheight", "lsr", "lsrmicras"),
+    "avmc": ("bcva", "bcvaletters", "avmc", "vaetdrs"),
+    "hemorragia_nueva": ("hemorrhage", "newhemorrhage", "hemorragia", "hemorragianueva"),
+}
+_CAMPO = {alias: campo for campo, aliases in _ALIAS.items() for alias in aliases}
+_ETIQUETAS_XML = {"scan", "exam", "exploracion", "examination"}
+
+_LADOS = {"od": "OD", "r": "OD", "right": "OD", "derecho": "OD",
+          "os": "OI", "oi": "OI", "l": "OI", "left": "OI", "izquierdo": "OI"}
+_VERDADERO = {"sí", "si", "true", "1", "yes", "s", "y", "present", "presente"}
+
+
+class ExploracionOCT(NamedTuple):
+    archivo: str
+    ojo: str                          # "<paciente>-OD" / "<paciente>-OI"
+    fecha: date
+    gmc: float
+    lir: bool = False
+    lsr_micras: float = 0.0
+    avmc: Optional[int] = None        # si el equipo la exporta
+    hemorragia_nueva: bool = False
+
+
+def _clave(nombre):
+    return re.sub(r"[^a-z0-9]", "", nombre.lower())
+
+
+def _normalizar(ruta, registro):
+    """dict crudo de un archivo → ExploracionOCT. ValueError si falta algo esencial."""
+    campos = {}
+    for nombre, valor in registro.items():
+        campo = _CAMPO.get(_clave(nombre or ""))
+        if campo and valor is not None and str(valor).strip() != "":
+            campos.setdefault(campo, str(valor).strip())
+
+    faltan = [c for c in ("paciente", "lado", "fecha", "gmc") if c not in campos]
+    if faltan:
+        raise ValueError(f"faltan campos: {', '.join(faltan)}")
+    lado = _LADOS.get(campos["lado"].lower())
+    if lado is None:
+        raise ValueError(f"lateralidad no reconocida: {campos['lado']!r}")
+
+    return ExploracionOCT(
+        archivo=ruta,
+        ojo=f"{campos['paciente']}-{lado}",
+        fecha=date.fromisoformat(campos["fecha"][:10]),
+        gmc=float(campos["gmc"]),
+        lir=campos.get("lir", "").lower() in _VERDADERO,
+        lsr_micras=float(campos.get("lsr_micras", 0.0)),
+        avmc=int(float(campos["avmc"])) if "avmc" in campos else None,
+        hemorragia_nueva=campos.get("hemorragia_nueva", "").lower() in _VERDADERO,
+    )
+
+
+def _registros_xml(ruta):
+    raiz = ET.parse(ruta).getroot()
+    elementos = [e for e in raiz.iter() if _clave(e.tag) in _ETIQUETAS_XML] or [raiz]
+    for e in elementos:
+        registro = dict(e.attrib)
+        for hijo in e:
+            registro.setdefault(hijo.tag, hijo.text)
+        yield registro
+
+
+def leer_archivo(ruta):
+    """
+    Analiza un archivo de exportación.
+    Devuelve: (lista de ExploracionOCT, lista de errores por registro)
+    """
+    if ruta.lower().endswith(".xml"):
+        registros = _registros_xml(ruta)
+    else:
+        with open(ruta, encoding="utf-8-sig", newline="") as f:
+            registros = list(csv.DictReader(f))
+
+    exploraciones, errores = [], []
+    for registro in registros:
+        try:
+            exploraciones.append(_normalizar(ruta, registro))
+        except ValueError as error:
+            errores.append((ruta, str(error)))
+    return exploraciones, errores
+
+
+def _leer_protegido(ruta):
+    try:
+        return leer_archivo(ruta)
+    except (OSError, ET.ParseError, csv.Error, UnicodeDecodeError) as error:
+        return [], [(ruta, f"{type(error).__name__}: {error}")]
+
+
+def archivos_exportacion(directorio):
+    """Archivos CSV/XML del directorio, en orden de llegada (fecha de modificación)."""
+    entradas = [e for e in os.scandir(directorio) if e.is_file() and e.name.lower().endswith(EXTENSIONES)]
+    entradas.sort(key=lambda e: (e.stat().st_mtime, e.name))
+    return [e.path for e in entradas]
+
+
+def leer_directorio(directorio, trabajadores=8, en_vuelo=None, errores=None):
+    """
+    Genera las exploraciones de todos los archivos del directorio, en el orden
+    de `archivos_exportacion`. Como mucho `en_vuelo` archivos (por defecto
+    4 × trabajadores) están leídos y sin consumir a la vez.
+    Los archivos o registros inválidos se omiten y, si se pasa una lista en
+    `errores`, se anotan en ella como (ruta, mensaje).
+    """
+    en_vuelo = en_vuelo or 4 * trabajadores
+    pendientes = deque()
+
+    def entregar(futuro):
+        exploraciones, fallos = futuro.result()
+        if errores is not None:
+            errores.extend(fallos)
+        return exploraciones
+
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        for ruta in archivos_exportacion(directorio):
+            pendientes.append(pool.submit(_leer_protegido, ruta))
+            if len(pendientes) >= en_vuelo:
+                yield from entregar(pendientes.popleft())
+        while pendientes:
+            yield from entregar(pendientes.popleft())
+
+
+def puntuar_exportaciones(
+    directorio,
+    algoritmo="dmre",
+    contexto=None,
+    tipo_paciente="Naive",
+    intervalo_inicial="Q8W",
+    trabajadores=8,
+    en_vuelo=None,
+    errores=None,
+):
+    """
+    Lee las exportaciones y evalúa cada exploración con el historial de su ojo.
+
+    El OCT sólo aporta GMC, LIR, LSR y, si el equipo la exporta, AVMC/hemorragia.
+    `contexto(exploracion)` puede devolver un dict con "tipo_paciente", "semana",
+    "avmc" y "hemorragia_nueva" tomados de la historia clínica. Sin él, la semana
+    se cuenta desde la primera exploración del ojo y, si falta la AVMC, los
+    criterios de visión no se evalúan en esa exploración.
+
+    `HistorialOjo` necesita las visitas de cada ojo en orden de fecha, y una
+    exploración antigua puede llegar en cualquier momento: se leen todas (la
+    lectura sigue acotada por `en_vuelo`; lo que se retiene son las exploraciones
+    ya normalizadas) y se evalúan ojo por ojo, ordenadas por fecha (a igual
+    fecha, por orden de llegada).
+
+    Genera: (exploracion, resultado del evaluador), ojo por ojo en orden de primera
+    llegada.
+    """
+    por_ojo = {}
+    for exploracion in leer_directorio(directorio, trabajadores, en_vuelo, errores):
+        por_ojo.setdefault(exploracion.ojo, []).append(exploracion)
+
+    for exploraciones in por_ojo.values():
+        exploraciones.sort(key=lambda e: e.fecha)          # estable: conserva la llegada
+        historial = None
+        for exploracion in exploraciones:
+            extra = contexto(exploracion) if contexto else {}
+            if historial is None:
+                historial = HistorialOjo(
+                    extra.get("tipo_paciente", tipo_paciente), intervalo_inicial, guardar_visitas=False
+                )
+            semana = extra.get("semana")
+            if semana is None:
+                semana = (exploracion.fecha - exploraciones[0].fecha).days // 7
+            historial.agregar_visita(Visita(
+                semana=semana,
+                gmc=exploracion.gmc,
+                avmc=extra.get("avmc", exploracion.avmc),
+                lir=exploracion.lir,
+                lsr_micras=exploracion.lsr_micras,
+                hemorragia_nueva=extra.get("hemorragia_nueva", exploracion.hemorragia_nueva),
+            ))
+            yield exploracion, historial.evaluar(algoritmo)
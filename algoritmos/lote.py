@@ -0,0 +1,249 @@
+"""
+Versiones vectorizadas de los algoritmos EMD y DMRE para cohortes completas.
+"""
+import numpy as np
+
+from .dmre import RAMAS_DMRE
+from .emd import RAMAS_EMD
+from .metricas import instrumentar
+from .resultados import ResultadoDMRE
+from .umbrales import UmbralesDMRE, UmbralesEMD, vigentes
+
+
+def _clasificar_emd_lote(args, kwargs, resultado, registro):
+    # Métricas (opcionales): un conteo por rama con bincount, sin recorrer filas
+    _, justificacion, cambio_gmc, _ = resultado
+    for codigo, n in enumerate(np.bincount(justificacion, minlength=len(RAMAS_EMD))):
+        if n:
+            registro.contar("emd_lote", "rama", RAMAS_EMD[codigo], int(n))
+    invalidos = int(np.count_nonzero(np.isnan(cambio_gmc)))
+    if invalidos:
+        registro.contar("emd_lote", "calidad", "gmc_basal_no_valido", invalidos)
+
+
+def _clasificar_dmre_lote(args, kwargs, r, registro):
+    for codigo, n in enumerate(np.bincount(r["plan"], minlength=len(RAMAS_DMRE))):
+        if n:
+            registro.contar("dmre_lote", "rama", RAMAS_DMRE[codigo], int(n))
+    for criterio in ("liquido", "vision", "hemorragia", "gmc_sem16", "gmc_min"):
+        n = int(np.count_nonzero(r["actividad_" + criterio]))
+        if n:
+            registro.contar("dmre_lote", "criterio", criterio, n)
+    for campo, problema in (("delta_gmc_vs_sem16", "gmc_sem16_no_valido"),
+                            ("delta_gmc_vs_min", "gmc_min_hist_no_valido")):
+        n = int(np.count_nonzero(np.isnan(r[campo])))
+        if n:
+            registro.contar("dmre_lote", "calidad", problema, n)
+
+
+# =========================
+# Lógica EMD vectorizada
+# =========================
+@instrumentar("emd_lote", _clasificar_emd_lote)
+def algoritmo_emd_lote(
+    tipo_paciente,
+    semana,
+    gmc_basal,
+    gmc_actual,
+    avmc_basal,
+    avmc_actual,
+    umbrales: UmbralesEMD = None,
+):
+    """
+    Versión vectorizada de `algoritmo_emd` para columnas completas (arrays NumPy,
+    listas o Series de pandas de igual longitud).
+    Recorre las mismas reglas y en el mismo orden que la versión escalar,
+    usando máscaras: cada fila toma la primera regla que la cumple.
+    Devuelve: (plan_cod, justificacion_cod, cambio_gmc, cambio_av)
+      - plan_cod / justificacion_cod: índices sobre PLANES_EMD / justificaciones_emd(umbrales)
+      - cambio_gmc: NaN donde la versión escalar devuelve None (GMC basal ≤ 0)
+    `umbrales` (por defecto, los de la versión vigente) permite evaluar con otra
+    versión de los cortes; ver `algoritmos.umbrales`.
+    """
+    u = umbrales or vigentes("emd")
+    tipo_paciente = np.asarray(tipo_paciente)
+    semana = np.asarray(semana)
+    gmc_basal = np.asarray(gmc_basal, dtype=float)
+    gmc_actual = np.asarray(gmc_actual, dtype=float)
+
+    # Evitar división por cero (NaN hace el papel de None)
+    sin_basal = gmc_basal <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cambio_gmc = (gmc_actual - gmc_basal) / gmc_basal * 100
+    cambio_gmc[sin_basal] = np.nan
+
+    cambio_av = np.asarray(avmc_actual) - np.asarray(avmc_basal)
+
+    n = gmc_actual.shape[0]
+    plan = np.full(n, 10, dtype=np.int8)
+    justificacion = np.full(n, 13, dtype=np.int8)
+    pendiente = np.ones(n, dtype=bool)
+
+    def aplicar(mascara, cod_plan, cod_just):
+        mascara = pendiente & mascara
+        plan[mascara] = cod_plan
+        justificacion[mascara] = cod_just
+        pendiente[mascara] = False
+
+    # Las comparaciones con NaN son False, igual que en la versión escalar
+    with np.errstate(invalid="ignore"):
+        # 1. PACIENTE NAÍVE
+        naive = tipo_paciente == "Naive"
+        aplicar(naive & (semana < 12), 0, 0)
+        aplicar(naive & (gmc_actual <= u.gmc_switch), 1, 1)
+        aplicar(naive & (gmc_actual >= u.gmc_ozurdex), 2, 2)
+
+        early = naive & (u.gmc_switch < gmc_actual) & (gmc_actual < u.gmc_ozurdex)
+        aplicar(early & sin_basal, 3, 3)
+        aplicar(early & (cambio_gmc < -u.cambio_estable), 4, 4)
+        aplicar(early & (-u.cambio_estable <= cambio_gmc) & (cambio_gmc <= u.cambio_estable), 4, 5)
+        aplicar(early & (0 < cambio_gmc) & (cambio_gmc < u.cambio_estable), 5, 6)
+        aplicar(early & (cambio_gmc >= u.cambio_aumento), 6, 7)
+        # Caso intermedio raro (incluye 10% < cambio < 20%)
+        aplicar(early, 7, 8)
+
+        # 2. PACIENTE CON TRATAMIENTO PREVIO
+        previo = tipo_paciente == "Previo"
+        aplicar(previo & sin_basal, 3, 3)
+        aplicar(previo & (cambio_gmc < -u.cambio_estable), 8, 9)
+        aplicar(previo & (-u.cambio_estable <= cambio_gmc) & (cambio_gmc <= u.cambio_estable), 9, 10)
+        aplicar(previo & (0 < cambio_gmc) & (cambio_gmc < u.cambio_aumento), 9, 11)
+        aplicar(previo & (cambio_gmc >= u.cambio_aumento), 1, 12)
+
+    # Lo que queda pendiente conserva "Sin decisión automática"
+    return plan, justificacion, cambio_gmc, cambio_av
+
+
+# =========================
+# Lógica DMRE vectorizada
+# =========================
+# Registro compacto por visita: banderas de actividad, deltas e intervalos.
+# Los deltas de GMC son NaN donde la versión escalar devuelve None.
+DTYPE_DMRE = np.dtype([
+    ("plan", np.int8),
+    ("justificacion", np.int8),
+    ("intervalo_actual", np.int8),
+    ("intervalo_nuevo", np.int8),
+    ("actividad", np.bool_),
+    ("actividad_liquido", np.bool_),
+    ("actividad_vision", np.bool_),
+    ("actividad_hemorragia", np.bool_),
+    ("actividad_gmc_sem16", np.bool_),
+    ("actividad_gmc_min", np.bool_),
+    ("delta_vs_basal_letras", np.int16),
+    ("delta_vs_mejor_letras", np.int16),
+    ("delta_gmc_vs_sem16", np.float64),
+    ("delta_gmc_vs_min", np.float64),
+])
+
+
+@instrumentar("dmre_lote", _clasificar_dmre_lote)
+def algoritmo_dmre_lote(
+    tipo_paciente,
+    intervalo_actual,
+    lir,
+    lsr_micras,
+    avmc_basal,
+    avmc_mejor,
+    avmc_actual,
+    hemorragia_nueva,
+    gmc_sem16,
+    gmc_min_hist,
+    gmc_actual,
+    umbrales: UmbralesDMRE = None,
+):
+    """
+    Versión vectorizada de `algoritmo_dmre` para columnas completas.
+    No construye textos: los motivos se generan bajo demanda con `detalle_dmre`.
+    `umbrales`: como en `algoritmo_emd_lote`.
+    Devuelve: array estructurado (DTYPE_DMRE), una fila por visita.
+    """
+    u = umbrales or vigentes("dmre")
+    tipo_paciente = np.asarray(tipo_paciente)
+    intervalo_actual = np.asarray(intervalo_actual)
+    lsr_micras = np.asarray(lsr_micras, dtype=float)
+    avmc_actual = np.asarray(avmc_actual)
+    gmc_sem16 = np.asarray(gmc_sem16, dtype=float)
+    gmc_min_hist = np.asarray(gmc_min_hist, dtype=float)
+    gmc_actual = np.asarray(gmc_actual, dtype=float)
+
+    n = gmc_actual.shape[0]
+    r = np.zeros(n, dtype=DTYPE_DMRE)
+
+    # Intervalo en semanas (valores desconocidos → Q8W, como en la versión escalar)
+    int_sem = np.full(n, 8, dtype=np.int8)
+    for etiqueta, semanas in (("Q4W", 4), ("Q8W", 8), ("Q12W", 12), ("Q16W", 16)):
+        int_sem[intervalo_actual == etiqueta] = semanas
+    r["intervalo_actual"] = int_sem
+
+    # Cambios visuales
+    delta_vs_basal = avmc_actual - np.asarray(avmc_basal)
+    delta_vs_mejor = avmc_actual - np.asarray(avmc_mejor)
+    r["delta_vs_basal_letras"] = delta_vs_basal
+    r["delta_vs_mejor_letras"] = delta_vs_mejor
+
+    with np.errstate(invalid="ignore"):
+        # Criterios de actividad por OCT/visión/hemorragia
+        r["actividad_liquido"] = np.asarray(lir, dtype=bool) | (lsr_micras >= u.lsr_liquido)
+        r["actividad_vision"] = (delta_vs_basal <= u.av_caida_basal) | (delta_vs_mejor <= u.av_caida_mejor)
+        r["actividad_hemorragia"] = np.asarray(hemorragia_nueva, dtype=bool)
+
+        # Criterios GMC del diagrama
+        delta_sem16 = np.where(gmc_sem16 <= 0, np.nan, gmc_actual - gmc_sem16)
+        delta_min = np.where(gmc_min_hist <= 0, np.nan, gmc_actual - gmc_min_hist)
+        r["delta_gmc_vs_sem16"] = delta_sem16
+        r["delta_gmc_vs_min"] = delta_min
+        r["actividad_gmc_sem16"] = delta_sem16 >= u.gmc_sem16
+        r["actividad_gmc_min"] = delta_min >= u.gmc_min
+
+    actividad = (
+        r["actividad_liquido"] | r["actividad_vision"] | r["actividad_hemorragia"]
+        | r["actividad_gmc_sem16"] | r["actividad_gmc_min"]
+    )
+    r["actividad"] = actividad
+
+    # Transición de intervalo: +4 sin actividad (máx Q16W), -4 con actividad (mín Q8W)
+    extender = ~actividad & (int_sem < 16)
+    acortar = actividad & (int_sem > 8)
+    nuevo = int_sem.copy()
+    nuevo[extender] = np.minimum(16, int_sem[extender] + 4)
+    nuevo[acortar] = np.maximum(8, int_sem[acortar] - 4)
+    r["intervalo_nuevo"] = nuevo
+
+    plan = np.empty(n, dtype=np.int8)
+    just = np.empty(n, dtype=np.int8)
+
+    plan[extender] = nuevo[extender] // 4 - 2        # Q8W→0, Q12W→1, Q16W→2
+    just[extender] = 0
+    mantener = ~actividad & ~extender
+    plan[mantener] = 3
+    just[mantener] = 1
+    plan[acortar] = nuevo[acortar] // 4 + 2          # Q8W→4, Q12W→5
+    just[acortar] = 2
+    en_q8 = actividad & ~acortar
+    naive = tipo_paciente == "Naive"
+    plan[en_q8 & naive] = 6
+    just[en_q8 & naive] = 3
+    plan[en_q8 & ~naive] = 7
+    just[en_q8 & ~naive] = 4
+
+    r["plan"] = plan
+    r["justificacion"] = just
+    return r
+
+
+def motivos_dmre(fila, umbrales=None):
+    """
+    Construye la lista de motivos legibles de una fila de `algoritmo_dmre_lote`
+    evaluada con `umbrales`. Mismo texto que detalle["motivos"] de la versión escalar.
+    """
+    return ResultadoDMRE.desde_fila(fila, None, umbrales).motivos()
+
+
+def detalle_dmre(fila, tipo_paciente, umbrales=None):
+    """
+    Reconstruye (plan, justificación, detalle) de una fila de `algoritmo_dmre_lote`,
+    con el mismo formato que devuelve `algoritmo_dmre`. Pensado para las filas que
+    alguien va a ver, no para la cohorte completa.
+    """
+    return ResultadoDMRE.desde_fila(fila, tipo_paciente, umbrales).como_tupla()
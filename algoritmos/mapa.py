@@ -0,0 +1,65 @@
+"""
+Evaluación de los algoritmos sobre mallas completas de parámetros.
+
+Responde "¿qué plan saldría si el GMC fuera X?" para todos los X a la vez:
+cada celda de la malla es una fila de la versión vectorizada del algoritmo.
+"""
+import numpy as np
+
+from .lote import algoritmo_dmre_lote, algoritmo_emd_lote
+
+
+def mapa_emd(tipo_paciente, semana, gmc_min=0.0, gmc_max=1200.0, paso=1.0):
+    """
+    Plan EMD para cada combinación GMC basal × GMC actual.
+    Devuelve: (valores del eje, matriz de códigos de plan [fila = basal, columna = actual])
+    """
+    eje = np.arange(gmc_min, gmc_max + paso / 2, paso)
+    basal, actual = np.meshgrid(eje, eje, indexing="ij")
+    n = basal.size
+    # La AVMC no interviene en el plan
+    plan, _, _, _ = algoritmo_emd_lote(
+        np.full(n, tipo_paciente), np.full(n, semana), basal.ravel(), actual.ravel(),
+        np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64),
+    )
+    return eje, plan.reshape(basal.shape)
+
+
+def mapa_dmre(
+    tipo_paciente,
+    intervalo_actual,
+    referencia="semana 16",
+    lir=False,
+    hemorragia_nueva=False,
+    delta_av_basal=0,
+    delta_av_mejor=0,
+    gmc_referencia=300.0,
+    lsr_max=500.0,
+    delta_min=-200.0,
+    delta_max=400.0,
+    paso=1.0,
+):
+    """
+    Plan DMRE para cada combinación LSR × ΔGMC. El ΔGMC se mide contra el GMC
+    de la semana 16 o contra el mínimo histórico (`referencia`); la otra
+    referencia queda como no disponible. La AVMC entra como deltas fijos.
+    Devuelve: (eje LSR, eje ΔGMC, matriz de códigos de plan [fila = ΔGMC, columna = LSR])
+    """
+    eje_lsr = np.arange(0.0, lsr_max + paso / 2, paso)
+    eje_delta = np.arange(delta_min, delta_max + paso / 2, paso)
+    delta, lsr = np.meshgrid(eje_delta, eje_lsr, indexing="ij")
+    n = delta.size
+
+    gmc_ref = np.full(n, gmc_referencia)
+    sin_ref = np.zeros(n)
+    gmc_sem16, gmc_min_hist = (gmc_ref, sin_ref) if referencia == "semana 16" else (sin_ref, gmc_ref)
+    avmc = np.full(n, 70, dtype=np.int64)
+
+    r = algoritmo_dmre_lote(
+        np.full(n, tipo_paciente), np.full(n, intervalo_actual),
+        np.full(n, lir), lsr.ravel(),
+        avmc - delta_av_basal, avmc - delta_av_mejor, avmc,
+        np.full(n, hemorragia_nueva),
+        gmc_sem16, gmc_min_hist, gmc_referencia + delta.ravel(),
+    )
+    return eje_lsr, eje_delta, r["plan"].reshape(delta.shape)
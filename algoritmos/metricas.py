@@ -0,0 +1,132 @@
+"""
+Instrumentación opcional de los evaluadores: conteo de ramas/criterios y
+histogramas de latencia por llamada.
+
+Se activa con la variable de entorno ALGORITMOS_METRICAS=1 antes de importar
+`algoritmos`. Desactivada, `instrumentar` devuelve la función original sin
+envolver, así que no añade ningún costo.
+
+Exportación:
+    REGISTRO.como_json()        → dict serializable
+    REGISTRO.como_prometheus()  → texto en formato de exposición de Prometheus
+"""
+import os
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+ACTIVAS = os.environ.get("ALGORITMOS_METRICAS", "") not in ("", "0")
+
+# Límites superiores de los buckets de latencia (segundos)
+BUCKETS_LATENCIA = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2, 1e-1)
+
+
+class RegistroMetricas:
+    """Contadores y histogramas en memoria, seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            # (algoritmo, tipo, nombre) → conteo; tipo ∈ {"rama", "criterio", "calidad"}
+            self.contadores = Counter()
+            # algoritmo → [conteos por bucket (+Inf al final), suma en segundos, llamadas]
+            self.latencias = {}
+
+    def contar(self, algoritmo, tipo, nombre, n=1):
+        with self._lock:
+            self.contadores[algoritmo, tipo, nombre] += n
+
+    def observar_latencia(self, algoritmo, segundos):
+        with self._lock:
+            hist = self.latencias.get(algoritmo)
+            if hist is None:
+                hist = self.latencias[algoritmo] = [[0] * (len(BUCKETS_LATENCIA) + 1), 0.0, 0]
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if segundos <= limite:
+                    break
+            else:
+                i = len(BUCKETS_LATENCIA)
+            hist[0][i] += 1
+            hist[1] += segundos
+            hist[2] += 1
+
+    def como_json(self):
+        with self._lock:
+            contadores = {}
+            for (algoritmo, tipo, nombre), n in sorted(self.contadores.items()):
+                contadores.setdefault(algoritmo, {}).setdefault(tipo, {})[nombre] = n
+            latencias = {
+                algoritmo: {
+                    "buckets": dict(zip([str(b) for b in BUCKETS_LATENCIA] + ["+Inf"], conteos)),
+                    "suma_s": suma,
+                    "llamadas": llamadas,
+                }
+                for algoritmo, (conteos, suma, llamadas) in sorted(self.latencias.items())
+            }
+        return {"activas": ACTIVAS, "contadores": contadores, "latencias": latencias}
+
+    def como_prometheus(self):
+        etiquetas = {"rama": "rama", "criterio": "criterio", "calidad": "problema"}
+        ayudas = {
+            "rama": "Veces que se tomó cada rama del algoritmo.",
+            "criterio": "Veces que se cumplió cada criterio de actividad.",
+            "calidad": "Entradas con problemas de calidad de datos.",
+        }
+        nombres = {
+            "rama": "algoritmos_rama_total",
+            "criterio": "algoritmos_criterio_total",
+            "calidad": "algoritmos_calidad_datos_total",
+        }
+        lineas = []
+        with self._lock:
+            for tipo in ("rama", "criterio", "calidad"):
+                lineas.append(f"# HELP {nombres[tipo]} {ayudas[tipo]}")
+                lineas.append(f"# TYPE {nombres[tipo]} counter")
+                for (algoritmo, t, nombre), n in sorted(self.contadores.items()):
+                    if t == tipo:
+                        lineas.append(
+                            f'{nombres[tipo]}{{algoritmo="{algoritmo}",{etiquetas[tipo]}="{nombre}"}} {n}'
+                        )
+
+            lineas.append("# HELP algoritmos_latencia_segundos Latencia por llamada al evaluador.")
+            lineas.append("# TYPE algoritmos_latencia_segundos histogram")
+            for algoritmo, (conteos, suma, llamadas) in sorted(self.latencias.items()):
+                acumulado = 0
+                for limite, n in zip([repr(b) for b in BUCKETS_LATENCIA] + ["+Inf"], conteos):
+                    acumulado += n
+                    lineas.append(
+                        f'algoritmos_latencia_segundos_bucket{{algoritmo="{algoritmo}",le="{limite}"}} {acumulado}'
+                    )
+                lineas.append(f'algoritmos_latencia_segundos_sum{{algoritmo="{algoritmo}"}} {suma}')
+                lineas.append(f'algoritmos_latencia_segundos_count{{algoritmo="{algoritmo}"}} {llamadas}')
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+
+def instrumentar(algoritmo, clasificar):
+    """
+    Decorador para un evaluador. `clasificar(args, kwargs, resultado, registro)`
+    anota en el registro las ramas/criterios que correspondan al resultado.
+    Con las métricas desactivadas devuelve la función tal cual.
+    """
+    def decorador(funcion):
+        if not ACTIVAS:
+            return funcion
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = funcion(*args, **kwargs)
+            REGISTRO.observar_latencia(algoritmo, time.perf_counter() - inicio)
+            clasificar(args, kwargs, resultado, REGISTRO)
+            return resultado
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,292 @@
+"""
+Fichas de pacientes (por ojo) en SQLite, para prellenar los formularios.
+
+Cada ojo tiene una fila en `ojos` (clave primaria = identificador, así que la
+búsqueda es por índice) con sus basales y los valores de la última visita, y
+cada recomendación calculada se anexa a `visitas`. Al guardar una visita la
+ficha se actualiza en la misma transacción: la mejor AVMC y el GMC mínimo
+histórico incluyen la visita recién guardada. Reenviar la misma visita (otra
+pulsación de "Calcular" con los mismos datos) no la anexa de nuevo.
+
+Las conexiones salen de un pool compartido por todas las sesiones (SQLite en
+modo WAL: lecturas concurrentes con una escritura). Las sentencias son textos
+constantes, así que cada conexión las prepara una vez y reutiliza la versión
+compilada de su caché de sentencias. Las fichas leídas se guardan en una
+`CacheLRU`, que se invalida al guardar una visita de ese ojo.
+
+La ruta de la base se configura con ALGORITMOS_PACIENTES
+(por defecto, pacientes.sqlite3 en el directorio de trabajo).
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from .cache import CacheLRU
+from .dmre import SEMANAS_ANCLA_SEM16
+
+RUTA_POR_DEFECTO = os.environ.get("ALGORITMOS_PACIENTES", "pacientes.sqlite3")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ojos (
+    ojo              TEXT PRIMARY KEY,
+    tipo_paciente    TEXT,
+    intervalo_actual TEXT,
+    semana           INTEGER,
+    gmc_basal        REAL,
+    avmc_basal       INTEGER,
+    avmc_mejor       INTEGER,
+    gmc_sem16        REAL,
+    gmc_min_hist     REAL,
+    gmc_actual       REAL,               -- última visita
+    avmc_actual      INTEGER,            -- última visita
+    lsr_micras       REAL,               -- última visita
+    lir              INTEGER,            -- última visita (0/1)
+    hemorragia_nueva INTEGER,            -- última visita (0/1)
+    visitas          INTEGER NOT NULL,
+    actualizado      TEXT NOT NULL       -- ISO 8601, UTC
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS visitas (
+    id        INTEGER PRIMARY KEY,
+    ojo       TEXT NOT NULL,
+    momento   TEXT NOT NULL,
+    algoritmo TEXT NOT NULL,
+    entradas  TEXT NOT NULL,             -- JSON
+    plan      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_visitas_ojo ON visitas (ojo, momento);
+"""
+
+# Columnas agregadas a `ojos` después de la primera versión del esquema
+_COLUMNAS_NUEVAS = {"lir": "INTEGER", "hemorragia_nueva": "INTEGER"}
+
+
+class FichaOjo(NamedTuple):
+    ojo: str
+    tipo_paciente: Optional[str]
+    intervalo_actual: Optional[str]
+    semana: Optional[int]
+    gmc_basal: Optional[float]
+    avmc_basal: Optional[int]
+    avmc_mejor: Optional[int]
+    gmc_sem16: Optional[float]
+    gmc_min_hist: Optional[float]
+    gmc_actual: Optional[float]
+    avmc_actual: Optional[int]
+    lsr_micras: Optional[float]
+    lir: Optional[bool]
+    hemorragia_nueva: Optional[bool]
+    visitas: int
+    actualizado: str
+
+
+_CAMPOS = ", ".join(FichaOjo._fields)
+_LEER = f"SELECT {_CAMPOS} FROM ojos WHERE ojo = ?"
+_GUARDAR = f"INSERT OR REPLACE INTO ojos ({_CAMPOS}) VALUES ({', '.join('?' * len(FichaOjo._fields))})"
+_INSERTAR_VISITA = "INSERT INTO visitas (ojo, momento, algoritmo, entradas, plan) VALUES (?, ?, ?, ?, ?)"
+_ULTIMAS_VISITAS = (
+    "SELECT momento, algoritmo, entradas, plan FROM visitas WHERE ojo = ? ORDER BY momento DESC LIMIT ?"
+)
+
+
+def _conectar(ruta):
+    # check_same_thread=False: la conexión vuelve al pool y la usa otro hilo,
+    # pero nunca dos a la vez
+    conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False, cached_statements=32)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+
+class PoolConexiones:
+    """
+    Hasta `tamano` conexiones abiertas; se crean a demanda y se reutilizan.
+    Si están todas en uso se espera hasta `espera_s` segundos por una libre.
+    """
+
+    def __init__(self, ruta, tamano=8, espera_s=30):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.espera_s = espera_s
+        self._libres = queue.LifoQueue()
+        self._abiertas = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def conexion(self):
+        try:
+            conexion = self._libres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                crear = self._abiertas < self.tamano
+                if crear:
+                    self._abiertas += 1
+            if crear:
+                try:
+                    conexion = _conectar(self.ruta)
+                except sqlite3.Error:
+                    with self._lock:
+                        self._abiertas -= 1
+                    raise
+            else:
+                try:
+                    conexion = self._libres.get(timeout=self.espera_s)
+                except queue.Empty:
+                    # Como un "database is locked": las páginas ya atrapan sqlite3.Error
+                    raise sqlite3.OperationalError(
+                        f"Sin conexiones libres en el pool ({self.tamano}) tras {self.espera_s} s de espera"
+                    ) from None
+        try:
+            yield conexion
+        finally:
+            if conexion.in_transaction:
+                conexion.rollback()
+            self._libres.put(conexion)
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _actualizar_ficha(ojo, previa, entradas, momento):
+    """Ficha tras una visita: basales de la primera, últimos valores y mínimos/máximos."""
+    gmc, avmc = float(entradas["gmc_actual"]), int(entradas["avmc_actual"])
+
+    def dato(campo):
+        valor = entradas.get(campo)
+        return getattr(previa, campo, None) if valor is None else valor
+
+    semana = dato("semana")
+    gmc_sem16 = dato("gmc_sem16")
+    if gmc_sem16 is None and semana in SEMANAS_ANCLA_SEM16:
+        gmc_sem16 = gmc
+    mejor = dato("avmc_mejor")
+    minimo = dato("gmc_min_hist")
+    return FichaOjo(
+        ojo=ojo,
+        tipo_paciente=dato("tipo_paciente"),
+        intervalo_actual=dato("intervalo_actual"),
+        semana=semana,
+        # Sin basal en el formulario (DMRE) ni guardada: la primera visita
+        gmc_basal=dato("gmc_basal") if dato("gmc_basal") is not None else gmc,
+        avmc_basal=dato("avmc_basal") if dato("avmc_basal") is not None else avmc,
+        avmc_mejor=avmc if mejor is None else max(mejor, avmc),
+        gmc_sem16=gmc_sem16,
+        gmc_min_hist=gmc if minimo is None else min(minimo, gmc),
+        gmc_actual=gmc,
+        avmc_actual=avmc,
+        lsr_micras=dato("lsr_micras"),
+        lir=dato("lir"),
+        hemorragia_nueva=dato("hemorragia_nueva"),
+        visitas=(previa.visitas if previa else 0) + 1,
+        actualizado=momento,
+    )
+
+
+class AlmacenPacientes:
+    """Fichas por ojo con pool de conexiones y caché de lectura."""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, tamano_pool=8, tamano_cache=4096):
+        self.ruta = ruta
+        with sqlite3.connect(ruta, timeout=30) as conexion:
+            conexion.executescript(_ESQUEMA)
+            existentes = {fila[1] for fila in conexion.execute("PRAGMA table_info(ojos)")}
+            for columna, tipo in _COLUMNAS_NUEVAS.items():
+                if columna not in existentes:
+                    conexion.execute(f"ALTER TABLE ojos ADD COLUMN {columna} {tipo}")
+        conexion.close()
+        self._pool = PoolConexiones(ruta, tamano_pool)
+        self.cache = CacheLRU(tamano_cache)
+
+    def _leer(self, ojo):
+        with self._pool.conexion() as conexion:
+            fila = conexion.execute(_LEER, (ojo,)).fetchone()
+        return None if fila is None else FichaOjo(*fila)
+
+    def ficha(self, ojo):
+        """Ficha del ojo, o None si no hay visitas guardadas. Pasa por la caché."""
+        return self.cache.obtener_o_calcular(ojo, lambda: self._leer(ojo))
+
+    def guardar_visita(self, ojo, algoritmo, entradas, plan):
+        """
+        Anexa una visita (las entradas del formulario y el plan) y actualiza la
+        ficha del ojo en una sola transacción. Volver a enviar la misma visita
+        (mismo algoritmo, entradas y plan que la última, el mismo día) no la
+        anexa otra vez ni suma visitas.
+        Devuelve: la ficha actualizada.
+        """
+        momento = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        texto = json.dumps(entradas, ensure_ascii=False, default=str)
+        with self._pool.conexion() as conexion:
+            # IMMEDIATE: la lectura de la ficha y su reescritura no se intercalan
+            # con otra sesión guardando el mismo ojo
+            conexion.execute("BEGIN IMMEDIATE")
+            fila = conexion.execute(_LEER, (ojo,)).fetchone()
+            previa = None if fila is None else FichaOjo(*fila)
+            ultima = conexion.execute(_ULTIMAS_VISITAS, (ojo, 1)).fetchone()
+            if ultima is not None and ultima[0][:10] == momento[:10] and ultima[1:] == (algoritmo, texto, plan):
+                conexion.rollback()
+                return previa
+            ficha = _actualizar_ficha(ojo, previa, entradas, momento)
+            conexion.execute(_GUARDAR, ficha)
+            conexion.execute(_INSERTAR_VISITA, (ojo, momento, algoritmo, texto, plan))
+            conexion.commit()
+        self.cache.invalidar(ojo)
+        return ficha
+
+    def ultimas_visitas(self, ojo, limite=10):
+        """Visitas guardadas del ojo, de la más reciente a la más antigua."""
+        with self._pool.conexion() as conexion:
+            filas = conexion.execute(_ULTIMAS_VISITAS, (ojo, limite)).fetchall()
+        return [
+            {"momento": m, "algoritmo": a, "entradas": json.loads(e), "plan": p}
+            for m, a, e, p in filas
+        ]
+
+    def cerrar(self):
+        self._pool.cerrar()
+
+
+def valor_inicial(ficha, campo, por_defecto):
+    """Valor de la ficha para un widget (con el tipo de `por_defecto`), o el valor por defecto."""
+    valor = None if ficha is None else getattr(ficha, campo)
+    return por_defecto if valor is None else type(por_defecto)(valor)
+
+
+def valor_requerido(paciente, ficha, campo, por_defecto):
+    """
+    Como `valor_inicial`, para los datos clínicos que se guardan en la ficha
+    (basales y mediciones). Con un paciente identificado, el valor sale sólo de
+    su ficha: si no está (paciente nuevo) el widget arranca vacío (None) y hay
+    que ingresarlo, en lugar de guardar el valor de ejemplo como basal.
+    """
+    if not paciente:
+        return por_defecto
+    valor = None if ficha is None else getattr(ficha, campo)
+    return None if valor is None else type(por_defecto)(valor)
+
+
+def indice_inicial(ficha, campo, opciones, por_defecto=0):
+    """Índice de la opción guardada en la ficha, para radio/selectbox."""
+    valor = None if ficha is None else getattr(ficha, campo)
+    return opciones.index(valor) if valor in opciones else por_defecto
+
+
+_ALMACEN = None
+_LOCK = threading.Lock()
+
+
+def almacen_pacientes():
+    """Almacén compartido por todo el proceso (se crea al primer uso)."""
+    global _ALMACEN
+    with _LOCK:
+        if _ALMACEN is None:
+            _ALMACEN = AlmacenPacientes()
+        return _ALMACEN
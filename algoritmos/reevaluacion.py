@@ -0,0 +1,101 @@
+"""
+Re-puntuación incremental de un registro cuando cambian los umbrales.
+
+Un cambio de umbral sólo puede alterar el plan de las visitas cuyo valor cae
+entre el corte anterior y el nuevo: fuera de ese rango todas las comparaciones
+dan lo mismo con ambos cortes. `RegistroPuntuado` guarda, para cada columna
+que se compara con un umbral, el orden de las visitas según ese valor; con dos
+búsquedas binarias obtiene las afectadas y sólo vuelve a evaluar esas.
+"""
+import numpy as np
+import pandas as pd
+
+from .cohorte import argumentos_dmre, argumentos_emd
+from .lote import algoritmo_dmre_lote, algoritmo_emd_lote
+from .resultados import TEXTOS
+from .umbrales import VERSIONES, cortes
+
+
+class RegistroPuntuado:
+    """
+    Visitas puntuadas con una versión de umbrales, listas para re-puntuarse.
+    `visitas` es un DataFrame con las columnas de COLUMNAS_EMD / COLUMNAS_DMRE;
+    `version` (VersionUmbrales) es por defecto la vigente.
+    """
+
+    def __init__(self, algoritmo, visitas, version=None):
+        if algoritmo not in ("emd", "dmre"):
+            raise ValueError(f"Algoritmo desconocido: {algoritmo!r} (usar 'emd' o 'dmre')")
+        self.algoritmo = algoritmo
+        self.etiquetas = visitas.index
+        self.version = version = version or VERSIONES[-1]
+        self.umbrales = getattr(version, algoritmo)
+        args = argumentos_emd(visitas) if algoritmo == "emd" else argumentos_dmre(visitas)
+        self._argumentos = args
+
+        plan, just, valores = self._evaluar(args, self.umbrales)
+        self.plan = plan
+        self.justificacion = just
+
+        # Índices ordenados: (valores ordenados, posición de cada uno). Los NaN
+        # (basal/referencia no válidos) quedan al final y nunca caen en un rango.
+        self._indices = {}
+        for columna, v in valores.items():
+            orden = np.argsort(v, kind="stable")
+            self._indices[columna] = (v[orden], orden)
+
+    def _evaluar(self, args, umbrales):
+        """Evalúa filas y devuelve (plan, justificación, columnas indexables)."""
+        if self.algoritmo == "emd":
+            plan, just, cambio_gmc, _ = algoritmo_emd_lote(*args, umbrales=umbrales)
+            return plan, just, {"gmc_actual": np.asarray(args[3], dtype=float), "cambio_gmc": cambio_gmc}
+        r = algoritmo_dmre_lote(*args, umbrales=umbrales)
+        valores = {"lsr_micras": np.asarray(args[3], dtype=float)}
+        for campo in ("delta_vs_basal_letras", "delta_vs_mejor_letras", "delta_gmc_vs_sem16", "delta_gmc_vs_min"):
+            valores[campo] = r[campo]
+        return r["plan"], r["justificacion"], valores
+
+    def afectadas(self, umbrales):
+        """Posiciones de las visitas cuyo valor cae entre un corte actual y su nuevo valor."""
+        anteriores = cortes(self.umbrales)
+        partes = []
+        for columna, nuevos in cortes(umbrales).items():
+            ordenados, orden = self._indices[columna]
+            for viejo, nuevo in zip(anteriores[columna], nuevos):
+                if viejo == nuevo:
+                    continue
+                lo = np.searchsorted(ordenados, min(viejo, nuevo), side="left")
+                hi = np.searchsorted(ordenados, max(viejo, nuevo), side="right")
+                partes.append(orden[lo:hi])
+        if not partes:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(partes))
+
+    def cambiar_umbrales(self, version):
+        """
+        Pasa el registro a otra versión de umbrales re-evaluando sólo las visitas
+        afectadas. Costo proporcional al número de afectadas (más O(log n) por corte).
+        Devuelve: DataFrame con las visitas cuyo plan cambió (índice = el de `visitas`),
+        columnas plan_anterior, plan_nuevo y justificacion_nueva.
+        """
+        umbrales = getattr(version, self.algoritmo)
+        filas = self.afectadas(umbrales)
+        plan_anterior = self.plan[filas]
+
+        plan, just, _ = self._evaluar([np.asarray(a)[filas] for a in self._argumentos], umbrales)
+        self.plan[filas] = plan
+        self.justificacion[filas] = just
+        self.version = version
+        self.umbrales = umbrales
+
+        cambio = plan != plan_anterior
+        planes = np.asarray(TEXTOS[f"plan_{self.algoritmo}"], dtype=object)
+        justificaciones = np.asarray(TEXTOS[f"justificacion_{self.algoritmo}"], dtype=object)
+        return pd.DataFrame(
+            {
+                "plan_anterior": planes[plan_anterior[cambio]],
+                "plan_nuevo": planes[plan[cambio]],
+                "justificacion_nueva": justificaciones[just[cambio]],
+            },
+            index=self.etiquetas[filas[cambio]],
+        )
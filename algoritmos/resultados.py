@@ -0,0 +1,233 @@
+"""
+Resultados compactos de los algoritmos EMD y DMRE.
+
+En lugar de textos largos (y, en DMRE, un dict con una lista de motivos), cada
+resultado guarda códigos enteros pequeños y los deltas numéricos en un objeto
+con `__slots__`. Los textos viven una sola vez en TEXTOS (internados) y se
+resuelven al mostrar o exportar. `como_tupla()` reproduce exactamente la salida
+de `algoritmo_emd` / `algoritmo_dmre`. Las justificaciones EMD y los motivos
+DMRE citan umbrales, así que cada resultado guarda también los umbrales con los
+que se evaluó.
+"""
+import sys
+
+from .dmre import (
+    JUSTIFICACIONES_DMRE,
+    MOTIVO_GMC_MIN,
+    MOTIVO_GMC_SEM16,
+    PLANES_DMRE,
+    algoritmo_dmre,
+    criterio_motivo,
+    motivos_fijos,
+)
+from .emd import PLANES_EMD, algoritmo_emd, codigo_justificacion, justificaciones_emd
+from .umbrales import vigentes
+
+
+def _internar(textos):
+    return tuple(sys.intern(t) for t in textos)
+
+
+# Tabla única de textos visibles: el código es el índice dentro de cada categoría
+TEXTOS = {
+    "plan_emd": _internar(PLANES_EMD),
+    # Justificaciones EMD y motivos fijos DMRE con los umbrales vigentes
+    "justificacion_emd": justificaciones_emd(vigentes("emd")),
+    "plan_dmre": _internar(PLANES_DMRE),
+    "justificacion_dmre": _internar(JUSTIFICACIONES_DMRE),
+    "motivo_dmre": motivos_fijos(vigentes("dmre")),
+}
+
+_CODIGOS = {categoria: {t: i for i, t in enumerate(textos)} for categoria, textos in TEXTOS.items()}
+
+
+def texto(categoria, codigo):
+    """Texto visible de un código, p. ej. texto("plan_emd", 2) → "Cambiar a Ozurdex"."""
+    return TEXTOS[categoria][codigo]
+
+
+def codigo(categoria, texto_visible):
+    """Código de un texto visible (inverso de `texto`)."""
+    return _CODIGOS[categoria][texto_visible]
+
+
+# Banderas de actividad DMRE (bits de ResultadoDMRE.banderas)
+BANDERA_LIQUIDO = 1
+BANDERA_VISION = 2
+BANDERA_HEMORRAGIA = 4
+BANDERA_GMC_SEM16 = 8
+BANDERA_GMC_MIN = 16
+
+
+def motivos_desde_banderas(banderas, delta_gmc_vs_sem16, delta_gmc_vs_min, umbrales=None):
+    """
+    Lista de motivos legibles, con el mismo texto que detalle["motivos"].
+    `umbrales`: los usados al evaluar (por defecto, los vigentes).
+    """
+    u = umbrales or vigentes("dmre")
+    fijos = motivos_fijos(u)
+    motivos = []
+    if banderas & BANDERA_LIQUIDO:
+        motivos.append(fijos[0])
+    if banderas & BANDERA_VISION:
+        motivos.append(fijos[1])
+    if banderas & BANDERA_HEMORRAGIA:
+        motivos.append(fijos[2])
+
+    motivos_gmc = []
+    if banderas & BANDERA_GMC_SEM16:
+        motivos_gmc.append(MOTIVO_GMC_SEM16.format(delta=delta_gmc_vs_sem16, u=u))
+    if banderas & BANDERA_GMC_MIN:
+        motivos_gmc.append(MOTIVO_GMC_MIN.format(delta=delta_gmc_vs_min, u=u))
+    if motivos_gmc:
+        motivos.append("Actividad por GMC: " + "; ".join(motivos_gmc))
+    return motivos
+
+
+class ResultadoEMD:
+    """
+    Resultado EMD compacto: códigos de plan/justificación y cambios de GMC/AVMC.
+    `umbrales` (None = vigentes) es una referencia al UmbralesEMD compartido.
+    """
+
+    __slots__ = ("plan", "justificacion", "cambio_gmc", "cambio_av", "umbrales")
+
+    def __init__(self, plan, justificacion, cambio_gmc, cambio_av, umbrales=None):
+        self.plan = plan
+        self.justificacion = justificacion
+        self.cambio_gmc = cambio_gmc
+        self.cambio_av = cambio_av
+        self.umbrales = umbrales
+
+    @classmethod
+    def desde_textos(cls, plan, justificacion, cambio_gmc, cambio_av, umbrales=None):
+        """Codifica la tupla que devuelve `algoritmo_emd` (evaluada con `umbrales`)."""
+        return cls(
+            codigo("plan_emd", plan), codigo_justificacion(justificacion, umbrales),
+            cambio_gmc, cambio_av, umbrales,
+        )
+
+    @property
+    def plan_texto(self):
+        return TEXTOS["plan_emd"][self.plan]
+
+    @property
+    def justificacion_texto(self):
+        return justificaciones_emd(self.umbrales or vigentes("emd"))[self.justificacion]
+
+    def como_tupla(self):
+        """Devuelve: (plan, justificación, cambio_gmc, cambio_av), como `algoritmo_emd`."""
+        return self.plan_texto, self.justificacion_texto, self.cambio_gmc, self.cambio_av
+
+    def __repr__(self):
+        return f"ResultadoEMD({self.plan_texto!r}, cambio_gmc={self.cambio_gmc}, cambio_av={self.cambio_av})"
+
+
+class ResultadoDMRE:
+    """
+    Resultado DMRE compacto: códigos, banderas de actividad (bits) y deltas.
+    `umbrales` (None = vigentes) es una referencia al UmbralesDMRE compartido.
+    """
+
+    __slots__ = (
+        "plan", "justificacion", "banderas", "tipo_paciente",
+        "delta_vs_basal_letras", "delta_vs_mejor_letras",
+        "delta_gmc_vs_sem16", "delta_gmc_vs_min", "umbrales",
+    )
+
+    def __init__(
+        self, plan, justificacion, banderas, tipo_paciente,
+        delta_vs_basal_letras, delta_vs_mejor_letras, delta_gmc_vs_sem16, delta_gmc_vs_min,
+        umbrales=None,
+    ):
+        self.plan = plan
+        self.justificacion = justificacion
+        self.banderas = banderas
+        self.tipo_paciente = tipo_paciente
+        self.delta_vs_basal_letras = delta_vs_basal_letras
+        self.delta_vs_mejor_letras = delta_vs_mejor_letras
+        self.delta_gmc_vs_sem16 = delta_gmc_vs_sem16
+        self.delta_gmc_vs_min = delta_gmc_vs_min
+        self.umbrales = umbrales
+
+    @classmethod
+    def desde_textos(cls, plan, justificacion, detalle, umbrales=None):
+        """Codifica la tupla que devuelve `algoritmo_dmre` (evaluada con `umbrales`)."""
+        banderas = 0
+        for motivo in detalle["motivos"]:
+            criterio = criterio_motivo(motivo)
+            if criterio is not None:
+                banderas |= (BANDERA_LIQUIDO, BANDERA_VISION, BANDERA_HEMORRAGIA)[criterio]
+            else:
+                if "semana 16" in motivo:
+                    banderas |= BANDERA_GMC_SEM16
+                if "mínimo histórico" in motivo:
+                    banderas |= BANDERA_GMC_MIN
+        return cls(
+            codigo("plan_dmre", plan), codigo("justificacion_dmre", justificacion), banderas,
+            detalle["tipo_paciente"], detalle["delta_vs_basal_letras"], detalle["delta_vs_mejor_letras"],
+            detalle["delta_gmc_vs_sem16"], detalle["delta_gmc_vs_min"], umbrales,
+        )
+
+    @classmethod
+    def desde_fila(cls, fila, tipo_paciente, umbrales=None):
+        """Convierte una fila de `algoritmo_dmre_lote` evaluada con `umbrales` (NaN en los deltas = None)."""
+        banderas = (
+            BANDERA_LIQUIDO * bool(fila["actividad_liquido"])
+            | BANDERA_VISION * bool(fila["actividad_vision"])
+            | BANDERA_HEMORRAGIA * bool(fila["actividad_hemorragia"])
+            | BANDERA_GMC_SEM16 * bool(fila["actividad_gmc_sem16"])
+            | BANDERA_GMC_MIN * bool(fila["actividad_gmc_min"])
+        )
+        delta_sem16 = float(fila["delta_gmc_vs_sem16"])
+        delta_min = float(fila["delta_gmc_vs_min"])
+        return cls(
+            int(fila["plan"]), int(fila["justificacion"]), banderas, tipo_paciente,
+            int(fila["delta_vs_basal_letras"]), int(fila["delta_vs_mejor_letras"]),
+            None if delta_sem16 != delta_sem16 else delta_sem16,
+            None if delta_min != delta_min else delta_min,
+            umbrales,
+        )
+
+    @property
+    def actividad(self):
+        return self.banderas != 0
+
+    @property
+    def plan_texto(self):
+        return TEXTOS["plan_dmre"][self.plan]
+
+    @property
+    def justificacion_texto(self):
+        return TEXTOS["justificacion_dmre"][self.justificacion]
+
+    def motivos(self):
+        return motivos_desde_banderas(
+            self.banderas, self.delta_gmc_vs_sem16, self.delta_gmc_vs_min, self.umbrales,
+        )
+
+    def como_tupla(self):
+        """Devuelve: (plan, justificación, detalle), como `algoritmo_dmre`."""
+        detalle = {
+            "tipo_paciente": self.tipo_paciente,
+            "actividad": self.actividad,
+            "delta_vs_basal_letras": self.delta_vs_basal_letras,
+            "delta_vs_mejor_letras": self.delta_vs_mejor_letras,
+            "delta_gmc_vs_sem16": self.delta_gmc_vs_sem16,
+            "delta_gmc_vs_min": self.delta_gmc_vs_min,
+            "motivos": self.motivos(),
+        }
+        return self.plan_texto, self.justificacion_texto, detalle
+
+    def __repr__(self):
+        return f"ResultadoDMRE({self.plan_texto!r}, banderas={self.banderas:05b})"
+
+
+def evaluar_emd(*args, umbrales=None, **kwargs):
+    """`algoritmo_emd` con resultado compacto (ResultadoEMD)."""
+    return ResultadoEMD.desde_textos(*algoritmo_emd(*args, umbrales=umbrales, **kwargs), umbrales)
+
+
+def evaluar_dmre(*args, umbrales=None, **kwargs):
+    """`algoritmo_dmre` con resultado compacto (ResultadoDMRE)."""
+    return ResultadoDMRE.desde_textos(*algoritmo_dmre(*args, umbrales=umbrales, **kwargs), umbrales)
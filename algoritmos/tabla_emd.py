@@ -0,0 +1,229 @@
+"""
+Tabla de decisión precompilada para el algoritmo EMD.
+
+Todas las reglas de `algoritmo_emd` son comparaciones contra umbrales fijos:
+semana < 12, GMC ≤ 325 / ≥ 400 y % de cambio de GMC en -10 / +10 / +20 (valores
+del protocolo original; los cortes salen de la versión de umbrales vigente).
+Cada entrada cae entonces en una celda (tipo, fase de carga, zona de GMC,
+zona de % de cambio) y todas las entradas de una misma celda reciben la misma
+decisión. La tabla se compila una sola vez evaluando `algoritmo_emd` en un punto
+representativo de cada celda; decidir es buscar la zona con `bisect` /
+`np.searchsorted` e indexar la tabla. Con otros umbrales (`umbrales=`) se
+compila, una vez, la tabla de esa versión.
+
+Verificación contra la función de referencia:
+    python -m algoritmos.tabla_emd --verificar
+"""
+import argparse
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from .emd import PLANES_EMD, algoritmo_emd, justificaciones_emd
+from .umbrales import version, vigentes
+
+# Sin la envoltura de métricas, para que compilar/verificar no cuente como tráfico
+_algoritmo_emd = getattr(algoritmo_emd, "__wrapped__", algoritmo_emd)
+
+TIPOS = ("Naive", "Previo")      # cualquier otro valor → índice 2
+
+# Todos los cortes se expresan como "x ≥ corte → zona siguiente" (bisect_right).
+# Las desigualdades estrictas (x > 325, x > 10) usan el siguiente float representable.
+CORTES_SEMANA = [12]
+
+
+def cortes_gmc(u):
+    return [math.nextafter(u.gmc_switch, math.inf), u.gmc_ozurdex]
+
+
+def cortes_cambio(u):
+    return [-u.cambio_estable, math.nextafter(u.cambio_estable, math.inf), u.cambio_aumento]
+
+
+# Zonas adicionales fuera de los cortes (2 cortes de GMC → zonas 0-2; 3 de cambio → 0-3)
+ZONA_GMC_NAN = 3
+ZONA_CAMBIO_SIN_BASAL = 4     # GMC basal ≤ 0 (cambio None)
+ZONA_CAMBIO_NAN = 5
+
+# Puntos representativos de cada zona para compilar la tabla
+_SEMANA_REPR = (0, 12)
+
+
+def _gmc_repr(u):
+    return (u.gmc_switch - 25, (u.gmc_switch + u.gmc_ozurdex) / 2, u.gmc_ozurdex + 50, math.nan)
+
+
+def _cambio_repr(u):
+    return ((-100 - u.cambio_estable) / 2, 0.0, (u.cambio_estable + u.cambio_aumento) / 2, u.cambio_aumento + 30)
+
+
+def compilar_tabla_emd(umbrales=None):
+    """
+    Evalúa `algoritmo_emd` una vez por celda (con `umbrales`, por defecto los vigentes).
+    Devuelve: array int8 de forma (tipo, carga, zona_gmc, zona_cambio, 2),
+    con (código de plan, código de justificación) en la última dimensión.
+    """
+    u = umbrales or vigentes("emd")
+    plan_cod = {texto: i for i, texto in enumerate(PLANES_EMD)}
+    just_cod = {texto: i for i, texto in enumerate(justificaciones_emd(u))}
+    tipos = TIPOS + ("Otro",)
+    gmc_repr = _gmc_repr(u)
+
+    tabla = np.empty(
+        (len(tipos), len(_SEMANA_REPR), len(gmc_repr), ZONA_CAMBIO_NAN + 1, 2),
+        dtype=np.int8,
+    )
+    for (t, tipo), (s, semana), (g, gmc_actual) in product(
+        enumerate(tipos), enumerate(_SEMANA_REPR), enumerate(gmc_repr)
+    ):
+        basales = [gmc_actual / (1 + c / 100) for c in _cambio_repr(u)]
+        basales += [0.0, math.nan]       # sin basal, cambio NaN
+        for z, gmc_basal in enumerate(basales):
+            plan, just, _, _ = _algoritmo_emd(tipo, semana, "", gmc_basal, gmc_actual, 0, 0, umbrales=u)
+            tabla[t, s, g, z] = plan_cod[plan], just_cod[just]
+    return tabla
+
+
+_N_ZONAS_CAMBIO = ZONA_CAMBIO_NAN + 1
+
+
+@lru_cache(maxsize=8)
+def _compilada(u):
+    """(cortes de GMC, cortes de cambio, tabla, tabla escalar) para un juego de umbrales."""
+    tabla = compilar_tabla_emd(u)
+    justificaciones = justificaciones_emd(u)
+    # Para la búsqueda escalar: (tipo, semana < 12) → tabla plana por zona_gmc × zona_cambio,
+    # con los textos ya resueltos, sin pasar por NumPy.
+    escalar = {
+        (tipo, carga): [
+            (PLANES_EMD[p], justificaciones[j])
+            for p, j in tabla[t, s].reshape(-1, 2).tolist()
+        ]
+        for t, tipo in enumerate(TIPOS + (None,))
+        for s, carga in enumerate((True, False))
+    }
+    return cortes_gmc(u), cortes_cambio(u), tabla, escalar
+
+
+CORTES_GMC, CORTES_CAMBIO, TABLA_EMD, _ = _compilada(vigentes("emd"))
+
+
+def decidir_emd(
+    tipo_paciente: str,
+    semana: int,
+    intervalo_actual: str,
+    gmc_basal: float,
+    gmc_actual: float,
+    avmc_basal: int,
+    avmc_actual: int,
+    umbrales=None,
+):
+    """
+    Misma firma y mismo resultado que `algoritmo_emd`, resuelto por tabla.
+    Devuelve: (plan, justificación, cambio_gmc, cambio_av)
+    """
+    cortes_gmc_u, cortes_cambio_u, _, tabla_escalar = _compilada(umbrales or vigentes("emd"))
+    cambio_gmc = None if gmc_basal <= 0 else (gmc_actual - gmc_basal) / gmc_basal * 100
+    cambio_av = avmc_actual - avmc_basal
+
+    if cambio_gmc is None:
+        z = ZONA_CAMBIO_SIN_BASAL
+    elif cambio_gmc != cambio_gmc:
+        z = ZONA_CAMBIO_NAN
+    else:
+        z = bisect_right(cortes_cambio_u, cambio_gmc)
+    g = ZONA_GMC_NAN if gmc_actual != gmc_actual else bisect_right(cortes_gmc_u, gmc_actual)
+
+    tabla = tabla_escalar[tipo_paciente if tipo_paciente in TIPOS else None, semana < 12]
+    plan, just = tabla[g * _N_ZONAS_CAMBIO + z]
+    return plan, just, cambio_gmc, cambio_av
+
+
+def decidir_emd_lote(
+    tipo_paciente,
+    semana,
+    gmc_basal,
+    gmc_actual,
+    avmc_basal,
+    avmc_actual,
+    umbrales=None,
+):
+    """
+    Misma firma y mismo resultado que `algoritmo_emd_lote`, resuelto por tabla
+    con `np.searchsorted`.
+    Devuelve: (plan_cod, justificacion_cod, cambio_gmc, cambio_av)
+    """
+    cortes_gmc_u, cortes_cambio_u, tabla, _ = _compilada(umbrales or vigentes("emd"))
+    tipo_paciente = np.asarray(tipo_paciente)
+    gmc_basal = np.asarray(gmc_basal, dtype=float)
+    gmc_actual = np.asarray(gmc_actual, dtype=float)
+
+    sin_basal = gmc_basal <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cambio_gmc = (gmc_actual - gmc_basal) / gmc_basal * 100
+    cambio_gmc[sin_basal] = np.nan
+    cambio_av = np.asarray(avmc_actual) - np.asarray(avmc_basal)
+
+    t = np.where(tipo_paciente == TIPOS[0], 0, np.where(tipo_paciente == TIPOS[1], 1, 2))
+    s = np.searchsorted(CORTES_SEMANA, semana, side="right")
+    g = np.searchsorted(cortes_gmc_u, gmc_actual, side="right")
+    g[np.isnan(gmc_actual)] = ZONA_GMC_NAN
+    z = np.searchsorted(cortes_cambio_u, cambio_gmc, side="right")
+    z[np.isnan(cambio_gmc)] = ZONA_CAMBIO_NAN
+    z[sin_basal] = ZONA_CAMBIO_SIN_BASAL
+
+    decision = tabla[t, s, g, z]
+    return decision[:, 0], decision[:, 1], cambio_gmc, cambio_av
+
+
+def verificar_tabla_emd(semanas=(0, 11, 12, 13, 200), gmc=range(0, 1201), tipos=TIPOS, umbrales=None):
+    """
+    Compara `decidir_emd` con `algoritmo_emd` (con `umbrales`, por defecto los
+    vigentes) en todo el dominio de la interfaz
+    (GMC basal × GMC actual en pasos de 1 µm, para cada tipo y semana indicados).
+    La AVMC no participa en las reglas, sólo en cambio_av, y se fija en 60 → 65.
+    Devuelve: (combinaciones evaluadas, lista de discrepancias)
+    """
+    evaluadas = 0
+    discrepancias = []
+    gmc = [float(v) for v in gmc]
+    for tipo, semana, gmc_basal, gmc_actual in product(tipos, semanas, gmc, gmc):
+        esperado = _algoritmo_emd(tipo, semana, "", gmc_basal, gmc_actual, 60, 65, umbrales=umbrales)
+        obtenido = decidir_emd(tipo, semana, "", gmc_basal, gmc_actual, 60, 65, umbrales=umbrales)
+        evaluadas += 1
+        if esperado != obtenido:
+            discrepancias.append(((tipo, semana, gmc_basal, gmc_actual), esperado, obtenido))
+    return evaluadas, discrepancias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tabla de decisión precompilada EMD.")
+    parser.add_argument("--verificar", action="store_true", help="Comparar con algoritmo_emd")
+    parser.add_argument(
+        "--todas-las-semanas", action="store_true",
+        help="Verificar las semanas 0-200 completas (por defecto sólo las de frontera)",
+    )
+    parser.add_argument("--version-umbrales", help="Versión de umbrales (por defecto, la vigente)")
+    args = parser.parse_args(argv)
+
+    if not args.verificar:
+        parser.print_help()
+        return
+    semanas = range(0, 201) if args.todas_las_semanas else (0, 11, 12, 13, 200)
+    try:
+        umbrales = version(args.version_umbrales).emd
+    except KeyError as e:
+        parser.error(e.args[0])
+    evaluadas, discrepancias = verificar_tabla_emd(semanas=semanas, umbrales=umbrales)
+    print(f"{evaluadas} combinaciones evaluadas, {len(discrepancias)} discrepancias")
+    for entrada, esperado, obtenido in discrepancias[:10]:
+        print(f"  {entrada}: esperado {esperado[:2]}, obtenido {obtenido[:2]}")
+    if discrepancias:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
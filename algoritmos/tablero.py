@@ -0,0 +1,330 @@
+"""
+Agregados de la cohorte para el tablero de resultados: cuántas visitas acaban
+en cada plan, por tipo de paciente, por intervalo actual y por mes.
+
+Los contadores se actualizan al puntuar cada visita (`registrar`) o cada lote
+(`registrar_lote`), nunca recorriendo las visitas al leer: el tablero sólo
+consulta tablas ya sumadas, cuyo tamaño depende del número de grupos y no del
+tamaño del registro. Además de cada celda (tipo, intervalo, mes) se mantienen
+los totales por dimensión, así que leer una agrupación es una búsqueda directa.
+
+Se cuentan visitas, no pulsaciones: en la app, una visita es un paciente con
+unas entradas en un día (UTC); repetir el cálculo con los mismos datos no suma
+(`registrar_visita`). Los lotes de `puntuar_cohorte.py` se guardan ya sumados
+en una base propia del tablero (tabla `conteos_lote`), una vez por archivo de
+entrada: volver a puntuar el mismo archivo reemplaza sus conteos. El registro
+de auditoría no se toca: es de sólo anexado y sólo se lee.
+
+Al crearse, el agregado compartido (`agregados_cohorte`) se inicializa una vez
+con el registro de auditoría y la base del tablero (consultas agrupadas en
+SQLite) y desde ahí crece con cada visita que puntúan las páginas.
+
+La ruta de la base del tablero se configura con ALGORITMOS_TABLERO
+(por defecto, tablero.sqlite3 en el directorio de trabajo).
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .resultados import TEXTOS, codigo
+
+RUTA_POR_DEFECTO = os.environ.get("ALGORITMOS_TABLERO", "tablero.sqlite3")
+
+DIMENSIONES = ("tipo_paciente", "intervalo_actual", "mes")
+SIN_DATO = "N/D"             # grupo de las visitas sin tipo, intervalo o fecha válidos
+SIN_INTERVALO = SIN_DATO     # lotes EMD sin columna intervalo_actual
+
+_ESQUEMA_LOTE = """
+CREATE TABLE IF NOT EXISTS conteos_lote (
+    origen           TEXT NOT NULL,       -- archivo de entrada (ruta absoluta)
+    algoritmo        TEXT NOT NULL,
+    tipo_paciente    TEXT NOT NULL,
+    intervalo_actual TEXT NOT NULL,
+    mes              TEXT NOT NULL,       -- AAAA-MM
+    plan             TEXT NOT NULL,
+    visitas          INTEGER NOT NULL,
+    momento          TEXT NOT NULL,       -- ISO 8601, UTC, de la puntuación
+    PRIMARY KEY (origen, algoritmo, tipo_paciente, intervalo_actual, mes, plan)
+);
+"""
+
+# Categorías que muestra el tablero y categoría de cada código de plan
+CATEGORIAS = ("Extender", "Mantener", "Acortar", "Switch", "Ozurdex", "Carga", "Otro")
+_CATEGORIA_PLAN = {
+    # carga, switch, Ozurdex, revisar, mantener, −4, −8, mantener y reevaluar, Q8W, Q4W, sin decisión
+    "emd": np.array([5, 3, 4, 6, 1, 2, 2, 1, 0, 1, 6]),
+    # Q8W, Q12W, Q16W, mantener Q16W, acortar Q8W, acortar Q12W, mantener y reevaluar
+    # (posible switch: aún no se cambia), considerar switch
+    "dmre": np.array([0, 0, 0, 1, 2, 2, 1, 3]),
+}
+
+
+def _mes(fecha):
+    """date/datetime/Timestamp o texto ISO → "AAAA-MM"; None = mes actual (UTC)."""
+    if fecha is None:
+        fecha = datetime.now(timezone.utc)
+    if isinstance(fecha, str):
+        return fecha[:7]
+    return f"{fecha.year:04d}-{fecha.month:02d}"
+
+
+def _intervalo(intervalo):
+    """"Q8W" u 8 → "Q8W"."""
+    return intervalo if isinstance(intervalo, str) else f"Q{int(intervalo)}W"
+
+
+def clave_visita(algoritmo, entradas, paciente=None):
+    """Identidad de una visita en el día: mismo texto de entradas que guarda la auditoría."""
+    return algoritmo, paciente or None, json.dumps(entradas, ensure_ascii=False, default=str)
+
+
+def _hoy():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class AgregadosCohorte:
+    """Contadores de planes por grupo, seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            # (algoritmo, dimensión) → {valor: conteos por código de plan}; dimensión ∈
+            # DIMENSIONES, "celda" (valor = (tipo, intervalo, mes)) o "total" (valor None)
+            self._conteos = {}
+            self.visitas = 0
+            # Visitas ya contadas hoy (clave_visita); se vacía al cambiar de día
+            self._dia = _hoy()
+            self._vistas = set()
+
+    def _sumar(self, algoritmo, tipo_paciente, intervalo, mes, plan, n):
+        # Llamar con el lock tomado
+        for dimension, valor in (
+            ("total", None),
+            ("tipo_paciente", tipo_paciente),
+            ("intervalo_actual", intervalo),
+            ("mes", mes),
+            ("celda", (tipo_paciente, intervalo, mes)),
+        ):
+            grupos = self._conteos.setdefault((algoritmo, dimension), {})
+            conteos = grupos.get(valor)
+            if conteos is None:
+                conteos = grupos[valor] = np.zeros(len(TEXTOS[f"plan_{algoritmo}"]), np.int64)
+            conteos[plan] += n
+        self.visitas += n
+
+    def registrar(self, algoritmo, tipo_paciente, intervalo_actual, plan, fecha=None, n=1):
+        """
+        Suma una visita puntuada. `plan` es el texto que devuelve el evaluador o
+        su código; `fecha` (por defecto, ahora) decide el mes. O(1).
+        """
+        if isinstance(plan, str):
+            plan = codigo(f"plan_{algoritmo}", plan)
+        with self._lock:
+            self._sumar(algoritmo, tipo_paciente, _intervalo(intervalo_actual), _mes(fecha), int(plan), n)
+
+    def registrar_visita(self, algoritmo, entradas, plan, paciente=None):
+        """
+        Suma la visita que muestra una página, salvo que hoy ya se haya contado
+        la misma (paciente y entradas): volver a pulsar no es otra visita.
+        Devuelve True si se contó.
+        """
+        clave = clave_visita(algoritmo, entradas, paciente)
+        with self._lock:
+            hoy = _hoy()
+            if hoy != self._dia:
+                self._dia, self._vistas = hoy, set()
+            if clave in self._vistas:
+                return False
+            self._vistas.add(clave)
+        self.registrar(algoritmo, entradas["tipo_paciente"], entradas["intervalo_actual"], plan)
+        return True
+
+    def registrar_lote(self, algoritmo, tipos_paciente, intervalos_actuales, planes, fechas=None):
+        """
+        Suma un lote de visitas (p. ej. la salida de `puntuar_emd` / `puntuar_dmre`
+        o de las versiones por lotes). Sin `fechas`, todas cuentan en el mes
+        actual; una fecha vacía o ilegible, y un tipo o intervalo vacío, cuentan
+        en el grupo "N/D": ninguna visita puntuada se pierde. Las visitas se
+        agrupan primero por (tipo, intervalo, mes, plan), así que el trabajo bajo
+        el lock es proporcional al número de grupos, no de visitas.
+        """
+        planes = pd.Series(planes)
+        if not pd.api.types.is_numeric_dtype(planes):
+            planes = planes.map({t: i for i, t in enumerate(TEXTOS[f"plan_{algoritmo}"])})
+        if fechas is None:
+            meses = _mes(None)
+        else:
+            meses = pd.to_datetime(pd.Series(np.asarray(fechas)), errors="coerce", format="mixed")
+            meses = meses.dt.strftime("%Y-%m").fillna(SIN_DATO).to_numpy()
+        marco = pd.DataFrame({
+            "tipo": pd.Series(np.asarray(tipos_paciente)).fillna(SIN_DATO).to_numpy(),
+            "intervalo": pd.Series(np.asarray(intervalos_actuales)).fillna(SIN_DATO).to_numpy(),
+            "mes": meses,
+            "plan": planes.to_numpy(),
+        })
+        grupos = marco.groupby(["tipo", "intervalo", "mes", "plan"], sort=False, dropna=False).size()
+        with self._lock:
+            for (tipo, intervalo, mes, plan), n in grupos.items():
+                self._sumar(algoritmo, tipo, _intervalo(intervalo), mes, int(plan), int(n))
+
+    def cargar_auditoria(self, ruta):
+        """
+        Suma las recomendaciones de la app del registro de auditoría (una por
+        paciente, entradas y día, como `registrar_visita`).
+        """
+        if not os.path.exists(ruta):
+            return
+        conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True, timeout=30)
+        try:
+            tablas = {t for (t,) in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            filas, vistas = [], []
+            if "recomendaciones" in tablas:
+                # Visitas distintas: las pulsaciones repetidas del mismo día cuentan una vez
+                filas = conexion.execute(
+                    "SELECT algoritmo, json_extract(entradas, '$.tipo_paciente'), "
+                    "json_extract(entradas, '$.intervalo_actual'), substr(dia, 1, 7), plan, COUNT(*) "
+                    "FROM (SELECT DISTINCT algoritmo, paciente, entradas, substr(momento, 1, 10) AS dia, plan "
+                    "      FROM recomendaciones) GROUP BY 1, 2, 3, 4, 5"
+                ).fetchall()
+                vistas = conexion.execute(
+                    "SELECT DISTINCT algoritmo, paciente, entradas FROM recomendaciones WHERE momento >= ?",
+                    (self._dia,),
+                ).fetchall()
+        finally:
+            conexion.close()
+        with self._lock:
+            self._vistas.update(vistas)
+        self._sumar_filas(filas)
+
+    def cargar_lotes(self, ruta):
+        """Suma los conteos de lotes guardados con `guardar_conteos_lote` en la base del tablero."""
+        if not os.path.exists(ruta):
+            return
+        conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True, timeout=30)
+        try:
+            tablas = {t for (t,) in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            filas = []
+            if "conteos_lote" in tablas:
+                filas = conexion.execute(
+                    "SELECT algoritmo, tipo_paciente, intervalo_actual, mes, plan, SUM(visitas) "
+                    "FROM conteos_lote GROUP BY 1, 2, 3, 4, 5"
+                ).fetchall()
+        finally:
+            conexion.close()
+        self._sumar_filas(filas)
+
+    def _sumar_filas(self, filas):
+        # Filas (algoritmo, tipo, intervalo, mes, texto del plan, n) leídas de SQLite
+        with self._lock:
+            for algoritmo, tipo, intervalo, mes, plan, n in filas:
+                # Filas con planes o algoritmos de otra versión del protocolo: se omiten
+                codigos = {t: i for i, t in enumerate(TEXTOS.get(f"plan_{algoritmo}", ()))}
+                if plan in codigos and tipo is not None and intervalo is not None:
+                    self._sumar(algoritmo, tipo, _intervalo(intervalo), mes, codigos[plan], n)
+
+    def conteos(self, algoritmo, por=None):
+        """
+        Conteos por plan (columnas: textos de los planes) agrupados por una
+        dimensión de DIMENSIONES, por "celda" (tipo, intervalo, mes) o, con
+        `por=None`, el total de la cohorte.
+        """
+        with self._lock:
+            grupos = self._conteos.get((algoritmo, por or "total"), {})
+            filas = {"Total" if valor is None else valor: c.copy() for valor, c in grupos.items()}
+        tabla = pd.DataFrame.from_dict(filas, orient="index", columns=list(TEXTOS[f"plan_{algoritmo}"]))
+        if por == "celda":
+            tabla.index = pd.MultiIndex.from_tuples(tabla.index, names=list(DIMENSIONES))
+        elif por == "intervalo_actual":
+            # Q4W, Q8W, Q12W... por semanas, no alfabéticamente (N/D al final)
+            return tabla.sort_index(key=lambda indice: pd.to_numeric(indice.str[1:-1], errors="coerce"))
+        return tabla.sort_index()
+
+    def distribucion(self, algoritmo, por=None):
+        """
+        Proporción de visitas de cada categoría (Extender, Acortar, Switch,
+        Ozurdex...) por grupo, más la columna "Visitas" con el total del grupo.
+        """
+        tabla = self.conteos(algoritmo, por)
+        categorias = np.zeros((len(tabla), len(CATEGORIAS)), np.int64)
+        np.add.at(categorias.T, _CATEGORIA_PLAN[algoritmo], tabla.to_numpy().T)
+        visitas = categorias.sum(axis=1)
+        proporciones = categorias / np.maximum(visitas, 1)[:, None]
+        salida = pd.DataFrame(proporciones, index=tabla.index, columns=list(CATEGORIAS))
+        salida.insert(0, "Visitas", visitas)
+        return salida
+
+    def celdas(self, algoritmo):
+        """Genera (tipo, intervalo, mes, texto del plan, visitas) de cada celda no vacía."""
+        planes = TEXTOS[f"plan_{algoritmo}"]
+        with self._lock:
+            grupos = {valor: c.copy() for valor, c in self._conteos.get((algoritmo, "celda"), {}).items()}
+        for (tipo, intervalo, mes), conteos in grupos.items():
+            for plan in np.flatnonzero(conteos):
+                yield tipo, intervalo, mes, planes[plan], int(conteos[plan])
+
+
+def guardar_conteos_lote(ruta, origen, algoritmo, agregados):
+    """
+    Guarda en la base del tablero los conteos de un lote puntuado desde
+    `origen` (un archivo). Reemplaza los de una puntuación anterior del mismo
+    archivo y algoritmo, así que repetirla no duplica visitas.
+    """
+    momento = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    filas = [(origen, algoritmo, *celda, momento) for celda in agregados.celdas(algoritmo)]
+    conexion = sqlite3.connect(ruta, timeout=30)
+    try:
+        conexion.executescript(_ESQUEMA_LOTE)
+        with conexion:
+            conexion.execute("DELETE FROM conteos_lote WHERE origen = ? AND algoritmo = ?", (origen, algoritmo))
+            conexion.executemany("INSERT INTO conteos_lote VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+    finally:
+        conexion.close()
+
+
+_AGREGADOS = None
+_LOCK = threading.Lock()
+
+
+def agregados_cohorte():
+    """
+    Agregados compartidos por todo el proceso. Se crean al primer uso,
+    partiendo de la auditoría y de los lotes; las páginas deben sumar cada visita
+    aquí *antes* de encolarla en la auditoría, para no contarla dos veces.
+    """
+    global _AGREGADOS
+    with _LOCK:
+        if _AGREGADOS is None:
+            _AGREGADOS = _cargar()
+        return _AGREGADOS
+
+
+def recargar_agregados():
+    """
+    Vuelve a leer la auditoría y los lotes (p. ej. tras puntuar un lote con
+    `puntuar_cohorte.py` con la app abierta). Escribe antes lo encolado.
+    """
+    global _AGREGADOS
+    from .auditoria import registro_auditoria
+
+    registro_auditoria().vaciar(timeout=10)
+    agregados = _cargar()
+    with _LOCK:
+        _AGREGADOS = agregados
+    return agregados
+
+
+def _cargar():
+    from .auditoria import RUTA_POR_DEFECTO as RUTA_AUDITORIA
+
+    agregados = AgregadosCohorte()
+    agregados.cargar_auditoria(RUTA_AUDITORIA)
+    agregados.cargar_lotes(RUTA_POR_DEFECTO)
+    return agregados
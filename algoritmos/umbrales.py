@@ -0,0 +1,115 @@
+"""
+Umbrales de decisión de los protocolos EMD y DMRE, versionados.
+
+La versión "1" reproduce los valores originales del protocolo (los mismos que
+usan las versiones escalares de `emd.py` / `dmre.py`). El comité puede añadir
+versiones nuevas en un archivo JSON indicado por la variable de entorno
+ALGORITMOS_UMBRALES, con el formato:
+
+    [
+      {"version": "2", "vigente_desde": "2026-01-01", "descripcion": "...",
+       "emd": {"gmc_switch": 310}, "dmre": {"lsr_liquido": 75}}
+    ]
+
+Los campos omitidos heredan el valor de la versión anterior.
+
+La versión vigente (la más reciente) es la que aplican por defecto todas las
+vías de decisión: las versiones escalares y su caché, las versiones por lotes,
+el historial por ojo, el servicio y las herramientas de línea de comandos. Las
+justificaciones EMD y los motivos de actividad DMRE citan los umbrales con los
+que se evaluó, y el registro de auditoría guarda la versión aplicada.
+"""
+import json
+import os
+from typing import NamedTuple
+
+
+class UmbralesEMD(NamedTuple):
+    gmc_switch: float = 325.0          # GMC ≤ → switch (naïve)
+    gmc_ozurdex: float = 400.0         # GMC ≥ → Ozurdex (naïve)
+    cambio_estable: float = 10.0       # |cambio GMC| ≤ → estable (%)
+    cambio_aumento: float = 20.0       # cambio GMC ≥ → aumento significativo (%)
+
+
+class UmbralesDMRE(NamedTuple):
+    lsr_liquido: float = 50.0          # LSR ≥ → actividad por líquido (µm)
+    av_caida_basal: int = -5           # ΔAVMC vs basal ≤ → actividad funcional (letras)
+    av_caida_mejor: int = -10          # ΔAVMC vs mejor ≤ → actividad funcional (letras)
+    gmc_sem16: float = 50.0            # ΔGMC vs semana 16 ≥ → actividad por GMC (µm)
+    gmc_min: float = 75.0              # ΔGMC vs mínimo histórico ≥ → actividad por GMC (µm)
+
+
+class VersionUmbrales(NamedTuple):
+    version: str
+    vigente_desde: str                 # fecha ISO (AAAA-MM-DD)
+    descripcion: str
+    emd: UmbralesEMD
+    dmre: UmbralesDMRE
+
+
+PROTOCOLO_BASE = VersionUmbrales("1", "", "Protocolo original", UmbralesEMD(), UmbralesDMRE())
+
+
+# Cortes agrupados por la columna que comparan: son las columnas que
+# `reevaluacion.RegistroPuntuado` mantiene indexadas en orden.
+def cortes_emd(u: UmbralesEMD):
+    return {
+        "gmc_actual": (u.gmc_switch, u.gmc_ozurdex),
+        "cambio_gmc": (-u.cambio_estable, u.cambio_estable, u.cambio_aumento),
+    }
+
+
+def cortes_dmre(u: UmbralesDMRE):
+    return {
+        "lsr_micras": (u.lsr_liquido,),
+        "delta_vs_basal_letras": (u.av_caida_basal,),
+        "delta_vs_mejor_letras": (u.av_caida_mejor,),
+        "delta_gmc_vs_sem16": (u.gmc_sem16,),
+        "delta_gmc_vs_min": (u.gmc_min,),
+    }
+
+
+def cortes(umbrales):
+    """Cortes de un juego de umbrales, agrupados por la columna que comparan."""
+    return cortes_emd(umbrales) if isinstance(umbrales, UmbralesEMD) else cortes_dmre(umbrales)
+
+
+def cargar_versiones(ruta):
+    """
+    Lee versiones de umbrales desde un JSON y las encadena sobre PROTOCOLO_BASE.
+    Devuelve: tupla de VersionUmbrales ordenada por `vigente_desde`.
+    """
+    with open(ruta, encoding="utf-8") as f:
+        entradas = json.load(f)
+
+    versiones = [PROTOCOLO_BASE]
+    for e in sorted(entradas, key=lambda e: e.get("vigente_desde", "")):
+        previa = versiones[-1]
+        try:
+            emd = previa.emd._replace(**e.get("emd", {}))
+            dmre = previa.dmre._replace(**e.get("dmre", {}))
+        except ValueError as error:
+            raise ValueError(f"Versión {e.get('version')!r}: {error}") from None
+        versiones.append(VersionUmbrales(
+            str(e["version"]), e.get("vigente_desde", ""), e.get("descripcion", ""), emd, dmre,
+        ))
+    return tuple(versiones)
+
+
+_RUTA = os.environ.get("ALGORITMOS_UMBRALES")
+VERSIONES = cargar_versiones(_RUTA) if _RUTA else (PROTOCOLO_BASE,)
+
+
+def version(identificador=None):
+    """Versión por identificador; sin argumento, la vigente (la más reciente)."""
+    if identificador is None:
+        return VERSIONES[-1]
+    for v in VERSIONES:
+        if v.version == str(identificador):
+            return v
+    raise KeyError(f"Versión de umbrales desconocida: {identificador!r}")
+
+
+def vigentes(algoritmo):
+    """Umbrales de la versión vigente para "emd" o "dmre"."""
+    return getattr(VERSIONES[-1], algoritmo)
@@ -0,0 +1,4 @@
+"""
+Benchmarks de rendimiento. Ejecutar desde la raíz del repositorio:
+    python -m benchmarks.rendimiento --help
+"""
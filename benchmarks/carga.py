@@ -0,0 +1,419 @@
+"""
+Prueba de carga: N clínicos simulados usando a la vez las páginas EMD y DMRE.
+
+Levanta `streamlit run app.py` en un puerto local (o usa uno ya levantado con
+--url) y abre N sesiones de navegador simuladas: cada una es una conexión al
+websocket de Streamlit (/_stcore/stream) que envía los mismos mensajes que el
+navegador. Cada usuario elige página, rellena el formulario con valores
+aleatorios realistas y pulsa "Calcular"; se mide cuánto tarda el servidor en
+terminar esa re-ejecución.
+
+AppTest no sirve aquí: cada ejecución instala y retira un Runtime global, así
+que no admite sesiones concurrentes en un mismo proceso.
+
+Uso:
+    python -m benchmarks.carga --usuarios 20 --duracion 30
+    python -m benchmarks.carga --usuarios 1,10,50,100 --duracion 20 --salida carga.json
+    python -m benchmarks.carga --url 127.0.0.1:8501 --pid 12345
+
+Informa: re-ejecuciones/s, latencia p50/p95/p99 (envío del formulario y cambio
+de página), y CPU y memoria residente del proceso servidor (Linux, vía /proc),
+incluida la memoria por sesión (crecimiento del RSS con las sesiones abiertas
+y ya usadas, dividido entre el número de sesiones).
+
+Los valores de los widgets se envían con el formato de las versiones recientes
+de Streamlit (radio/selectbox como texto de la opción, números como double).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.rendimiento import RAIZ
+
+PAGINAS = {
+    "emd": "Algoritmo EMD (Anti-VEGF)",
+    "dmre": "Algoritmo DMRE (Anti-VEGF)",
+}
+SELECTOR_PAGINA = "Selecciona una sección:"
+_WIDGETS = ("radio", "selectbox", "number_input", "text_input", "button")
+
+
+# =========================
+# Valores aleatorios realistas (por etiqueta del widget)
+# =========================
+def _entradas_emd(rng):
+    return {
+        "Tipo de paciente": rng.choice(["Naive", "Previo"]),
+        "Semana de tratamiento (desde inicio de esquema actual)": rng.randint(0, 60),
+        "Intervalo actual entre aplicaciones": rng.choice(["Q4W", "Q8W", "Q12W", "Q16W"]),
+        "GMC basal (µm)": float(round(min(1200, max(150, rng.gauss(420, 80))))),
+        "GMC actual (µm)": float(round(min(1200, max(150, rng.gauss(360, 80))))),
+        "AVMC basal (letras)": rng.randint(20, 85),
+        "AVMC actual (letras)": rng.randint(20, 90),
+    }
+
+
+def _entradas_dmre(rng):
+    return {
+        "Tipo de paciente": rng.choice(["Naive", "Previo"]),
+        "Intervalo actual": rng.choice(["Q8W", "Q12W", "Q16W"]),
+        "¿LIR (líquido intrarretiniano) presente?": "Sí" if rng.random() < 0.2 else "No",
+        "LSR (micras)": float(rng.randint(0, 120)),
+        "AVMC basal (letras)": rng.randint(20, 85),
+        "Mejor AVMC registrada (letras)": rng.randint(40, 95),
+        "AVMC actual (letras)": rng.randint(20, 95),
+        "¿Hemorragia macular nueva?": "Sí" if rng.random() < 0.05 else "No",
+        "GMC semana 16 (µm)": float(round(max(0, rng.gauss(300, 50)))),
+        "GMC mínimo histórico (µm)": float(round(max(0, rng.gauss(280, 50)))),
+        "GMC actual (µm)": float(round(max(0, rng.gauss(320, 60)))),
+    }
+
+
+_ENTRADAS = {"emd": _entradas_emd, "dmre": _entradas_dmre}
+
+
+# =========================
+# Cliente websocket mínimo (RFC 6455, sólo lo que usa Streamlit)
+# =========================
+def _trama(datos, opcode=2):
+    # El cliente debe enmascarar todas las tramas
+    mascara = os.urandom(4)
+    n = len(datos)
+    if n < 126:
+        cabecera = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+    elif n < 1 << 16:
+        cabecera = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+    else:
+        cabecera = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+    clave = np.frombuffer((mascara * (n // 4 + 1))[:n], np.uint8)
+    return cabecera + mascara + (np.frombuffer(datos, np.uint8) ^ clave).tobytes()
+
+
+class SesionSimulada:
+    """Una pestaña de navegador: conexión propia, estado de widgets propio."""
+
+    def __init__(self, host, puerto):
+        self.host, self.puerto = host, puerto
+        self.widgets = {}        # etiqueta → (tipo, proto, fragment_id)
+        self.estados = {}        # id de widget → WidgetState
+
+    async def conectar(self):
+        self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        clave = base64.b64encode(os.urandom(16)).decode()
+        self._escritor.write((
+            f"GET /_stcore/stream HTTP/1.1\r\nHost: {self.host}:{self.puerto}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {clave}\r\nSec-WebSocket-Version: 13\r\n"
+            "Sec-WebSocket-Protocol: streamlit\r\n\r\n"
+        ).encode())
+        await self._escritor.drain()
+        cabecera = await self._lector.readuntil(b"\r\n\r\n")
+        if b" 101 " not in cabecera.split(b"\r\n", 1)[0]:
+            raise ConnectionError(cabecera.split(b"\r\n", 1)[0].decode(errors="replace"))
+        await self.ejecutar()
+
+    async def cerrar(self):
+        self._escritor.write(_trama(b"", opcode=8))
+        self._escritor.close()
+
+    async def _recibir(self):
+        datos = b""
+        while True:
+            b0, b1 = await self._lector.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                (n,) = struct.unpack("!H", await self._lector.readexactly(2))
+            elif n == 127:
+                (n,) = struct.unpack("!Q", await self._lector.readexactly(8))
+            carga = await self._lector.readexactly(n)
+            opcode = b0 & 0x0F
+            if opcode == 9:                                  # ping → pong
+                self._escritor.write(_trama(carga, opcode=10))
+            elif opcode == 8:
+                raise ConnectionError("el servidor cerró la conexión")
+            elif opcode in (0, 1, 2):
+                datos += carga
+                if b0 & 0x80:
+                    return datos
+
+    async def ejecutar(self, disparador=None, fragment_id=""):
+        """
+        Envía una re-ejecución con el estado actual y espera a que termine.
+        Devuelve: nombre del estado final (p. ej. "FINISHED_SUCCESSFULLY").
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        mensaje = BackMsg()
+        estado = mensaje.rerun_script
+        estado.query_string = ""
+        estado.page_script_hash = ""
+        estado.widget_states.widgets.extend(self.estados.values())
+        if disparador is not None:
+            w = estado.widget_states.widgets.add()
+            w.id = disparador
+            w.trigger_value = True
+        if fragment_id:
+            estado.fragment_id = fragment_id
+        self._escritor.write(_trama(mensaje.SerializeToString()))
+        await self._escritor.drain()
+        if not fragment_id:
+            # Una ejecución completa redibuja la página: sólo quedan sus widgets
+            self.widgets = {}
+
+        while True:
+            f = ForwardMsg()
+            f.ParseFromString(await self._recibir())
+            tipo = f.WhichOneof("type")
+            if tipo == "delta" and f.delta.WhichOneof("type") == "new_element":
+                self._anotar(f.delta.new_element, f.delta.fragment_id)
+            elif tipo == "script_finished":
+                if not fragment_id:
+                    vigentes = {w[1].id for w in self.widgets.values()}
+                    self.estados = {i: e for i, e in self.estados.items() if i in vigentes}
+                return ForwardMsg.ScriptFinishedStatus.Name(f.script_finished)
+
+    def _anotar(self, elemento, fragment_id):
+        """Registra un widget recién dibujado con su valor por defecto, como el navegador."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        tipo = elemento.WhichOneof("type")
+        if tipo not in _WIDGETS:
+            return
+        proto = getattr(elemento, tipo)
+        self.widgets[proto.label] = (tipo, proto, fragment_id)
+        if tipo == "button" or proto.id in self.estados:
+            return
+        ws = WidgetState(id=proto.id)
+        if tipo in ("radio", "selectbox"):
+            if proto.HasField("default") and proto.options:
+                ws.string_value = proto.options[proto.default]
+        elif tipo == "number_input":
+            if proto.HasField("default"):
+                ws.double_value = proto.default
+        elif tipo == "text_input":
+            ws.string_value = proto.default if proto.HasField("default") else ""
+        self.estados[proto.id] = ws
+
+    def fijar(self, etiqueta, valor):
+        tipo, proto, _ = self.widgets[etiqueta]
+        ws = self.estados[proto.id]
+        if tipo == "number_input":
+            ws.double_value = float(valor)
+        else:
+            ws.string_value = str(valor)
+
+    async def ir_a(self, pagina):
+        self.fijar(SELECTOR_PAGINA, pagina)
+        await self.ejecutar()
+
+    async def enviar_formulario(self):
+        """Pulsa el botón de envío del formulario (re-ejecución del fragmento)."""
+        _, boton, fragment_id = next(w for w in self.widgets.values() if w[0] == "button" and w[1].is_form_submitter)
+        return await self.ejecutar(disparador=boton.id, fragment_id=fragment_id)
+
+
+# =========================
+# Servidor y medición de recursos
+# =========================
+def _recursos(pid):
+    """(CPU acumulada en s, RSS en MB) de un proceso, o (None, None) sin /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            paginas = int(f.read().split()[1])
+    except OSError:
+        return None, None
+    tics = os.sysconf("SC_CLK_TCK")
+    cpu = (int(campos[11]) + int(campos[12])) / tics        # utime + stime
+    return cpu, paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _levantar_servidor(puerto):
+    entorno = dict(os.environ)
+    # Las recomendaciones simuladas no van al registro de auditoría ni a las fichas reales
+    temporal = tempfile.mkdtemp(prefix="carga_")
+    entorno.setdefault("ALGORITMOS_AUDITORIA", os.path.join(temporal, "auditoria.sqlite3"))
+    entorno.setdefault("ALGORITMOS_PACIENTES", os.path.join(temporal, "pacientes.sqlite3"))
+    entorno.setdefault("ALGORITMOS_TABLERO", os.path.join(temporal, "tablero.sqlite3"))
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(RAIZ, "app.py"),
+         "--server.headless", "true", "--server.port", str(puerto),
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return proceso
+
+
+async def _esperar_servidor(host, puerto, proceso=None, timeout_s=60):
+    limite = time.monotonic() + timeout_s
+    while time.monotonic() < limite:
+        if proceso is not None and proceso.poll() is not None:
+            raise RuntimeError(f"streamlit terminó con código {proceso.returncode}")
+        try:
+            lector, escritor = await asyncio.open_connection(host, puerto)
+            escritor.write(f"GET /_stcore/health HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            respuesta = await lector.read()
+            escritor.close()
+            if b" 200 " in respuesta.split(b"\r\n", 1)[0]:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise TimeoutError("el servidor de Streamlit no respondió a tiempo")
+
+
+# =========================
+# Simulación
+# =========================
+async def _usuario(sesion, indice, hasta, pausa_s, lat_calcular, lat_navegar, errores):
+    rng = random.Random(indice)
+    actual = None
+    while time.perf_counter() < hasta:
+        clave = rng.choice(list(PAGINAS))
+        try:
+            if clave != actual:
+                inicio = time.perf_counter()
+                await sesion.ir_a(PAGINAS[clave])
+                lat_navegar.append((time.perf_counter() - inicio) * 1000)
+                actual = clave
+            for etiqueta, valor in _ENTRADAS[clave](rng).items():
+                sesion.fijar(etiqueta, valor)
+            inicio = time.perf_counter()
+            fin = await sesion.enviar_formulario()
+            lat_calcular.append((time.perf_counter() - inicio) * 1000)
+            if not fin.endswith("SUCCESSFULLY"):
+                errores.append(f"re-ejecución terminada con estado {fin}")
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, KeyError, StopIteration) as error:
+            errores.append(f"{type(error).__name__}: {error}")
+            return
+        if pausa_s:
+            await asyncio.sleep(rng.uniform(0, 2 * pausa_s))
+
+
+def _percentiles(valores):
+    if not valores:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    return {
+        "p50": statistics.median(valores),
+        "p95": float(np.percentile(valores, 95)),
+        "p99": float(np.percentile(valores, 99)),
+        "max": max(valores),
+    }
+
+
+async def simular(host, puerto, usuarios, duracion_s, pausa_s=0.0, pid=None):
+    """
+    Abre `usuarios` sesiones, y durante `duracion_s` segundos cada una envía
+    formularios sin parar (o con pausas de media `pausa_s`).
+    Devuelve: dict con las métricas de la corrida.
+    """
+    _, rss_inicial = _recursos(pid) if pid else (None, None)
+    sesiones = [SesionSimulada(host, puerto) for _ in range(usuarios)]
+    await asyncio.gather(*(s.conectar() for s in sesiones))
+    cpu_inicio, _ = _recursos(pid) if pid else (None, None)
+
+    lat_calcular, lat_navegar, errores = [], [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _usuario(s, i, inicio + duracion_s, pausa_s, lat_calcular, lat_navegar, errores)
+        for i, s in enumerate(sesiones)
+    ))
+    segundos = time.perf_counter() - inicio
+    cpu_fin, rss_final = _recursos(pid) if pid else (None, None)
+    await asyncio.gather(*(s.cerrar() for s in sesiones), return_exceptions=True)
+
+    n = len(lat_calcular) + len(lat_navegar)
+    cpu_s = None if cpu_inicio is None else cpu_fin - cpu_inicio
+    return {
+        "usuarios": usuarios,
+        "duracion_s": round(segundos, 2),
+        "reejecuciones": n,
+        "reejecuciones_por_s": n / segundos,
+        "errores": len(errores),
+        "latencia_calcular_ms": _percentiles(lat_calcular),
+        "latencia_navegar_ms": _percentiles(lat_navegar),
+        "servidor_cpu_nucleos": None if cpu_s is None else cpu_s / segundos,
+        "servidor_cpu_ms_por_reejecucion": None if cpu_s is None or not n else cpu_s * 1000 / n,
+        "servidor_rss_mb": rss_final,
+        "servidor_rss_mb_por_sesion": None if rss_inicial is None else (rss_final - rss_inicial) / usuarios,
+        "primeros_errores": errores[:5],
+    }
+
+
+def _formato(valor, ancho, decimales=1):
+    return f"{'-':>{ancho}}" if valor is None else f"{valor:>{ancho}.{decimales}f}"
+
+
+async def _principal(args):
+    proceso = None
+    if args.url:
+        host, _, puerto = args.url.rpartition(":")
+        puerto, pid = int(puerto), args.pid
+    else:
+        host, puerto = "127.0.0.1", args.puerto
+        proceso = _levantar_servidor(puerto)
+        pid = proceso.pid
+    try:
+        await _esperar_servidor(host, puerto, proceso)
+        # Calentamiento: primera ejecución de cada página (importaciones, cachés)
+        calentamiento = SesionSimulada(host, puerto)
+        await calentamiento.conectar()
+        for pagina in PAGINAS.values():
+            await calentamiento.ir_a(pagina)
+            await calentamiento.enviar_formulario()
+        await calentamiento.cerrar()
+
+        resultados = []
+        print(f"{'usuarios':>8} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'CPU núcl.':>9} {'CPU ms/run':>10} {'MB/sesión':>9} {'RSS MB':>8} {'errores':>7}")
+        for usuarios in (int(u) for u in args.usuarios.split(",")):
+            r = await simular(host, puerto, usuarios, args.duracion, args.pausa, pid)
+            resultados.append(r)
+            lat = r["latencia_calcular_ms"]
+            print(
+                f"{usuarios:>8} {r['reejecuciones_por_s']:>8.1f} {_formato(lat['p50'], 8)} "
+                f"{_formato(lat['p95'], 8)} {_formato(lat['p99'], 8)} {_formato(r['servidor_cpu_nucleos'], 9, 2)} "
+                f"{_formato(r['servidor_cpu_ms_por_reejecucion'], 10)} {_formato(r['servidor_rss_mb_por_sesion'], 9, 2)} "
+                f"{_formato(r['servidor_rss_mb'], 8)} {r['errores']:>7}"
+            )
+            for e in r["primeros_errores"]:
+                print(f"  error: {e}", file=sys.stderr)
+        return resultados
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de las páginas EMD/DMRE con sesiones simuladas.")
+    parser.add_argument("--usuarios", default="10", help="Usuarios concurrentes; lista separada por comas para un barrido")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de medición por corrida")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Tiempo medio de pensar entre envíos (s); 0 = carga máxima")
+    parser.add_argument("--puerto", type=int, default=8599, help="Puerto del servidor que se levanta")
+    parser.add_argument("--url", help="host:puerto de un servidor ya levantado (no se levanta otro)")
+    parser.add_argument("--pid", type=int, help="PID de ese servidor, para medir su CPU y memoria")
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultados = asyncio.run(_principal(args))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"pausa_s": args.pausa, "corridas": resultados}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
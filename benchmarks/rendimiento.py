@@ -0,0 +1,324 @@
+"""
+Suite de benchmarks reproducible.
+
+Cuatro partes:
+  1. escalar: llamadas por segundo de cada rama de `algoritmo_emd` y `algoritmo_dmre`.
+  2. cohorte: filas por segundo sobre cohortes sintéticas de 10k / 1M filas,
+     con el bucle escalar y con las versiones vectorizadas.
+  3. rerun: tiempo de re-ejecución de cada página de app.py con el arnés
+     headless AppTest de Streamlit (p50 / p95).
+  4. ingesta: archivos por minuto al leer y puntuar exportaciones OCT sintéticas
+     (CSV y XML) con `algoritmos.ingesta`.
+
+Uso:
+    python -m benchmarks.rendimiento --salida resultados.json
+    python -m benchmarks.rendimiento --guardar-linea-base
+    python -m benchmarks.rendimiento --comparar benchmarks/linea_base.json --tolerancia 0.2
+
+Con --comparar, el proceso termina con código 1 si alguna métrica empeora más
+que la tolerancia respecto a la línea base.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import unicodedata
+
+import numpy as np
+
+from algoritmos import algoritmo_dmre, algoritmo_emd
+from algoritmos.ingesta import puntuar_exportaciones
+from algoritmos.lote import algoritmo_dmre_lote, algoritmo_emd_lote
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINEA_BASE = os.path.join(RAIZ, "benchmarks", "linea_base.json")
+
+# Una entrada representativa por rama (tipo, semana, intervalo, gmc_basal, gmc_actual, avmc_basal, avmc_actual)
+RAMAS_EMD = {
+    "naive_carga": ("Naive", 4, "Q4W", 400.0, 380.0, 60, 62),
+    "naive_switch": ("Naive", 12, "Q4W", 400.0, 300.0, 60, 62),
+    "naive_ozurdex": ("Naive", 12, "Q4W", 450.0, 420.0, 60, 62),
+    "naive_revisar_datos": ("Naive", 12, "Q4W", 0.0, 350.0, 60, 62),
+    "naive_early_reduccion": ("Naive", 12, "Q4W", 400.0, 350.0, 60, 62),
+    "naive_early_estable": ("Naive", 12, "Q4W", 350.0, 360.0, 60, 62),
+    "naive_early_aumento_20": ("Naive", 12, "Q4W", 280.0, 350.0, 60, 62),
+    "naive_early_rango_atipico": ("Naive", 12, "Q4W", 310.0, 350.0, 60, 62),
+    "previo_revisar_datos": ("Previo", 20, "Q4W", 0.0, 350.0, 60, 62),
+    "previo_reduccion": ("Previo", 20, "Q4W", 400.0, 300.0, 60, 62),
+    "previo_estable": ("Previo", 20, "Q4W", 350.0, 360.0, 60, 62),
+    "previo_aumento_leve": ("Previo", 20, "Q4W", 310.0, 350.0, 60, 62),
+    "previo_switch": ("Previo", 20, "Q4W", 280.0, 350.0, 60, 62),
+    "sin_decision": ("Otro", 20, "Q4W", 400.0, 350.0, 60, 62),
+}
+
+# (tipo, intervalo, lir, lsr, avmc_basal, avmc_mejor, avmc_actual, hemorragia, gmc_sem16, gmc_min, gmc_actual)
+RAMAS_DMRE = {
+    "extender": ("Naive", "Q8W", False, 30.0, 60, 70, 68, False, 280.0, 260.0, 300.0),
+    "mantener_q16": ("Naive", "Q16W", False, 30.0, 60, 70, 68, False, 280.0, 260.0, 300.0),
+    "acortar_liquido": ("Naive", "Q12W", True, 30.0, 60, 70, 68, False, 280.0, 260.0, 300.0),
+    "acortar_vision": ("Naive", "Q12W", False, 30.0, 60, 70, 50, False, 280.0, 260.0, 300.0),
+    "acortar_hemorragia": ("Naive", "Q12W", False, 30.0, 60, 70, 68, True, 280.0, 260.0, 300.0),
+    "acortar_gmc": ("Naive", "Q12W", False, 30.0, 60, 70, 68, False, 280.0, 260.0, 400.0),
+    "q8_naive_switch": ("Naive", "Q8W", True, 60.0, 60, 70, 68, False, 280.0, 260.0, 300.0),
+    "q8_previo_switch": ("Previo", "Q8W", True, 60.0, 60, 70, 68, False, 280.0, 260.0, 300.0),
+}
+
+PAGINAS = [
+    "Inicio", "Algoritmo EMD (Anti-VEGF)", "Algoritmo DMRE (Anti-VEGF)", "Mapa de decisión",
+    "Resultados de la cohorte", "Bibliografia",
+]
+
+
+def _metrica(valor, unidad, mejor):
+    return {"valor": valor, "unidad": unidad, "mejor": mejor}
+
+
+def _llamadas_por_segundo(funcion, args, minimo_s=0.2):
+    temporizador = timeit.Timer(lambda: funcion(*args))
+    n, segundos = temporizador.autorange()
+    while segundos < minimo_s:
+        n *= 2
+        segundos = temporizador.timeit(n)
+    # Mejor de 3 repeticiones para reducir ruido
+    segundos = min(segundos, *temporizador.repeat(repeat=2, number=n))
+    return n / segundos
+
+
+def bench_escalar():
+    metricas = {}
+    for rama, args in RAMAS_EMD.items():
+        metricas[f"escalar.emd.{rama}"] = _metrica(_llamadas_por_segundo(algoritmo_emd, args), "llamadas/s", "mayor")
+    for rama, args in RAMAS_DMRE.items():
+        metricas[f"escalar.dmre.{rama}"] = _metrica(_llamadas_por_segundo(algoritmo_dmre, args), "llamadas/s", "mayor")
+    return metricas
+
+
+def cohorte_sintetica(n, semilla=0):
+    """Columnas aleatorias pero realistas (rangos de los formularios)."""
+    rng = np.random.default_rng(semilla)
+    return {
+        "tipo_paciente": rng.choice(["Naive", "Previo"], n),
+        "semana": rng.integers(0, 60, n),
+        "intervalo_actual": rng.choice(["Q8W", "Q12W", "Q16W"], n),
+        "gmc_basal": rng.normal(400, 80, n).round().clip(150, 1200),
+        "gmc_actual": rng.normal(350, 80, n).round().clip(150, 1200),
+        "avmc_basal": rng.integers(20, 90, n),
+        "avmc_mejor": rng.integers(40, 95, n),
+        "avmc_actual": rng.integers(20, 95, n),
+        "lir": rng.random(n) < 0.2,
+        "lsr_micras": rng.integers(0, 120, n).astype(float),
+        "hemorragia_nueva": rng.random(n) < 0.05,
+        "gmc_sem16": rng.normal(300, 50, n).round().clip(0, 1200),
+        "gmc_min_hist": rng.normal(280, 50, n).round().clip(0, 1200),
+    }
+
+
+def _columnas_emd(c):
+    return [c[k] for k in ("tipo_paciente", "semana", "gmc_basal", "gmc_actual", "avmc_basal", "avmc_actual")]
+
+
+def _columnas_dmre(c):
+    return [c[k] for k in (
+        "tipo_paciente", "intervalo_actual", "lir", "lsr_micras", "avmc_basal", "avmc_mejor",
+        "avmc_actual", "hemorragia_nueva", "gmc_sem16", "gmc_min_hist", "gmc_actual",
+    )]
+
+
+def bench_cohorte(tamanos):
+    metricas = {}
+    for n in tamanos:
+        c = cohorte_sintetica(n)
+        etiqueta = f"{n // 1000}k" if n < 1_000_000 else f"{n // 1_000_000}M"
+
+        # Bucle escalar (lo que se hace hoy fila a fila), sobre listas de Python
+        filas_emd = list(zip(*(col.tolist() for col in _columnas_emd(c))))
+        inicio = time.perf_counter()
+        for t, s, gb, ga, ab, aa in filas_emd:
+            algoritmo_emd(t, s, "Q8W", gb, ga, ab, aa)
+        metricas[f"cohorte.emd.bucle.{etiqueta}"] = _metrica(n / (time.perf_counter() - inicio), "filas/s", "mayor")
+
+        filas_dmre = list(zip(*(col.tolist() for col in _columnas_dmre(c))))
+        inicio = time.perf_counter()
+        for fila in filas_dmre:
+            algoritmo_dmre(*fila)
+        metricas[f"cohorte.dmre.bucle.{etiqueta}"] = _metrica(n / (time.perf_counter() - inicio), "filas/s", "mayor")
+
+        inicio = time.perf_counter()
+        algoritmo_emd_lote(*_columnas_emd(c))
+        metricas[f"cohorte.emd.lote.{etiqueta}"] = _metrica(n / (time.perf_counter() - inicio), "filas/s", "mayor")
+
+        inicio = time.perf_counter()
+        algoritmo_dmre_lote(*_columnas_dmre(c))
+        metricas[f"cohorte.dmre.lote.{etiqueta}"] = _metrica(n / (time.perf_counter() - inicio), "filas/s", "mayor")
+    return metricas
+
+
+def _percentil(valores, p):
+    return float(np.percentile(valores, p))
+
+
+def bench_rerun(repeticiones):
+    """Re-ejecución de app.py por página (y envío del formulario en EMD/DMRE)."""
+    # Los envíos simulados no van a las bases reales. Las rutas se leen al importar
+    # auditoria/pacientes, así que se fijan antes de que app.py los importe.
+    temporal = tempfile.mkdtemp(prefix="rerun_")
+    os.environ["ALGORITMOS_AUDITORIA"] = os.path.join(temporal, "auditoria.sqlite3")
+    os.environ["ALGORITMOS_PACIENTES"] = os.path.join(temporal, "pacientes.sqlite3")
+    os.environ["ALGORITMOS_TABLERO"] = os.path.join(temporal, "tablero.sqlite3")
+    from streamlit.testing.v1 import AppTest
+
+    ruta_app = os.path.join(RAIZ, "app.py")
+    metricas = {}
+    for pagina in PAGINAS:
+        at = AppTest.from_file(ruta_app, default_timeout=60).run()
+        at.sidebar.selectbox[0].set_value(pagina).run()
+        slug = pagina.split(" (")[0].lower().replace(" ", "_")
+        slug = unicodedata.normalize("NFKD", slug).encode("ascii", "ignore").decode()    # "decisión" → "decision"
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            at.run()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        metricas[f"rerun.{slug}.p50"] = _metrica(statistics.median(tiempos), "ms", "menor")
+        metricas[f"rerun.{slug}.p95"] = _metrica(_percentil(tiempos, 95), "ms", "menor")
+
+        if at.button and pagina.startswith("Algoritmo"):
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                at.button[0].click().run()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            metricas[f"rerun.{slug}.calcular.p50"] = _metrica(statistics.median(tiempos), "ms", "menor")
+            metricas[f"rerun.{slug}.calcular.p95"] = _metrica(_percentil(tiempos, 95), "ms", "menor")
+    return metricas
+
+
+def exportaciones_sinteticas(directorio, n_archivos, semilla=0):
+    """
+    Escribe `n_archivos` exportaciones OCT de prueba (mitad CSV, mitad XML, con
+    nombres de campo de distintos fabricantes) y algunos archivos inválidos.
+    Devuelve: número de exploraciones válidas escritas.
+    """
+    rng = np.random.default_rng(semilla)
+    validas = 0
+    for i in range(n_archivos):
+        paciente = f"P{rng.integers(0, max(1, n_archivos // 8)):05d}"
+        lado = rng.choice(["OD", "OS", "R", "L"])
+        fecha = datetime.date(2026, 1, 1) + datetime.timedelta(days=int(rng.integers(0, 300)))
+        gmc = round(float(rng.normal(330, 70)), 1)
+        irf = bool(rng.random() < 0.2)
+        srf = float(rng.integers(0, 120))
+        ruta = os.path.join(directorio, f"scan_{i:06d}")
+        if i % 97 == 96:
+            with open(ruta + ".xml", "w", encoding="utf-8") as f:
+                f.write("<Scan><PatientID>roto")          # XML truncado
+            continue
+        if i % 2:
+            with open(ruta + ".csv", "w", encoding="utf-8") as f:
+                f.write("PatientID,Eye,ScanDate,CST,IRF,SRF_Height\n")
+                f.write(f"{paciente},{lado},{fecha.isoformat()},{gmc},{'Yes' if irf else 'No'},{srf}\n")
+        else:
+            with open(ruta + ".xml", "w", encoding="utf-8") as f:
+                f.write(
+                    f'<Export><Exam laterality="{lado}"><Patient>{paciente}</Patient>'
+                    f"<ExamDate>{fecha.isoformat()}T09:30:00</ExamDate>"
+                    f"<CentralSubfieldThickness>{gmc}</CentralSubfieldThickness>"
+                    f"<IntraretinalFluid>{str(irf).lower()}</IntraretinalFluid>"
+                    f"<SubretinalFluidHeight>{srf}</SubretinalFluidHeight></Exam></Export>"
+                )
+        validas += 1
+    return validas
+
+
+def bench_ingesta(n_archivos=5000, trabajadores=8):
+    directorio = tempfile.mkdtemp(prefix="exportaciones_oct_")
+    try:
+        validas = exportaciones_sinteticas(directorio, n_archivos)
+        errores = []
+        inicio = time.perf_counter()
+        leidas = sum(1 for _ in puntuar_exportaciones(directorio, trabajadores=trabajadores, errores=errores))
+        segundos = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    if leidas != validas or len(errores) != n_archivos - validas:
+        raise RuntimeError(f"Ingesta incompleta: {leidas}/{validas} exploraciones, {len(errores)} errores")
+    return {"ingesta.oct.archivos_por_minuto": _metrica(n_archivos / segundos * 60, "archivos/min", "mayor")}
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Devuelve la lista de regresiones: métricas que empeoran más que `tolerancia`
+    (fracción, p. ej. 0.2 = 20 %) respecto a la línea base.
+    """
+    regresiones = []
+    for nombre, m in actual["metricas"].items():
+        ref = base["metricas"].get(nombre)
+        if ref is None or ref["valor"] == 0:
+            continue
+        cambio = (m["valor"] - ref["valor"]) / ref["valor"]
+        empeora = -cambio if m["mejor"] == "mayor" else cambio
+        if empeora > tolerancia:
+            regresiones.append((nombre, ref["valor"], m["valor"], m["unidad"], empeora))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los algoritmos y de la app Streamlit.")
+    parser.add_argument("--partes", default="escalar,cohorte,rerun,ingesta", help="Lista separada por comas")
+    parser.add_argument("--tamanos", default="10000,1000000", help="Tamaños de cohorte (filas)")
+    parser.add_argument("--repeticiones", type=int, default=30, help="Re-ejecuciones por página")
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--guardar-linea-base", action="store_true", help=f"Escribir en {LINEA_BASE}")
+    parser.add_argument("--comparar", metavar="JSON", help="Línea base contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    partes = args.partes.split(",")
+    metricas = {}
+    if "escalar" in partes:
+        metricas.update(bench_escalar())
+    if "cohorte" in partes:
+        metricas.update(bench_cohorte([int(n) for n in args.tamanos.split(",")]))
+    if "rerun" in partes:
+        metricas.update(bench_rerun(args.repeticiones))
+    if "ingesta" in partes:
+        metricas.update(bench_ingesta())
+
+    resultado = {
+        "entorno": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+        },
+        "metricas": metricas,
+    }
+
+    for nombre, m in metricas.items():
+        print(f"{nombre:45s} {m['valor']:>14,.1f} {m['unidad']}")
+
+    for ruta in filter(None, [args.salida, LINEA_BASE if args.guardar_linea_base else None]):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        for nombre, antes, ahora, unidad, empeora in regresiones:
+            print(f"REGRESIÓN {nombre}: {antes:,.1f} → {ahora:,.1f} {unidad} ({empeora:.0%} peor)")
+        if regresiones:
+            raise SystemExit(1)
+        print(f"Sin regresiones (tolerancia {args.tolerancia:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
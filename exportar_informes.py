@@ -0,0 +1,62 @@
+"""
+Exportación de informes por paciente (HTML y PDF) desde la línea de comandos.
+
+Lee las visitas de un día (CSV o Parquet) por bloques, las evalúa con
+`algoritmo_emd` o `algoritmo_dmre` (versión vectorizada) y escribe un informe
+por visita con el plan, la justificación y los detalles que muestran las
+páginas. Los documentos se escriben a medida que se generan, en un directorio
+o en un .zip.
+
+Uso:
+    python exportar_informes.py emd visitas_hoy.csv informes.zip
+    python exportar_informes.py dmre visitas_hoy.parquet informes/ --formatos html
+    python exportar_informes.py emd visitas_hoy.csv informes.zip --fecha 2026-10-17
+    python exportar_informes.py emd visitas_hoy.csv informes.zip --version-umbrales 1
+
+Además de las columnas del algoritmo, se usan (si existen) "paciente" u "ojo"
+como identificador y "fecha" como fecha de la visita. Por defecto se aplican
+los umbrales de la versión vigente.
+"""
+import argparse
+import sys
+import time
+
+from algoritmos.cohorte import leer_bloques
+from algoritmos.informes import FORMATOS, exportar_informes
+from algoritmos.umbrales import version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta informes por paciente de un día de consulta.")
+    parser.add_argument("algoritmo", choices=["emd", "dmre"])
+    parser.add_argument("entrada", help="Archivo .csv o .parquet de visitas")
+    parser.add_argument("destino", help="Archivo .zip o directorio de salida")
+    parser.add_argument("--formatos", default=",".join(FORMATOS), help="html, pdf o ambos separados por coma")
+    parser.add_argument("--fecha", help="Fecha para las filas sin columna 'fecha' (por defecto, hoy)")
+    parser.add_argument("--filas-por-bloque", type=int, default=1000)
+    parser.add_argument("--version-umbrales", help="Versión de umbrales (por defecto, la vigente)")
+    args = parser.parse_args(argv)
+
+    formatos = tuple(f.strip() for f in args.formatos.split(","))
+    desconocidos = set(formatos) - set(FORMATOS)
+    if desconocidos:
+        parser.error(f"formato desconocido: {', '.join(sorted(desconocidos))}")
+    try:
+        version_elegida = version(args.version_umbrales)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    inicio = time.perf_counter()
+    documentos = exportar_informes(
+        args.algoritmo, leer_bloques(args.entrada, args.filas_por_bloque), args.destino, formatos, args.fecha,
+        getattr(version_elegida, args.algoritmo),
+    )
+    segundos = time.perf_counter() - inicio
+    print(
+        f"{documentos} documentos en {segundos:.2f} s → {args.destino} (umbrales v{version_elegida.version})",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Páginas de la app Streamlit: un módulo por sección, cada uno con `mostrar()`.
+"""
@@ -0,0 +1,70 @@
+"""
+Página oculta de administración (sólo con ?admin=1 en la URL).
+"""
+import json
+
+import streamlit as st
+
+from algoritmos.cache import CACHE_DMRE, CACHE_EMD
+from algoritmos.metricas import ACTIVAS, REGISTRO
+
+
+def mostrar():
+    st.title("Administración ⚙️")
+    st.subheader("Caché de resultados (compartida por todas las sesiones)")
+
+    for nombre, cache in (("EMD", CACHE_EMD), ("DMRE", CACHE_DMRE)):
+        est = cache.estadisticas()
+        st.markdown(f"**{nombre}**")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Entradas", f"{est['entradas']} / {est['tamano_max']}")
+        with col2:
+            st.metric("Tasa de acierto", f"{est['tasa_acierto']:.1%}")
+        with col3:
+            st.metric("Aciertos / fallos", f"{est['aciertos']} / {est['fallos']}")
+        with col4:
+            st.metric("Desalojos", est["desalojos"])
+
+    st.markdown("---")
+    nuevo_tamano = st.number_input(
+        "Tamaño máximo por algoritmo (entradas)",
+        min_value=1,
+        max_value=1_000_000,
+        value=CACHE_EMD.tamano_max,
+        step=256
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Aplicar tamaño"):
+            CACHE_EMD.redimensionar(nuevo_tamano)
+            CACHE_DMRE.redimensionar(nuevo_tamano)
+            st.rerun()
+    with col2:
+        if st.button("Vaciar cachés y reiniciar contadores"):
+            CACHE_EMD.limpiar()
+            CACHE_DMRE.limpiar()
+            st.rerun()
+
+    st.markdown("---")
+    st.subheader("Métricas de reglas")
+    if not ACTIVAS:
+        st.caption("Desactivadas. Iniciar el servidor con ALGORITMOS_METRICAS=1 para activarlas.")
+        return
+
+    instantanea = REGISTRO.como_json()
+    for algoritmo, tipos in instantanea["contadores"].items():
+        st.markdown(f"**{algoritmo}**")
+        st.json(tipos, expanded=False)
+    st.download_button(
+        "Descargar en formato Prometheus",
+        REGISTRO.como_prometheus(),
+        file_name="metricas.prom",
+        mime="text/plain"
+    )
+    st.download_button(
+        "Descargar instantánea JSON",
+        json.dumps(instantanea, indent=2, ensure_ascii=False),
+        file_name="metricas.json",
+        mime="application/json"
+    )
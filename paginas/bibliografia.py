@@ -0,0 +1,82 @@
+"""
+Página: Bibliografía.
+"""
+import functools
+import html
+
+import streamlit as st
+
+# (autores, título, revista, referencia)
+REFERENCIAS_EMD = [
+    (
+        "Zhang J, Zhang J, Zhang C, et al.",
+        "Diabetic Macular Edema: Current Understanding, Molecular Mechanisms and Therapeutic Implications.",
+        "Cells",
+        "2022;11(21):3362.",
+    ),
+    (
+        "Rodríguez FJ, Wu L, Bordon AF, et al.",
+        "Intravitreal aflibercept for the treatment of patients with diabetic macular edema in routine clinical practice in Latin America: the AQUILA study.",
+        "Int J Retina Vitreous",
+        "2022;8(1):52.",
+    ),
+    (
+        "Liberski S, Wichrowska M, Kocięcki J.",
+        "Aflibercept versus Faricimab in the Treatment of Neovascular Age-Related Macular Degeneration and Diabetic Macular Edema: A Review.",
+        "Int J Mol Sci",
+        "2022;23(16):9424.",
+    ),
+    (
+        "Penha FM, Masud M, Khanani ZA, et al.",
+        "Review of real-world evidence of dual inhibition of VEGF-A and ANG-2 with faricimab in nAMD and DME.",
+        "Int J Retina Vitreous",
+        "2024;10(1):5.",
+    ),
+    (
+        "Wykoff CC, Abreu F, Adamis AP, et al.",
+        "Efficacy, durability, and safety of intravitreal faricimab with extended dosing up to every 16 weeks in patients with diabetic macular oedema (YOSEMITE and RHINE): two randomised, double-masked, phase 3 trials.",
+        "Lancet",
+        "2022;399(10326):741–755.",
+    ),
+    (
+        "Brown DM, Boyer DS, Do DV, et al.",
+        "Intravitreal aflibercept 8 mg in diabetic macular oedema (PHOTON): 48-week results from a randomised, double-masked, non-inferiority, phase 2/3 trial.",
+        "Lancet",
+        "2024;403(10432):1153–1163.",
+    ),
+    (
+        "Friedman SM, Xu Y, Sherman S, et al.",
+        "Aflibercept 8 mg versus Faricimab Treat-and-Extend for Diabetic Macular Edema or Neovascular Age-Related Macular Degeneration: A Bayesian Fixed-Effect Network Meta-analysis of Clinical Trials.",
+        "Ophthalmol Ther",
+        "2025;14(11):2919–2936.",
+    ),
+    (
+        "Maccauro C, Jimenez Perez Y, Neri P, et al.",
+        "Short-term outcomes of faricimab and aflibercept 8 mg in diabetic macular edema.",
+        "AJO International",
+        "2025;2:100132.",
+    ),
+    (
+        "Asociación Mexicana de Retina.",
+        "Primer consenso nacional de edema macular diabético.",
+        "Rev Mex Oftalmol",
+        "2021;95(Suppl 2):1–144.",
+    ),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def html_referencias():
+    """Lista <ol> de REFERENCIAS_EMD; se construye una sola vez por proceso."""
+    items = "".join(
+        f"<li><b>{html.escape(autores)}</b> {html.escape(titulo)} "
+        f"<i>{html.escape(revista)}</i>. {html.escape(ref)}</li>"
+        for autores, titulo, revista, ref in REFERENCIAS_EMD
+    )
+    return f"<ol>{items}</ol>"
+
+
+def mostrar():
+    st.title("BIBLIOGRAFIA")
+    st.subheader("Edema macular diabético")
+    st.markdown(html_referencias(), unsafe_allow_html=True)
@@ -0,0 +1,219 @@
+"""
+Página: Algoritmo DMRE (Anti-VEGF).
+"""
+import sqlite3
+
+import streamlit as st
+
+from algoritmos.auditoria import registro_auditoria
+from algoritmos.cache import algoritmo_dmre_cacheado
+from algoritmos.pacientes import almacen_pacientes, indice_inicial, valor_inicial, valor_requerido
+from algoritmos.tablero import agregados_cohorte
+from algoritmos.umbrales import vigentes
+
+
+def mostrar():
+    st.title("Algoritmo DMRE – Anti-VEGF 💉👁️")
+    u = vigentes("dmre")
+    st.caption(
+        "Incluye criterios de actividad por OCT (LIR/LSR), AVMC, hemorragia y GMC "
+        f"(Δ≥{u.gmc_sem16:g} vs sem16 o Δ≥{u.gmc_min:g} vs mínimo)."
+    )
+
+    _formulario()
+
+
+# Inputs y resultado en un fragmento: al enviar el formulario sólo se vuelve a
+# ejecutar este bloque (no el menú ni el resto de la página), y editar un campo
+# del formulario no provoca ninguna ejecución hasta pulsar el botón.
+@st.fragment
+def _formulario():
+    col_izq, col_der = st.columns([1.15, 1])
+
+    with col_izq:
+        st.subheader("Esquema actual")
+        # Como en EMD: identificador fuera del formulario y claves por paciente
+        paciente = st.text_input(
+            "Identificador del paciente / ojo (opcional)",
+            help="Carga los basales y la última visita guardados. Se guarda con la recomendación."
+        ).strip()
+        ficha = _ficha(paciente)
+
+        with st.form("form_dmre", border=False):
+            tipo_paciente_dmre = st.radio(
+            "Tipo de paciente",
+            ["Naive", "Previo"],
+            index=indice_inicial(ficha, "tipo_paciente", ["Naive", "Previo"]),
+            key=f"dmre_tipo_paciente_{paciente}",
+            help="Naive: sin Anti-VEGF previo. Previo: ya venía en tratamiento."
+            )
+
+            intervalo_actual = st.selectbox(
+                "Intervalo actual", ["Q8W", "Q12W", "Q16W"],
+                index=indice_inicial(ficha, "intervalo_actual", ["Q8W", "Q12W", "Q16W"]),
+                key=f"dmre_intervalo_actual_{paciente}"
+            )
+
+            st.markdown("---")
+            st.subheader("OCT – Líquido")
+            lir = st.radio(
+                "¿LIR (líquido intrarretiniano) presente?", ["No", "Sí"],
+                index=int(valor_inicial(ficha, "lir", False)), key=f"dmre_lir_{paciente}"
+            ) == "Sí"
+            lsr_micras = st.number_input(
+                "LSR (micras)", min_value=0.0, max_value=500.0, step=1.0,
+                value=valor_requerido(paciente, ficha, "lsr_micras", 30.0), key=f"dmre_lsr_micras_{paciente}"
+            )
+
+            st.markdown("---")
+            st.subheader("Agudeza Visual (AVMC)")
+            avmc_basal = st.number_input(
+                "AVMC basal (letras)", min_value=0, max_value=100, step=1,
+                value=valor_requerido(paciente, ficha, "avmc_basal", 60), key=f"dmre_avmc_basal_{paciente}"
+            )
+            avmc_mejor = st.number_input(
+                "Mejor AVMC registrada (letras)", min_value=0, max_value=100, step=1,
+                value=valor_requerido(paciente, ficha, "avmc_mejor", 70), key=f"dmre_avmc_mejor_{paciente}"
+            )
+            avmc_actual = st.number_input(
+                "AVMC actual (letras)", min_value=0, max_value=100, step=1,
+                value=valor_requerido(paciente, ficha, "avmc_actual", 68), key=f"dmre_avmc_actual_{paciente}"
+            )
+
+            st.markdown("---")
+            st.subheader("Evento clínico")
+            hemorragia_nueva = st.radio(
+                "¿Hemorragia macular nueva?", ["No", "Sí"],
+                index=int(valor_inicial(ficha, "hemorragia_nueva", False)),
+                key=f"dmre_hemorragia_nueva_{paciente}"
+            ) == "Sí"
+
+            st.markdown("---")
+            st.subheader("GMC – Grosor Macular Central")
+            gmc_sem16 = st.number_input(
+                "GMC semana 16 (µm)", min_value=0.0, max_value=1200.0, step=1.0,
+                help="Vacío si todavía no hay GMC de semana 16 (el criterio queda N/A).",
+                value=valor_requerido(paciente, ficha, "gmc_sem16", 280.0), key=f"dmre_gmc_sem16_{paciente}"
+            )
+            gmc_min_hist = st.number_input(
+                "GMC mínimo histórico (µm)", min_value=0.0, max_value=1200.0, step=1.0,
+                help="Vacío si no hay visitas previas (el criterio queda N/A).",
+                value=valor_requerido(paciente, ficha, "gmc_min_hist", 260.0), key=f"dmre_gmc_min_hist_{paciente}"
+            )
+            gmc_actual = st.number_input(
+                "GMC actual (µm)", min_value=0.0, max_value=1200.0, step=1.0,
+                value=valor_requerido(paciente, ficha, "gmc_actual", 300.0), key=f"dmre_gmc_actual_{paciente}"
+            )
+
+            calcular_dmre = st.form_submit_button("Calcular recomendación (DMRE) 🧮")
+
+    with col_der:
+        st.subheader("Resultado")
+        # Como en EMD: sin valores de ejemplo para un paciente identificado. El GMC
+        # de semana 16 y el mínimo histórico pueden quedar vacíos (sin dato): se
+        # evalúan como N/A y la ficha los completa con las visitas siguientes.
+        faltan = [
+            nombre for nombre, valor in (
+                ("LSR", lsr_micras), ("AVMC basal", avmc_basal), ("mejor AVMC", avmc_mejor),
+                ("AVMC actual", avmc_actual), ("GMC actual", gmc_actual),
+            ) if valor is None
+        ]
+        if calcular_dmre and faltan:
+            st.warning(f"Ingresa {', '.join(faltan)} del paciente para calcular la recomendación.")
+        elif calcular_dmre:
+            plan, just, detalle = algoritmo_dmre_cacheado(
+            tipo_paciente_dmre,
+            intervalo_actual,
+            lir,
+            lsr_micras,
+            avmc_basal,
+            avmc_mejor,
+            avmc_actual,
+            hemorragia_nueva,
+            gmc_sem16 or 0.0,
+            gmc_min_hist or 0.0,
+            gmc_actual
+            )
+            entradas = {
+                "tipo_paciente": tipo_paciente_dmre, "intervalo_actual": intervalo_actual,
+                "lir": lir, "lsr_micras": lsr_micras, "avmc_basal": avmc_basal,
+                "avmc_mejor": avmc_mejor, "avmc_actual": avmc_actual,
+                "hemorragia_nueva": hemorragia_nueva, "gmc_sem16": gmc_sem16 or None,
+                "gmc_min_hist": gmc_min_hist or None, "gmc_actual": gmc_actual,
+            }
+            _auditar(paciente, entradas, plan, just, detalle["motivos"])
+            _guardar_visita(paciente, entradas, plan)
+
+            if "Acortar" in plan or "considerar switch" in plan.lower():
+                st.warning(f"**Plan sugerido:** {plan}")
+            else:
+                st.success(f"**Plan sugerido:** {plan}")
+
+            st.write(f"**Justificación clínica:** {just}")
+
+            st.markdown("---")
+            st.subheader("Detalles de actividad")
+            st.write(f"- Tipo de paciente: **{detalle['tipo_paciente']}**")
+
+            st.write(f"- Actividad global: **{'Sí' if detalle['actividad'] else 'No'}**")
+            st.write(f"- ΔAVMC vs basal: **{detalle['delta_vs_basal_letras']} letras**")
+            st.write(f"- ΔAVMC vs mejor: **{detalle['delta_vs_mejor_letras']} letras**")
+
+            u = vigentes("dmre")
+            if detalle["delta_gmc_vs_sem16"] is not None:
+                st.write(f"- ΔGMC vs semana 16: **+{detalle['delta_gmc_vs_sem16']:.0f} µm** (umbral ≥ {u.gmc_sem16:g})")
+            else:
+                st.write("- ΔGMC vs semana 16: **N/A**")
+
+            if detalle["delta_gmc_vs_min"] is not None:
+                st.write(f"- ΔGMC vs mínimo histórico: **+{detalle['delta_gmc_vs_min']:.0f} µm** (umbral ≥ {u.gmc_min:g})")
+            else:
+                st.write("- ΔGMC vs mínimo histórico: **N/A**")
+
+            if detalle["motivos"]:
+                st.markdown("**Motivos detectados:**")
+                for m in detalle["motivos"]:
+                    st.write(f"- {m}")
+            else:
+                st.write("No se detectaron criterios de actividad.")
+
+            st.info("Soporte a la decisión. No reemplaza juicio clínico.")
+        else:
+            st.info("Ingresa los datos a la izquierda y pulsa **Calcular recomendación (DMRE)**.")
+
+
+def _auditar(paciente, entradas, plan, justificacion, motivos):
+    # El tablero se actualiza antes de encolar: al crearse, parte de lo ya escrito.
+    # Recalcular la misma visita no vuelve a contar en el tablero (sí en la auditoría).
+    agregados_cohorte().registrar_visita("dmre", entradas, plan, paciente)
+    # Sólo encola: la escritura en disco la hace el hilo del registro
+    try:
+        registro_auditoria().registrar(
+            "dmre", entradas, plan, justificacion, motivos, paciente=paciente
+        )
+    except (RuntimeError, OSError) as error:
+        st.error(f"No se pudo guardar la recomendación en el registro de auditoría: {error}")
+
+
+def _ficha(paciente):
+    if not paciente:
+        return None
+    try:
+        ficha = almacen_pacientes().ficha(paciente)
+    except (sqlite3.Error, OSError) as error:
+        st.error(f"No se pudo leer la ficha del paciente: {error}")
+        return None
+    if ficha is None:
+        st.caption("Sin visitas guardadas: se guardará al calcular la recomendación.")
+    else:
+        st.caption(f"Ficha cargada: {ficha.visitas} visita(s), última el {ficha.actualizado[:10]}.")
+    return ficha
+
+
+def _guardar_visita(paciente, entradas, plan):
+    if not paciente:
+        return
+    try:
+        almacen_pacientes().guardar_visita(paciente, "dmre", entradas, plan)
+    except (sqlite3.Error, OSError) as error:
+        st.error(f"No se pudo guardar la visita en la ficha del paciente: {error}")
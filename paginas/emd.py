@@ -0,0 +1,217 @@
+"""
+Página: Algoritmo EMD (Anti-VEGF).
+"""
+import sqlite3
+
+import streamlit as st
+
+from algoritmos.auditoria import registro_auditoria
+from algoritmos.cache import algoritmo_emd_cacheado
+from algoritmos.pacientes import almacen_pacientes, indice_inicial, valor_requerido
+from algoritmos.tablero import agregados_cohorte
+
+
+def mostrar():
+    st.title("Algoritmo EMD – Anti-VEGF 💉")
+
+    st.markdown(
+        """
+        Ingresa los datos clave del paciente para que la herramienta sugiera:
+        - Si continuar, acortar o extender el intervalo.
+        - Si realizar **switch** de Anti-VEGF.
+        - Si considerar **corticoide intravítreo (Ozurdex)**.
+        """
+    )
+
+    _formulario()
+
+
+# Inputs y resultado en un fragmento: al enviar el formulario sólo se vuelve a
+# ejecutar este bloque (no el menú ni el resto de la página), y editar un campo
+# del formulario no provoca ninguna ejecución hasta pulsar el botón.
+@st.fragment
+def _formulario():
+    col_izq, col_der = st.columns([1.1, 1])
+
+    # -------------------------
+    # Columna izquierda: inputs
+    # -------------------------
+    with col_izq:
+        st.subheader("Datos del paciente")
+        # Fuera del formulario: al confirmar el identificador se cargan su
+        # ficha y los valores de la última visita como valores iniciales. Las
+        # claves llevan el identificador: cada paciente tiene widgets propios y
+        # guardar una visita no pisa lo que se está editando.
+        paciente = st.text_input(
+            "Identificador del paciente / ojo (opcional)",
+            help="Carga los basales y la última visita guardados. Se guarda con la recomendación."
+        ).strip()
+        ficha = _ficha(paciente)
+
+        with st.form("form_emd", border=False):
+            tipo_paciente = st.radio(
+                "Tipo de paciente",
+                ["Naive", "Previo"],
+                index=indice_inicial(ficha, "tipo_paciente", ["Naive", "Previo"]),
+                key=f"emd_tipo_paciente_{paciente}",
+                help="Naive: nunca ha recibido Anti-VEGF. Previo: ya venía en tratamiento."
+            )
+
+            semana = st.number_input(
+                "Semana de tratamiento (desde inicio de esquema actual)",
+                min_value=0,
+                max_value=200,
+                value=valor_requerido(paciente, ficha, "semana", 12),
+                step=1,
+                key=f"emd_semana_{paciente}"
+            )
+
+            intervalo_actual = st.selectbox(
+                "Intervalo actual entre aplicaciones",
+                ["Q4W", "Q8W", "Q12W", "Q16W"],
+                index=indice_inicial(ficha, "intervalo_actual", ["Q4W", "Q8W", "Q12W", "Q16W"]),
+                key=f"emd_intervalo_actual_{paciente}"
+            )
+
+            st.markdown("---")
+            st.subheader("OCT – Grosor Macular Central (GMC)")
+
+            gmc_basal = st.number_input(
+                "GMC basal (µm)",
+                min_value=0.0,
+                max_value=1200.0,
+                value=valor_requerido(paciente, ficha, "gmc_basal", 400.0),
+                step=1.0,
+                key=f"emd_gmc_basal_{paciente}"
+            )
+
+            gmc_actual = st.number_input(
+                "GMC actual (µm)",
+                min_value=0.0,
+                max_value=1200.0,
+                value=valor_requerido(paciente, ficha, "gmc_actual", 350.0),
+                step=1.0,
+                key=f"emd_gmc_actual_{paciente}"
+            )
+
+            st.markdown("---")
+            st.subheader("Agudeza Visual (AVMC)")
+
+            avmc_basal = st.number_input(
+                "AVMC basal (letras)",
+                min_value=0,
+                max_value=100,
+                value=valor_requerido(paciente, ficha, "avmc_basal", 60),
+                step=1,
+                key=f"emd_avmc_basal_{paciente}"
+            )
+
+            avmc_actual = st.number_input(
+                "AVMC actual (letras)",
+                min_value=0,
+                max_value=100,
+                value=valor_requerido(paciente, ficha, "avmc_actual", 65),
+                step=1,
+                key=f"emd_avmc_actual_{paciente}"
+            )
+
+            calcular = st.form_submit_button("Calcular recomendación 🧮")
+
+    # -------------------------
+    # Columna derecha: outputs
+    # -------------------------
+    with col_der:
+        st.subheader("Resultado")
+
+        # Con un paciente identificado no se usan valores de ejemplo: lo que falta
+        # en su ficha queda vacío y hay que ingresarlo antes de guardar la visita
+        faltan = [
+            nombre for nombre, valor in (
+                ("semana", semana), ("GMC basal", gmc_basal), ("GMC actual", gmc_actual),
+                ("AVMC basal", avmc_basal), ("AVMC actual", avmc_actual),
+            ) if valor is None
+        ]
+        if calcular and faltan:
+            st.warning(f"Ingresa {', '.join(faltan)} del paciente para calcular la recomendación.")
+        elif calcular:
+            plan, justificacion, cambio_gmc, cambio_av = algoritmo_emd_cacheado(
+                tipo_paciente,
+                semana,
+                intervalo_actual,
+                gmc_basal,
+                gmc_actual,
+                avmc_basal,
+                avmc_actual
+            )
+
+            entradas = {
+                "tipo_paciente": tipo_paciente, "semana": semana,
+                "intervalo_actual": intervalo_actual, "gmc_basal": gmc_basal,
+                "gmc_actual": gmc_actual, "avmc_basal": avmc_basal, "avmc_actual": avmc_actual,
+            }
+            _auditar(paciente, entradas, plan, justificacion)
+            _guardar_visita(paciente, entradas, plan)
+
+            # Mostrar plan
+            st.success(f"**Plan sugerido:** {plan}")
+
+            # Mostrar justificación
+            st.write(f"**Justificación clínica:** {justificacion}")
+
+            st.markdown("---")
+            st.subheader("Detalles de la evolución")
+
+            if cambio_gmc is not None:
+                st.write(
+                    f"- Cambio porcentual de GMC: "
+                    f"**{cambio_gmc:.1f}%** (de {gmc_basal:.0f} µm a {gmc_actual:.0f} µm)"
+                )
+            else:
+                st.warning("No se pudo calcular el % de cambio de GMC (GMC basal no válido).")
+
+            st.write(
+                f"- Cambio de AVMC: **{cambio_av} letras** "
+                f"(de {avmc_basal} a {avmc_actual})"
+            )
+
+            st.info(
+                "Esta herramienta es solo de apoyo a la decisión y **no reemplaza** el juicio clínico "
+                "ni las guías institucionales."
+            )
+        else:
+            st.info("Ingresa los datos a la izquierda y pulsa **Calcular recomendación**.")
+
+
+def _auditar(paciente, entradas, plan, justificacion):
+    # El tablero se actualiza antes de encolar: al crearse, parte de lo ya escrito.
+    # Recalcular la misma visita no vuelve a contar en el tablero (sí en la auditoría).
+    agregados_cohorte().registrar_visita("emd", entradas, plan, paciente)
+    # Sólo encola: la escritura en disco la hace el hilo del registro
+    try:
+        registro_auditoria().registrar("emd", entradas, plan, justificacion, paciente=paciente)
+    except (RuntimeError, OSError) as error:
+        st.error(f"No se pudo guardar la recomendación en el registro de auditoría: {error}")
+
+
+def _ficha(paciente):
+    if not paciente:
+        return None
+    try:
+        ficha = almacen_pacientes().ficha(paciente)
+    except (sqlite3.Error, OSError) as error:
+        st.error(f"No se pudo leer la ficha del paciente: {error}")
+        return None
+    if ficha is None:
+        st.caption("Sin visitas guardadas: se guardará al calcular la recomendación.")
+    else:
+        st.caption(f"Ficha cargada: {ficha.visitas} visita(s), última el {ficha.actualizado[:10]}.")
+    return ficha
+
+
+def _guardar_visita(paciente, entradas, plan):
+    if not paciente:
+        return
+    try:
+        almacen_pacientes().guardar_visita(paciente, "emd", entradas, plan)
+    except (sqlite3.Error, OSError) as error:
+        st.error(f"No se pudo guardar la visita en la ficha del paciente: {error}")
@@ -0,0 +1,43 @@
+"""
+Página: Inicio.
+"""
+import streamlit as st
+
+# Texto estático de la página: se define una sola vez al importar el módulo.
+INTRODUCCION = """
+Esta app implementa una **herramienta de apoyo a la decisión** para el manejo del
+**Edema Macular Diabético (EMD)** con Anti-VEGF, basada en cambios del **GMC** y la **AVMC**.
+
+En el menú de la izquierda puedes:
+- Ir al **algoritmo EMD (Anti-VEGF)**
+
+>  *Esta herramienta no reemplaza el juicio clínico del oftalmólogo ni las guías formales.*
+"""
+
+RESUMEN_FLUJO = """
+- Clasificar al paciente como **Naïve** o **con tratamiento previo**.
+- Basarse en el **cambio porcentual del GMC** (y el valor absoluto en micras).
+- A la semana 12 en Naïve:
+  - **GMC ≤ 325 µm** → Switch + 3 dosis de carga
+  - **325–400 µm** → Esquema de *Early Switch*
+  - **≥ 400 µm** → Considerar **Ozurdex**
+- En tratamiento previo:
+  - ↓ >10% → espaciar (Q8W)
+  - Estable ±10% → mantener Q4W
+  - ↑ ≥20% → Switch + 3 dosis de carga
+"""
+
+
+def mostrar():
+    st.title("Algoritmos clínicos (EMD y DMRE) 👁️‍🧠")
+
+    st.write(INTRODUCCION)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Versión del prototipo", "0.1.0")
+    with col2:
+        st.metric("Algoritmos activos", 1)
+
+    st.subheader("Resumen del flujo de decisión")
+    st.markdown(RESUMEN_FLUJO)
@@ -0,0 +1,155 @@
+"""
+Página: Mapa de decisión.
+
+Muestra, como mapa de calor, el plan que daría cada algoritmo sobre una malla
+densa de parámetros (GMC basal × GMC actual en EMD, LSR × ΔGMC en DMRE). La
+malla se evalúa de forma vectorizada y se guarda en caché por combinación de
+parámetros, así que volver a un mapa ya visto no recalcula nada.
+"""
+import numpy as np
+import streamlit as st
+
+from algoritmos.mapa import mapa_dmre, mapa_emd
+from algoritmos.resultados import TEXTOS
+
+# Un color por código de plan (RGB)
+COLORES_EMD = np.array([
+    (158, 202, 225),   # Continuar fase de carga
+    (214, 39, 40),     # Switch + 3 dosis de carga
+    (148, 103, 189),   # Ozurdex
+    (127, 127, 127),   # Revisar datos
+    (44, 160, 44),     # Mantener intervalo actual
+    (255, 187, 120),   # Acortar 4 semanas
+    (255, 127, 14),    # Acortar 8 semanas
+    (188, 189, 34),    # Mantener y reevaluar
+    (23, 190, 207),    # Pasar o mantener en Q8W
+    (152, 223, 138),   # Mantener Q4W
+    (240, 240, 240),   # Sin decisión automática
+], dtype=np.uint8)
+
+COLORES_DMRE = np.array([
+    (199, 233, 192),   # Extender a Q8W
+    (116, 196, 118),   # Extender a Q12W
+    (35, 139, 69),     # Extender a Q16W
+    (31, 119, 180),    # Mantener Q16W
+    (255, 127, 14),    # Acortar a Q8W
+    (255, 187, 120),   # Acortar a Q12W
+    (214, 39, 40),     # Mantener Q8W (posible switch)
+    (140, 20, 20),     # Mantener Q8W y considerar switch
+], dtype=np.uint8)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _imagen_emd(tipo_paciente, semana):
+    eje, codigos = mapa_emd(tipo_paciente, semana)
+    # Fila 0 de la imagen = GMC basal más alto (eje Y creciente hacia arriba)
+    return eje, codigos[::-1], COLORES_EMD[codigos[::-1]]
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _imagen_dmre(tipo_paciente, intervalo_actual, referencia, lir, hemorragia_nueva,
+                 delta_av_basal, delta_av_mejor):
+    eje_lsr, eje_delta, codigos = mapa_dmre(
+        tipo_paciente, intervalo_actual, referencia, lir, hemorragia_nueva,
+        delta_av_basal, delta_av_mejor,
+    )
+    return eje_lsr, eje_delta, codigos[::-1], COLORES_DMRE[codigos[::-1]]
+
+
+def _celda(eje, valor):
+    """Índice de la celda de la malla (ejes de paso uniforme) más cercana a `valor`, dentro del eje."""
+    paso = eje[1] - eje[0]
+    return int(np.clip(np.rint((valor - eje[0]) / paso), 0, len(eje) - 1))
+
+
+def _marcar(imagen, fila, columna):
+    """Copia de la imagen con una cruz negra en (fila, columna)."""
+    imagen = imagen.copy()
+    imagen[fila, max(0, columna - 12):columna + 13] = 0
+    imagen[max(0, fila - 12):fila + 13, columna] = 0
+    return imagen
+
+
+def _leyenda(codigos, colores, textos):
+    presentes = np.unique(codigos)
+    for c in presentes:
+        r, g, b = colores[c]
+        st.markdown(
+            f'<span style="display:inline-block;width:14px;height:14px;'
+            f'background:rgb({r},{g},{b});border:1px solid #999;margin-right:6px"></span>'
+            f"{textos[c]}",
+            unsafe_allow_html=True,
+        )
+
+
+def mostrar():
+    st.title("Mapa de decisión 🗺️")
+    st.caption("Plan sugerido para todos los valores de GMC a la vez. Soporte a la decisión; no reemplaza el juicio clínico.")
+
+    algoritmo = st.radio("Algoritmo", ["EMD", "DMRE"], horizontal=True)
+    if algoritmo == "EMD":
+        _mapa_emd()
+    else:
+        _mapa_dmre()
+
+
+@st.fragment
+def _mapa_emd():
+    col_izq, col_der = st.columns([1, 2.2])
+    with col_izq:
+        tipo_paciente = st.radio("Tipo de paciente", ["Naive", "Previo"], key="mapa_emd_tipo")
+        semana = st.number_input("Semana de tratamiento", min_value=0, max_value=200, value=12, step=1)
+        st.markdown("---")
+        st.subheader("Consultar un punto")
+        gmc_basal = st.number_input("GMC basal (µm)", min_value=0.0, max_value=1200.0, value=400.0, step=1.0)
+        gmc_actual = st.number_input("GMC actual (µm)", min_value=0.0, max_value=1200.0, value=350.0, step=1.0)
+
+    eje, codigos, imagen = _imagen_emd(tipo_paciente, semana)
+    fila = len(eje) - 1 - _celda(eje, gmc_basal)
+    columna = _celda(eje, gmc_actual)
+
+    with col_izq:
+        st.success(f"**Plan en el punto:** {TEXTOS['plan_emd'][codigos[fila, columna]]}")
+        st.markdown("---")
+        _leyenda(codigos, COLORES_EMD, TEXTOS["plan_emd"])
+    with col_der:
+        st.image(_marcar(imagen, fila, columna))
+        st.caption(
+            f"Eje X: GMC actual ({eje[0]:.0f} → {eje[-1]:.0f} µm). "
+            f"Eje Y: GMC basal ({eje[0]:.0f} abajo → {eje[-1]:.0f} µm arriba). Pasos de 1 µm."
+        )
+
+
+@st.fragment
+def _mapa_dmre():
+    col_izq, col_der = st.columns([1, 2.2])
+    with col_izq:
+        tipo_paciente = st.radio("Tipo de paciente", ["Naive", "Previo"], key="mapa_dmre_tipo")
+        intervalo_actual = st.selectbox("Intervalo actual", ["Q8W", "Q12W", "Q16W"], index=1)
+        referencia = st.radio("ΔGMC respecto a", ["semana 16", "mínimo histórico"], horizontal=True)
+        lir = st.checkbox("LIR presente")
+        hemorragia_nueva = st.checkbox("Hemorragia macular nueva")
+        delta_av_basal = st.number_input("ΔAVMC vs basal (letras)", min_value=-100, max_value=100, value=0, step=1)
+        delta_av_mejor = st.number_input("ΔAVMC vs mejor (letras)", min_value=-100, max_value=0, value=0, step=1)
+        st.markdown("---")
+        st.subheader("Consultar un punto")
+        lsr = st.number_input("LSR (micras)", min_value=0.0, max_value=500.0, value=30.0, step=1.0)
+        delta_gmc = st.number_input("ΔGMC (µm)", min_value=-200.0, max_value=400.0, value=20.0, step=1.0)
+
+    eje_lsr, eje_delta, codigos, imagen = _imagen_dmre(
+        tipo_paciente, intervalo_actual, referencia, lir, hemorragia_nueva,
+        delta_av_basal, delta_av_mejor,
+    )
+    fila = len(eje_delta) - 1 - _celda(eje_delta, delta_gmc)
+    columna = _celda(eje_lsr, lsr)
+
+    with col_izq:
+        st.success(f"**Plan en el punto:** {TEXTOS['plan_dmre'][codigos[fila, columna]]}")
+        st.markdown("---")
+        _leyenda(codigos, COLORES_DMRE, TEXTOS["plan_dmre"])
+    with col_der:
+        st.image(_marcar(imagen, fila, columna))
+        st.caption(
+            f"Eje X: LSR ({eje_lsr[0]:.0f} → {eje_lsr[-1]:.0f} µm). "
+            f"Eje Y: ΔGMC vs {referencia} ({eje_delta[0]:+.0f} abajo → {eje_delta[-1]:+.0f} µm arriba)."
+        )
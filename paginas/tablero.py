@@ -0,0 +1,69 @@
+"""
+Página: Resultados de la cohorte.
+
+Distribución de los planes sugeridos (extensiones, acortamientos, switch,
+Ozurdex...) por tipo de paciente, intervalo actual y mes, en las visitas
+puntuadas en la app y en los lotes de `puntuar_cohorte.py`. Lee los contadores
+de `algoritmos.tablero`, que se mantienen al puntuar cada visita: ninguna
+re-ejecución recorre las visitas.
+"""
+import streamlit as st
+
+from algoritmos.tablero import agregados_cohorte, recargar_agregados
+
+AGRUPACIONES = {
+    "Tipo de paciente": "tipo_paciente",
+    "Intervalo actual": "intervalo_actual",
+    "Mes": "mes",
+}
+
+
+def mostrar():
+    st.title("Resultados de la cohorte 📊")
+    st.caption(
+        "Planes sugeridos por los algoritmos en las visitas puntuadas en la app "
+        "(una por paciente, datos y día: recalcular no suma) y en los lotes "
+        "puntuados con puntuar_cohorte.py."
+    )
+    if st.button("Recargar", help="Incluye los lotes puntuados desde que se abrió la app."):
+        recargar_agregados()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        algoritmo = st.radio("Algoritmo", ["EMD", "DMRE"], horizontal=True).lower()
+    with col2:
+        agrupacion = st.radio("Agrupar por", list(AGRUPACIONES), horizontal=True)
+
+    agregados = agregados_cohorte()
+    total = agregados.distribucion(algoritmo)
+    if total.empty or not total["Visitas"].iloc[0]:
+        st.info("Todavía no hay visitas puntuadas con este algoritmo.")
+        return
+
+    fila = total.iloc[0]
+    columnas = st.columns(5)
+    for columna, (etiqueta, valor) in zip(columnas, [
+        ("Visitas", f"{int(fila['Visitas']):,}"),
+        ("Extender", f"{fila['Extender']:.1%}"),
+        ("Acortar", f"{fila['Acortar']:.1%}"),
+        ("Switch", f"{fila['Switch']:.1%}"),
+        ("Ozurdex", f"{fila['Ozurdex']:.1%}"),
+    ]):
+        with columna:
+            st.metric(etiqueta, valor)
+
+    st.markdown("---")
+    por_grupo = agregados.distribucion(algoritmo, AGRUPACIONES[agrupacion])
+    # Sólo las categorías que aparecen en este algoritmo
+    categorias = [c for c in por_grupo.columns[1:] if por_grupo[c].any()]
+
+    st.subheader(f"Proporción de cada plan por {agrupacion.lower()}")
+    st.bar_chart(por_grupo[categorias], stack="normalize")
+    st.dataframe(
+        por_grupo[["Visitas", *categorias]],
+        column_config={c: st.column_config.NumberColumn(c, format="percent") for c in categorias},
+    )
+
+    with st.expander("Conteos por plan"):
+        conteos = agregados.conteos(algoritmo, AGRUPACIONES[agrupacion])
+        st.dataframe(conteos.loc[:, conteos.any()])
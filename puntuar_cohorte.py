@@ -0,0 +1,146 @@
+"""
+Puntuación de cohortes completas desde la línea de comandos (sin interfaz Streamlit).
+
+Lee un export de visitas (CSV o Parquet) por bloques, aplica `algoritmo_emd` o
+`algoritmo_dmre` en su versión vectorizada y escribe los planes bloque a bloque,
+de modo que la memoria no depende del tamaño del archivo.
+
+Uso:
+    python puntuar_cohorte.py emd visitas.csv planes.csv
+    python puntuar_cohorte.py dmre visitas.parquet planes.parquet --filas-por-bloque 200000
+    python puntuar_cohorte.py emd visitas.csv planes.csv --trabajadores 0   # todos los núcleos
+    python puntuar_cohorte.py emd visitas.csv planes.csv --version-umbrales 1
+    python puntuar_cohorte.py emd prueba.csv planes.csv --sin-tablero
+
+Las columnas de entrada deben llamarse igual que los parámetros del algoritmo
+(tipo_paciente, semana, gmc_basal, ...). El resto de columnas se copia tal cual.
+Por defecto se aplican los umbrales de la versión vigente (ver `algoritmos.umbrales`).
+
+Los planes se suman al tablero de resultados de la cohorte (base propia del
+tablero, ALGORITMOS_TABLERO; el registro de auditoría no se toca) por tipo de
+paciente, intervalo actual y mes de la columna "fecha" (si no existe, el mes
+actual; vacía o ilegible, "N/D"). Volver a puntuar el mismo archivo reemplaza
+sus conteos.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from algoritmos.cohorte import PUNTUADORES, leer_bloques, puntuar_bloques_en_paralelo
+from algoritmos.tablero import RUTA_POR_DEFECTO as RUTA_TABLERO
+from algoritmos.tablero import SIN_INTERVALO, AgregadosCohorte, guardar_conteos_lote
+from algoritmos.umbrales import version
+
+
+class _Escritor:
+    """Escribe bloques consecutivos en CSV o Parquet sin acumularlos en memoria."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.endswith(".parquet")
+        self._escritor_pq = None
+        self._primero = True
+
+    def escribir(self, bloque):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if self._escritor_pq is None:
+                self._escritor_pq = pq.ParquetWriter(self.ruta, tabla.schema)
+            self._escritor_pq.write_table(tabla)
+        else:
+            bloque.to_csv(
+                self.ruta,
+                mode="w" if self._primero else "a",
+                header=self._primero,
+                index=False,
+            )
+        self._primero = False
+
+    def cerrar(self):
+        if self._escritor_pq is not None:
+            self._escritor_pq.close()
+
+
+def _sumar_al_tablero(agregados, algoritmo, bloque):
+    intervalos = bloque["intervalo_actual"] if "intervalo_actual" in bloque else np.full(len(bloque), SIN_INTERVALO)
+    agregados.registrar_lote(
+        algoritmo, bloque["tipo_paciente"], intervalos, bloque["plan"], bloque.get("fecha"),
+    )
+
+
+def puntuar_archivo(
+    algoritmo, entrada, salida, filas_por_bloque=100_000, trabajadores=1, umbrales=None, tablero=None,
+):
+    """
+    Recorre `entrada` por bloques y escribe los planes en `salida`.
+    Con `trabajadores` > 1 los bloques se puntúan en un pool de procesos,
+    conservando el orden de las filas. `umbrales`: por defecto, los vigentes.
+    Con `tablero` (ruta de la base del tablero), los conteos de planes se
+    guardan para el tablero de resultados al terminar.
+    Devuelve: (filas procesadas, segundos)
+    """
+    bloques = leer_bloques(entrada, filas_por_bloque)
+    if trabajadores > 1:
+        puntuados = puntuar_bloques_en_paralelo(algoritmo, bloques, trabajadores, umbrales=umbrales)
+    else:
+        puntuados = (PUNTUADORES[algoritmo](bloque, umbrales) for bloque in bloques)
+
+    escritor = _Escritor(salida)
+    agregados = AgregadosCohorte() if tablero else None
+    filas = 0
+    inicio = time.perf_counter()
+    try:
+        for bloque in puntuados:
+            escritor.escribir(bloque)
+            if agregados is not None:
+                _sumar_al_tablero(agregados, algoritmo, bloque)
+            filas += len(bloque)
+    finally:
+        escritor.cerrar()
+    if agregados is not None:
+        guardar_conteos_lote(tablero, os.path.abspath(entrada), algoritmo, agregados)
+    return filas, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntúa una cohorte de visitas con EMD o DMRE.")
+    parser.add_argument("algoritmo", choices=["emd", "dmre"])
+    parser.add_argument("entrada", help="Archivo .csv o .parquet de visitas")
+    parser.add_argument("salida", help="Archivo .csv o .parquet de resultados")
+    parser.add_argument("--filas-por-bloque", type=int, default=100_000)
+    parser.add_argument(
+        "--trabajadores", type=int, default=1,
+        help="Procesos en paralelo (por defecto 1; 0 = todos los núcleos)",
+    )
+    parser.add_argument("--version-umbrales", help="Versión de umbrales (por defecto, la vigente)")
+    parser.add_argument(
+        "--sin-tablero", action="store_true",
+        help="No sumar los planes al tablero de resultados (p. ej. datos de prueba)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        version_elegida = version(args.version_umbrales)
+    except KeyError as e:
+        parser.error(e.args[0])
+    trabajadores = args.trabajadores or os.cpu_count() or 1
+    filas, segundos = puntuar_archivo(
+        args.algoritmo, args.entrada, args.salida, args.filas_por_bloque, trabajadores,
+        getattr(version_elegida, args.algoritmo),
+        None if args.sin_tablero else RUTA_TABLERO,
+    )
+    velocidad = filas / segundos if segundos > 0 else float("inf")
+    print(
+        f"{filas} filas en {segundos:.2f} s ({velocidad:,.0f} filas/s), umbrales v{version_elegida.version}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
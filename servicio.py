@@ -0,0 +1,426 @@
+"""
+Servicio HTTP/JSON de decisión (asyncio, sin dependencias externas).
+
+Expone los algoritmos para integraciones (p. ej. la HCE en el check-in), en
+paralelo a la interfaz Streamlit:
+
+    POST /emd          un paciente  → plan, justificación, cambio_gmc, cambio_av
+    POST /dmre         un paciente  → plan, justificación, detalle
+    POST /emd/lote     {"pacientes": [...]} → una evaluación vectorizada para todos
+    POST /dmre/lote    {"pacientes": [...], "incluir_motivos": false}
+    GET  /metricas     percentiles de latencia por ruta (p50/p95/p99)
+    GET  /metricas/prometheus   contadores de reglas (si ALGORITMOS_METRICAS=1)
+    GET  /salud
+
+Los campos de cada paciente se llaman igual que los parámetros de
+`algoritmo_emd` / `algoritmo_dmre`, con los mismos tipos JSON en las rutas de
+un paciente y de lote: números finitos, "lir" / "hemorragia_nueva" como
+true/false (no "Sí"/"No") y textos en "tipo_paciente" / "intervalo_actual";
+cualquier otro valor es un 400. Todos los POST aceptan "version_umbrales"
+(por defecto, la vigente; ver `algoritmos.umbrales`) y la respuesta indica la
+versión aplicada. Las conexiones HTTP/1.1 se mantienen abiertas (keep-alive)
+salvo que el cliente envíe "Connection: close". El decodificado del JSON y la evaluación de cada POST corren en el pool de hilos
+del bucle de eventos, así que un lote grande no bloquea al resto de conexiones.
+
+Uso:
+    python servicio.py --host 127.0.0.1 --puerto 8600
+
+Para pruebas sin red, `ClienteLocal` habla HTTP con el servicio a través de
+streams en memoria.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from algoritmos import algoritmo_dmre, algoritmo_emd
+from algoritmos.cohorte import COLUMNAS_DMRE, COLUMNAS_EMD
+from algoritmos.emd import justificaciones_emd
+from algoritmos.lote import algoritmo_dmre_lote, algoritmo_emd_lote
+from algoritmos.metricas import REGISTRO
+from algoritmos.resultados import TEXTOS, ResultadoDMRE
+from algoritmos.umbrales import version
+
+TAMANO_MAX_CUERPO = 64 * 1024 * 1024
+ESPERA_KEEP_ALIVE_S = 15
+MUESTRAS_LATENCIA = 10_000      # últimas N solicitudes por ruta
+
+_ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorSolicitud(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _nan_a_none(valor):
+    return None if valor != valor else valor
+
+
+_BOOLEANOS = ("lir", "hemorragia_nueva")
+_TEXTOS = ("tipo_paciente", "intervalo_actual")
+
+
+def _validar(campo, valores):
+    """
+    Columna de valores JSON de un campo → array, o 400 si algún valor no es del
+    tipo del parámetro (p. ej. null o "No" donde se espera un número o un bool).
+    """
+    columna = np.asarray(valores)
+    if campo in _BOOLEANOS:
+        valido, esperado = columna.dtype == bool, "true/false"
+    elif campo in _TEXTOS:
+        valido, esperado = columna.dtype.kind == "U", "un texto"
+    else:
+        valido = columna.dtype.kind in "iu" or (columna.dtype.kind == "f" and np.isfinite(columna).all())
+        esperado = "un número finito"
+    if not valido:
+        raise ErrorSolicitud(400, f"Valor inválido en {campo!r}: se espera {esperado}")
+    return columna
+
+
+def _validar_paciente(datos):
+    """Valida los campos de una solicitud de un paciente (los que faltan o sobran los rechaza el algoritmo)."""
+    for campo, valor in datos.items():
+        _validar(campo, [valor])
+
+
+def _columnas(pacientes, nombres):
+    """Lista de dicts → columnas validadas en el orden de los parámetros del algoritmo."""
+    try:
+        columnas = [[p[c] for p in pacientes] for c in nombres]
+    except KeyError as e:
+        raise ErrorSolicitud(400, f"Falta el campo {e.args[0]!r} en algún paciente")
+    except TypeError:
+        raise ErrorSolicitud(400, "'pacientes' debe ser una lista de objetos")
+    return [_validar(c, valores) for c, valores in zip(nombres, columnas)]
+
+
+def _umbrales(datos, algoritmo):
+    """Versión pedida en "version_umbrales" (o la vigente). Devuelve: (identificador, umbrales)."""
+    try:
+        v = version(datos.pop("version_umbrales", None))
+    except KeyError as e:
+        raise ErrorSolicitud(400, e.args[0])
+    return v.version, getattr(v, algoritmo)
+
+
+def _evaluar_lote(funcion, columnas, umbrales):
+    """Evalúa un lote; valores no numéricos o de tipo incorrecto son un error del cliente."""
+    try:
+        return funcion(*columnas, umbrales=umbrales)
+    except (TypeError, ValueError) as e:
+        raise ErrorSolicitud(400, f"Valores inválidos en 'pacientes': {e}")
+
+
+class ServicioDecision:
+    def __init__(self):
+        self.latencias = {}
+        self._lock_latencias = threading.Lock()
+        self._rutas = {
+            ("POST", "/emd"): self._emd,
+            ("POST", "/dmre"): self._dmre,
+            ("POST", "/emd/lote"): self._emd_lote,
+            ("POST", "/dmre/lote"): self._dmre_lote,
+            ("GET", "/metricas"): self._metricas,
+            ("GET", "/metricas/prometheus"): self._prometheus,
+            ("GET", "/salud"): self._salud,
+        }
+
+    # -------------------------
+    # Rutas
+    # -------------------------
+    def _emd(self, datos):
+        id_version, umbrales = _umbrales(datos, "emd")
+        _validar_paciente(datos)
+        try:
+            plan, just, cambio_gmc, cambio_av = algoritmo_emd(**datos, umbrales=umbrales)
+        except (TypeError, ValueError) as e:
+            raise ErrorSolicitud(400, f"Parámetros inválidos: {e}")
+        return {"plan": plan, "justificacion": just, "cambio_gmc": cambio_gmc, "cambio_av": cambio_av,
+                "version_umbrales": id_version}
+
+    def _dmre(self, datos):
+        id_version, umbrales = _umbrales(datos, "dmre")
+        _validar_paciente(datos)
+        try:
+            plan, just, detalle = algoritmo_dmre(**datos, umbrales=umbrales)
+        except (TypeError, ValueError) as e:
+            raise ErrorSolicitud(400, f"Parámetros inválidos: {e}")
+        return {"plan": plan, "justificacion": just, "detalle": detalle, "version_umbrales": id_version}
+
+    def _emd_lote(self, datos):
+        id_version, umbrales = _umbrales(datos, "emd")
+        pacientes = datos.get("pacientes", [])
+        if not pacientes:
+            return {"version_umbrales": id_version, "resultados": []}
+        if not isinstance(pacientes, list):
+            raise ErrorSolicitud(400, "'pacientes' debe ser una lista de objetos")
+        plan, just, cambio_gmc, cambio_av = _evaluar_lote(
+            algoritmo_emd_lote, _columnas(pacientes, COLUMNAS_EMD), umbrales,
+        )
+        planes, justificaciones = TEXTOS["plan_emd"], justificaciones_emd(umbrales)
+        return {"version_umbrales": id_version, "resultados": [
+            {"plan": planes[p], "justificacion": justificaciones[j],
+             "cambio_gmc": _nan_a_none(c), "cambio_av": a}
+            for p, j, c, a in zip(plan.tolist(), just.tolist(), cambio_gmc.tolist(), cambio_av.tolist())
+        ]}
+
+    def _dmre_lote(self, datos):
+        id_version, umbrales = _umbrales(datos, "dmre")
+        pacientes = datos.get("pacientes", [])
+        if not pacientes:
+            return {"version_umbrales": id_version, "resultados": []}
+        if not isinstance(pacientes, list):
+            raise ErrorSolicitud(400, "'pacientes' debe ser una lista de objetos")
+        columnas = _columnas(pacientes, COLUMNAS_DMRE)
+        r = _evaluar_lote(algoritmo_dmre_lote, columnas, umbrales)
+        planes, justificaciones = TEXTOS["plan_dmre"], TEXTOS["justificacion_dmre"]
+
+        resultados = []
+        for fila in r.tolist():
+            registro = dict(zip(r.dtype.names, fila))
+            salida = {
+                "plan": planes[registro.pop("plan")],
+                "justificacion": justificaciones[registro.pop("justificacion")],
+                **registro,
+            }
+            salida["delta_gmc_vs_sem16"] = _nan_a_none(salida["delta_gmc_vs_sem16"])
+            salida["delta_gmc_vs_min"] = _nan_a_none(salida["delta_gmc_vs_min"])
+            resultados.append(salida)
+        if datos.get("incluir_motivos"):
+            for salida, fila, tipo in zip(resultados, r, columnas[0]):
+                salida["motivos"] = ResultadoDMRE.desde_fila(fila, tipo, umbrales).motivos()
+        return {"version_umbrales": id_version, "resultados": resultados}
+
+    def _metricas(self, _datos):
+        return {"latencia_ms": self.percentiles()}
+
+    def _prometheus(self, _datos):
+        return REGISTRO.como_prometheus()
+
+    def _salud(self, _datos):
+        return {"estado": "ok"}
+
+    # -------------------------
+    # Latencias
+    # -------------------------
+    def _observar(self, ruta, segundos):
+        # Se llama desde el bucle de eventos y desde los hilos que atienden los POST
+        with self._lock_latencias:
+            muestras = self.latencias.get(ruta)
+            if muestras is None:
+                muestras = self.latencias[ruta] = [deque(maxlen=MUESTRAS_LATENCIA), 0]
+            muestras[0].append(segundos * 1000)
+            muestras[1] += 1
+
+    def percentiles(self):
+        """Devuelve: {ruta: {"solicitudes", "p50", "p95", "p99"}} sobre las últimas muestras (ms)."""
+        with self._lock_latencias:
+            copia = [(ruta, np.fromiter(m, float), total) for ruta, (m, total) in self.latencias.items()]
+        salida = {}
+        for ruta, muestras, total in copia:
+            p50, p95, p99 = np.percentile(muestras, [50, 95, 99]).tolist()
+            salida[ruta] = {"solicitudes": total, "p50": p50, "p95": p95, "p99": p99}
+        return salida
+
+    # -------------------------
+    # Enrutamiento (independiente del transporte)
+    # -------------------------
+    def atender(self, metodo, ruta, cuerpo):
+        """Devuelve: (estado, tipo de contenido, cuerpo en bytes)."""
+        inicio = time.perf_counter()
+        ruta = ruta.split("?", 1)[0]
+        manejador = self._rutas.get((metodo, ruta))
+        try:
+            if manejador is None:
+                existe = any(r == ruta for _, r in self._rutas)
+                raise ErrorSolicitud(405 if existe else 404, f"{metodo} {ruta} no disponible")
+            datos = {}
+            if metodo == "POST":
+                try:
+                    datos = json.loads(cuerpo or b"{}")
+                except ValueError:
+                    raise ErrorSolicitud(400, "El cuerpo no es JSON válido")
+                if not isinstance(datos, dict):
+                    raise ErrorSolicitud(400, "El cuerpo debe ser un objeto JSON")
+            respuesta = manejador(datos)
+            estado = 200
+        except ErrorSolicitud as e:
+            estado, respuesta = e.estado, {"error": str(e)}
+        except Exception as e:      # el servicio no debe caerse por una solicitud
+            estado, respuesta = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        if isinstance(respuesta, str):
+            tipo, datos_salida = "text/plain; version=0.0.4", respuesta.encode()
+        else:
+            tipo = "application/json"
+            try:
+                # allow_nan=False: NaN/Infinity no son JSON; mejor un 500 que una respuesta ilegible
+                datos_salida = json.dumps(respuesta, ensure_ascii=False, allow_nan=False).encode()
+            except ValueError as e:
+                estado, datos_salida = 500, json.dumps({"error": f"Respuesta no serializable: {e}"}).encode()
+        # Rutas desconocidas se agrupan para no acumular una serie por URL arbitraria
+        self._observar(ruta if manejador else "(otras)", time.perf_counter() - inicio)
+        return estado, tipo, datos_salida
+
+    # -------------------------
+    # Transporte HTTP/1.1
+    # -------------------------
+    async def manejar_conexion(self, lector, escritor):
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(lector.readline(), ESPERA_KEEP_ALIVE_S)
+                except asyncio.TimeoutError:
+                    break
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                conexion = cabeceras.get("connection", "").lower()
+                mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+
+                try:
+                    largo = int(cabeceras.get("content-length", 0) or 0)
+                except ValueError:
+                    largo = -1
+                if largo < 0:
+                    # Sin un largo válido no se sabe dónde empieza la siguiente solicitud
+                    estado, tipo, cuerpo = 400, "application/json", '{"error": "Content-Length inválido"}'.encode()
+                    mantener = False
+                elif largo > TAMANO_MAX_CUERPO:
+                    estado, tipo, cuerpo = 413, "application/json", b'{"error": "Cuerpo demasiado grande"}'
+                    mantener = False
+                elif metodo == "POST":
+                    # JSON y evaluación fuera del bucle: las demás conexiones siguen atendiéndose
+                    cuerpo = await lector.readexactly(largo) if largo else b""
+                    estado, tipo, cuerpo = await bucle.run_in_executor(None, self.atender, metodo, ruta, cuerpo)
+                else:
+                    cuerpo = await lector.readexactly(largo) if largo else b""
+                    estado, tipo, cuerpo = self.atender(metodo, ruta, cuerpo)
+
+                escritor.write(
+                    f"HTTP/1.1 {estado} {_ESTADOS.get(estado, '')}\r\n"
+                    f"Content-Type: {tipo}\r\n"
+                    f"Content-Length: {len(cuerpo)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1")
+                    + cuerpo
+                )
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host="127.0.0.1", puerto=8600):
+        return await asyncio.start_server(self.manejar_conexion, host, puerto)
+
+
+class _EscritorMemoria:
+    """Extremo de escritura de una conexión en memoria: alimenta el lector del otro lado."""
+
+    def __init__(self, destino):
+        self._destino = destino
+
+    def write(self, datos):
+        self._destino.feed_data(datos)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        if not self._destino.at_eof():
+            self._destino.feed_eof()
+
+
+class ClienteLocal:
+    """
+    Cliente HTTP que se conecta al servicio por streams en memoria (sin red).
+    Mantiene una única conexión keep-alive:
+
+        async with ClienteLocal(ServicioDecision()) as cliente:
+            estado, datos = await cliente.post("/emd", {...})
+    """
+
+    def __init__(self, servicio):
+        self.servicio = servicio
+
+    async def __aenter__(self):
+        lector_servidor = asyncio.StreamReader()
+        self._lector = asyncio.StreamReader()
+        self._escritor = _EscritorMemoria(lector_servidor)
+        self._tarea = asyncio.create_task(
+            self.servicio.manejar_conexion(lector_servidor, _EscritorMemoria(self._lector))
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        self._escritor.close()
+        await self._tarea
+
+    async def solicitar(self, metodo, ruta, datos=None):
+        cuerpo = b"" if datos is None else json.dumps(datos).encode()
+        self._escritor.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: local\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode()
+            + cuerpo
+        )
+        estado = int((await self._lector.readline()).split()[1])
+        cabeceras = {}
+        while (linea := await self._lector.readline()) not in (b"\r\n", b""):
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        respuesta = await self._lector.readexactly(int(cabeceras["content-length"]))
+        if cabeceras["content-type"].startswith("application/json"):
+            return estado, json.loads(respuesta)
+        return estado, respuesta.decode()
+
+    async def post(self, ruta, datos):
+        return await self.solicitar("POST", ruta, datos)
+
+    async def get(self, ruta):
+        return await self.solicitar("GET", ruta)
+
+
+async def _servir(host, puerto):
+    servicio = ServicioDecision()
+    servidor = await servicio.iniciar(host, puerto)
+    print(f"Servicio de decisión escuchando en http://{host}:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de decisión EMD/DMRE.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8600)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
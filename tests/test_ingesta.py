@@ -0,0 +1,80 @@
+"""Ingesta de exportaciones OCT sobre carpetas sintéticas."""
+import os
+
+from algoritmos.ingesta import leer_archivo, puntuar_exportaciones
+from benchmarks.rendimiento import exportaciones_sinteticas
+
+
+def _escribir(directorio, nombre, contenido, mtime):
+    ruta = os.path.join(directorio, nombre)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.utime(ruta, (mtime, mtime))
+    return ruta
+
+
+def _csv(paciente, lado, fecha, gmc, avmc=""):
+    return f"PatientID,Eye,ScanDate,CST,BCVA\n{paciente},{lado},{fecha},{gmc},{avmc}\n"
+
+
+def test_carpeta_sintetica_sin_perdidas(tmp_path):
+    validas = exportaciones_sinteticas(str(tmp_path), 600)
+    errores = []
+    puntuadas = list(puntuar_exportaciones(str(tmp_path), trabajadores=4, errores=errores))
+    assert len(puntuadas) == validas
+    assert len(errores) == 600 - validas
+    assert all(ruta.endswith(".xml") for ruta, _ in errores)
+
+
+def test_exploracion_tardia_se_evalua_en_orden_de_fecha(tmp_path):
+    # El archivo de febrero llega (mtime) después del de marzo
+    _escribir(tmp_path, "a.csv", _csv("P1", "OD", "2026-01-01", 300, 60), 1000)
+    _escribir(tmp_path, "b.csv", _csv("P1", "OD", "2026-03-01", 280, 60), 1001)
+    _escribir(tmp_path, "c.csv", _csv("P1", "OD", "2026-02-01", 290, 55), 1002)
+    errores = []
+    puntuadas = list(puntuar_exportaciones(str(tmp_path), errores=errores))
+    assert errores == []
+    assert [e.fecha.month for e, _ in puntuadas] == [1, 2, 3]
+    # Semana desde la exploración más antigua, nunca negativa; basal = enero
+    deltas = [r[2]["delta_vs_basal_letras"] for _, r in puntuadas]
+    assert deltas == [0, -5, 0]
+
+
+def test_sin_avmc_no_activa_criterios_de_vision(tmp_path):
+    _escribir(tmp_path, "a.csv", _csv("P1", "OD", "2026-01-01", 300, 70), 1000)
+    _escribir(tmp_path, "b.csv", _csv("P1", "OD", "2026-02-01", 300), 1001)
+    (_, primero), (exploracion, segundo) = puntuar_exportaciones(str(tmp_path))
+    assert exploracion.avmc is None
+    assert segundo[2]["delta_vs_basal_letras"] == 0
+    assert not segundo[2]["actividad"]
+
+
+def test_alias_de_fabricantes_csv_y_xml(tmp_path):
+    ruta_csv = _escribir(
+        tmp_path, "a.csv",
+        "Patient ID,Laterality,Exam Date,CSFT,IRF,SRF Height\nP7,L,2026-05-04,312.5,Yes,40\n", 1000,
+    )
+    ruta_xml = _escribir(
+        tmp_path, "b.xml",
+        '<Export><Exam laterality="R"><Patient>P7</Patient><ExamDate>2026-05-04T09:30:00</ExamDate>'
+        "<CentralSubfieldThickness>280</CentralSubfieldThickness><IntraretinalFluid>false</IntraretinalFluid>"
+        "</Exam></Export>", 1001,
+    )
+    (csv_,), _ = leer_archivo(ruta_csv)
+    (xml_,), _ = leer_archivo(ruta_xml)
+    assert (csv_.ojo, csv_.gmc, csv_.lir, csv_.lsr_micras) == ("P7-OI", 312.5, True, 40.0)
+    assert (xml_.ojo, xml_.gmc, xml_.lir, xml_.lsr_micras) == ("P7-OD", 280.0, False, 0.0)
+
+
+def test_columna_srf_de_presencia_no_descarta_el_registro(tmp_path):
+    ruta = _escribir(tmp_path, "a.csv", "PatientID,Eye,ScanDate,CST,SRF\nP1,OD,2026-01-01,300,present\n", 1000)
+    exploraciones, errores = leer_archivo(ruta)
+    assert errores == []
+    assert len(exploraciones) == 1
+
+
+def test_registro_incompleto_se_anota(tmp_path):
+    ruta = _escribir(tmp_path, "a.csv", "PatientID,Eye,ScanDate\nP1,OD,2026-01-01\n", 1000)
+    exploraciones, errores = leer_archivo(ruta)
+    assert exploraciones == []
+    assert errores == [(ruta, "faltan campos: gmc")]
@@ -0,0 +1,45 @@
+"""Fichas de pacientes: visitas reenviadas, valores requeridos y pool agotado."""
+import sqlite3
+
+import pytest
+
+from algoritmos.pacientes import AlmacenPacientes, PoolConexiones, valor_requerido
+
+EMD = {
+    "tipo_paciente": "Previo", "semana": 20, "intervalo_actual": "Q4W",
+    "gmc_basal": 380.0, "gmc_actual": 360.0, "avmc_basal": 55, "avmc_actual": 60,
+}
+
+
+def test_reenviar_la_misma_visita_no_la_duplica(tmp_path):
+    almacen = AlmacenPacientes(str(tmp_path / "pacientes.sqlite3"))
+    for _ in range(3):
+        ficha = almacen.guardar_visita("OD-1", "emd", EMD, "Mantener intervalo Q4W")
+    assert ficha.visitas == 1
+    assert len(almacen.ultimas_visitas("OD-1")) == 1
+
+    # Otra visita (otros datos) sí cuenta
+    ficha = almacen.guardar_visita("OD-1", "emd", dict(EMD, semana=24, gmc_actual=350.0), "Mantener intervalo Q4W")
+    assert ficha.visitas == 2
+    assert ficha.gmc_min_hist == 350.0
+    almacen.cerrar()
+
+
+def test_paciente_nuevo_sin_valores_de_ejemplo(tmp_path):
+    almacen = AlmacenPacientes(str(tmp_path / "pacientes.sqlite3"))
+    assert valor_requerido("", None, "gmc_basal", 400.0) == 400.0
+    assert valor_requerido("OD-1", None, "gmc_basal", 400.0) is None
+
+    ficha = almacen.guardar_visita("OD-1", "emd", EMD, "Mantener intervalo Q4W")
+    assert valor_requerido("OD-1", ficha, "gmc_basal", 400.0) == 380.0
+    assert valor_requerido("OD-1", ficha, "lsr_micras", 30.0) is None
+    almacen.cerrar()
+
+
+def test_pool_agotado_es_un_error_de_sqlite(tmp_path):
+    pool = PoolConexiones(str(tmp_path / "pacientes.sqlite3"), tamano=1, espera_s=0.01)
+    with pool.conexion():
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.conexion():
+                pass
+    pool.cerrar()
@@ -0,0 +1,82 @@
+"""Servicio de decisión probado con `ClienteLocal` (HTTP en memoria, sin red)."""
+import asyncio
+
+from algoritmos import algoritmo_dmre, algoritmo_emd
+from servicio import ClienteLocal, ServicioDecision
+
+EMD = {
+    "tipo_paciente": "Naive", "semana": 12, "intervalo_actual": "Q8W",
+    "gmc_basal": 420.0, "gmc_actual": 300.0, "avmc_basal": 55, "avmc_actual": 65,
+}
+DMRE = {
+    "tipo_paciente": "Previo", "intervalo_actual": "Q12W", "lir": False, "lsr_micras": 0.0,
+    "avmc_basal": 60, "avmc_mejor": 70, "avmc_actual": 68, "hemorragia_nueva": False,
+    "gmc_sem16": 280.0, "gmc_min_hist": 260.0, "gmc_actual": 270.0,
+}
+
+
+def _sesion(*solicitudes):
+    """Envía las solicitudes (método, ruta, datos) por una misma conexión keep-alive."""
+    async def correr():
+        async with ClienteLocal(ServicioDecision()) as cliente:
+            return [await cliente.solicitar(metodo, ruta, datos) for metodo, ruta, datos in solicitudes]
+    return asyncio.run(correr())
+
+
+def test_un_paciente_coincide_con_el_algoritmo():
+    (estado_emd, emd), (estado_dmre, dmre) = _sesion(("POST", "/emd", EMD), ("POST", "/dmre", DMRE))
+    assert estado_emd == estado_dmre == 200
+    assert emd["plan"] == algoritmo_emd(**EMD)[0]
+    assert dmre["plan"] == algoritmo_dmre(**DMRE)[0]
+    assert emd["version_umbrales"] == dmre["version_umbrales"]
+
+
+def test_lote_coincide_con_un_paciente():
+    pacientes = [dict(DMRE, lir=lir, intervalo_actual=i) for lir in (False, True) for i in ("Q8W", "Q12W", "Q16W")]
+    [(estado, datos)] = _sesion(("POST", "/dmre/lote", {"pacientes": pacientes, "incluir_motivos": True}))
+    assert estado == 200
+    for paciente, resultado in zip(pacientes, datos["resultados"]):
+        plan, _, detalle = algoritmo_dmre(**paciente)
+        assert resultado["plan"] == plan
+        assert resultado["motivos"] == detalle["motivos"]
+
+
+def test_si_no_en_texto_es_400_en_ambas_rutas():
+    respuestas = _sesion(
+        ("POST", "/dmre", dict(DMRE, lir="No")),
+        ("POST", "/dmre/lote", {"pacientes": [DMRE, dict(DMRE, lir="No")]}),
+        ("POST", "/dmre/lote", {"pacientes": [dict(DMRE, hemorragia_nueva=0)]}),
+    )
+    assert [estado for estado, _ in respuestas] == [400, 400, 400]
+    assert "lir" in respuestas[1][1]["error"]
+
+
+def test_numero_nulo_o_texto_es_400_en_ambas_rutas():
+    respuestas = _sesion(
+        ("POST", "/emd", dict(EMD, gmc_basal=None)),
+        ("POST", "/emd/lote", {"pacientes": [EMD, dict(EMD, gmc_basal=None)]}),
+        ("POST", "/emd/lote", {"pacientes": [dict(EMD, avmc_actual="65")]}),
+        ("POST", "/dmre/lote", {"pacientes": [dict(DMRE, gmc_actual=None)]}),
+    )
+    assert [estado for estado, _ in respuestas] == [400, 400, 400, 400]
+
+
+def test_gmc_basal_no_valido_devuelve_null_no_nan():
+    [(estado, datos)] = _sesion(("POST", "/emd/lote", {"pacientes": [dict(EMD, gmc_basal=0.0)]}))
+    assert estado == 200
+    assert datos["resultados"][0]["cambio_gmc"] is None
+
+
+def test_errores_de_protocolo_y_metricas():
+    respuestas = _sesion(
+        ("POST", "/emd/lote", {"pacientes": "no"}),
+        ("POST", "/emd", {"version_umbrales": "no-existe", **EMD}),
+        ("GET", "/emd", None),
+        ("GET", "/nada", None),
+        ("GET", "/salud", None),
+        ("GET", "/metricas", None),
+    )
+    assert [estado for estado, _ in respuestas] == [400, 400, 405, 404, 200, 200]
+    latencias = respuestas[-1][1]["latencia_ms"]
+    assert latencias["/emd/lote"]["solicitudes"] == 1
+    assert latencias["/salud"]["solicitudes"] == 1